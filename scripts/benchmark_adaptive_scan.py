@@ -0,0 +1,77 @@
+#!/usr/local/bin/python
+
+import os
+import tempfile
+import numpy as np
+from probeshooter import *
+from dummy_hardware_api import *
+
+
+# ===== Parameters ====================================================================================================
+# Spectrum analyzer
+SA_FREQ_START = 1000e6
+SA_FREQ_STOP = 1400e6
+SA_FREQ_RBW = 500e3
+SA_FREQ_BINS = 2001
+
+# Position (x, y)
+POS_LEFT_TOP = (1400000, 500000)
+POS_RIGHT_BOTTOM = (1600000, 700000)
+GRID_X_DIV = 101
+GRID_Y_DIV = 101
+
+# Simulated die
+HOTSPOTS = [LeakageHotspot(1450000, 560000, 1.2e9, 7, radius=8000),
+            LeakageHotspot(1550000, 640000, 1.2e9, 7, radius=8000, imd_power_w=6e-12)]
+F_CLOCK = 1.2e9
+C_GADGET = 7
+
+# Aiming / adaptive scan
+PERCENTILE = 0.9
+TOP_N = 0.05
+COARSE_STEP = 8
+RANDOM_SEED = 0
+# =====================================================================================================================
+
+
+def build_instruments():
+    die = SimulatedDie(HOTSPOTS, seed=RANDOM_SEED)
+    xyz = SimulatedXYZ(time_scale=0)
+    sa = SimulatedSpectrumAnalyzer(die, xyz, time_scale=0)
+    sa.set_params(SA_FREQ_START, SA_FREQ_STOP, SA_FREQ_RBW, SA_FREQ_BINS)
+    xyz.move_to_xyz(POS_LEFT_TOP[0], POS_LEFT_TOP[1], 0)
+    return xyz, sa
+
+
+def aim_error_stage_units(final_pt_xy):
+    unit_xy = ((POS_RIGHT_BOTTOM[0] - POS_LEFT_TOP[0]) / (GRID_X_DIV - 1),
+               (POS_RIGHT_BOTTOM[1] - POS_LEFT_TOP[1]) / (GRID_Y_DIV - 1))
+    aim_xy = np.array([(POS_LEFT_TOP[0] + x * unit_xy[0], POS_LEFT_TOP[1] + y * unit_xy[1]) for x, y in final_pt_xy])
+    return np.array([np.min(np.hypot(aim_xy[:, 0] - h.position_x, aim_xy[:, 1] - h.position_y)) for h in HOTSPOTS])
+
+
+x_space = np.linspace(POS_LEFT_TOP[0], POS_RIGHT_BOTTOM[0], GRID_X_DIV, dtype=np.int32)
+y_space = np.linspace(POS_LEFT_TOP[1], POS_RIGHT_BOTTOM[1], GRID_Y_DIV, dtype=np.int32)
+freq = np.linspace(SA_FREQ_START, SA_FREQ_STOP, SA_FREQ_BINS)
+leakage_fn = make_nearest_freq_leakage_fn(freq, [F_CLOCK - F_CLOCK / C_GADGET, F_CLOCK + F_CLOCK / C_GADGET])
+temp_dir = tempfile.TemporaryDirectory()
+
+results = {}
+for mode in ['full', 'adaptive']:
+    xyz, sa = build_instruments()
+    writer = PSDChunkWriter(temp_dir.name + os.sep + mode, GRID_Y_DIV, GRID_X_DIV, SA_FREQ_BINS, resume=False)
+    # A full scan is an adaptive scan whose coarse step is already 1.
+    scan = AdaptiveScan(xyz, sa, writer, x_space, y_space, leakage_fn,
+                        coarse_step=1 if mode == 'full' else COARSE_STEP, percentile=PERCENTILE, top_n=TOP_N)
+    r = scan.run()
+    writer.close()
+    results[mode] = r
+    err = aim_error_stage_units(r['final_pt_xy'])
+    print(f"[{mode:<8}] points: {r['n_points']:>6}, rounds: {len(r['history'])}, moves: {xyz.n_moves:>6}, "
+          f"simulated motion: {xyz.motion_time_s:8.1f}s, sweep: {sa.sweep_time_total_s:8.1f}s, "
+          f"transfer: {sa.transfer_time_total_s:8.1f}s")
+    print(f"{'':<11}aim points: {len(r['final_pt_xy'])}, "
+          f"aim error per hotspot: {', '.join(f'{e:.0f}' for e in err)} [stage units]")
+    pass
+
+print(f"\nPoint reduction: {results['full']['n_points'] / results['adaptive']['n_points']:.1f}x")
@@ -0,0 +1,91 @@
+#!/usr/local/bin/python
+
+import time
+import itertools
+import numpy as np
+from scipy.ndimage import gaussian_filter
+from probeshooter import *
+
+
+# ===== Parameters ====================================================================================================
+MAP_SIZE = 101
+FILTER_CHAINS = [
+    [('median', (3, 3)), ('mean', (5, 5))],
+    [('median', (3, 3)), ('mean', (3, 3))],
+    [('median', (5, 5)), ('mean', (5, 5))],
+    [('mean', (5, 5))]
+]
+PERCENTILES = [0.75, 0.81, 0.85, 0.9, 0.95]
+TOP_N_LIST = [0.03, 0.05, 5]
+EPS_LIST = [1.0, 1.5]
+MIN_SAMPLES_LIST = [3, 5]
+STABILITY_RADIUS = 2.0
+N_WORKERS = 4
+RANDOM_SEED = 0
+# =====================================================================================================================
+
+
+def synthetic_leakage_map(rng, size):
+    # Two humps of different strength on smoothed noise.
+    m = gaussian_filter(rng.random((size, size)), sigma=1)
+    yy, xx = np.mgrid[:size, :size]
+    for (cx, cy), amp in [((0.3 * size, 0.25 * size), 1.0), ((0.65 * size, 0.7 * size), 0.6)]:
+        m += amp * np.exp(-((xx - cx) ** 2 + (yy - cy) ** 2) / (2 * (0.04 * size) ** 2))
+    return m
+
+
+def naive_sweep(m):
+    # Every configuration reruns the whole chain.
+    r = []
+    for chain, percentile, eps, min_samples, top_n in itertools.product(FILTER_CHAINS, PERCENTILES, EPS_LIST,
+                                                                        MIN_SAMPLES_LIST, TOP_N_LIST):
+        f = m
+        for filter_type, size_xy in chain:
+            f = simple_2d_filter(f, filter_type, size_xy)
+        threshold = calc_top_n_percentile_values_batch(f[np.newaxis], percentile)[0]
+        humps_mask_xy_list = np.argwhere(f >= threshold)[:, [1, 0]]
+        r.append(aim_points_extraction(f, humps_mask_xy_list, top_n=top_n, dbscan_min_samples=min_samples,
+                                       dbscan_eps=eps)['final_pt_xy'][0])
+    return np.array(r)
+
+
+rng = np.random.default_rng(RANDOM_SEED)
+m = synthetic_leakage_map(rng, MAP_SIZE)
+kwargs = dict(filter_chains=FILTER_CHAINS, percentiles=PERCENTILES, top_n=TOP_N_LIST, dbscan_eps=EPS_LIST,
+              dbscan_min_samples=MIN_SAMPLES_LIST, stability_radius=STABILITY_RADIUS)
+
+start_t = time.perf_counter()
+naive_pts = naive_sweep(m)
+naive_s = time.perf_counter() - start_t
+
+sweep = AimingParameterSweep(m)
+start_t = time.perf_counter()
+table = sweep.run(**kwargs)
+sweep_s = time.perf_counter() - start_t
+start_t = time.perf_counter()
+sweep.run(**kwargs)
+cached_s = time.perf_counter() - start_t
+start_t = time.perf_counter()
+parallel_table = AimingParameterSweep(m).run(n_workers=N_WORKERS, **kwargs)
+parallel_s = time.perf_counter() - start_t
+
+# Row order of the table: filter chain, percentile, eps, min_samples, top_n (same as 'naive_sweep').
+assert np.allclose(np.stack([table['x'], table['y']], axis=1), naive_pts)
+assert np.array_equal(table['x'], parallel_table['x']) and np.array_equal(table['y'], parallel_table['y'])
+print(f"Parity: {len(table)} configurations, identical aim points.\n")
+
+print(f"{'Mode':<28}{'Time [s]':>10}{'Speed-up':>10}")
+for name, elapsed in [('Naive (full chain each)', naive_s), ('Sweep (cold)', sweep_s),
+                      (f'Sweep ({N_WORKERS} workers)', parallel_s), ('Sweep (cached rerun)', cached_s)]:
+    print(f"{name:<28}{elapsed:>10.3f}{naive_s / elapsed:>10.1f}")
+# A cold sweep saves little over the naive loop: most of its time is the per-cluster clustering of the 'aim' stage,
+# which still runs once per configuration. The cache mainly pays off on reruns.
+print(f"\nStage totals [s]: filter {table['filter_s'].sum():.3f}, threshold {table['threshold_s'].sum():.3f}, "
+      f"cluster {table['cluster_s'].sum():.3f}, aim {table['aim_s'].sum():.3f}\n")
+
+print(f"{'Filter chain':<34}{'Perc.':>6}{'top_n':>6}{'eps':>5}{'min_s':>6}{'x':>7}{'y':>7}{'Conf.':>7}{'Stab.':>7}")
+for row in np.sort(table, order=['stability', 'confidence'])[::-1][:10]:
+    chain = ' > '.join(f"{t}{s[0]}x{s[1]}" for t, s in FILTER_CHAINS[row['filter_id']])
+    print(f"{chain:<34}{row['percentile']:>6.2f}{row['top_n']:>6.2f}{row['dbscan_eps']:>5.1f}"
+          f"{row['dbscan_min_samples']:>6d}{row['x']:>7.1f}{row['y']:>7.1f}{row['confidence']:>7.3f}"
+          f"{row['stability']:>7.2f}")
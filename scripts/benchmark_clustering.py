@@ -0,0 +1,45 @@
+#!/usr/local/bin/python
+
+import time
+import numpy as np
+from scipy.ndimage import gaussian_filter
+from sklearn.cluster import DBSCAN
+from probeshooter import *
+
+
+# ===== Parameters ====================================================================================================
+# Timing only; the parity checks against sklearn's DBSCAN are in 'tests/test_clustering.py'.
+MAP_SIZES = [101, 201, 401, 1001]
+N_REPEAT = 5
+RANDOM_SEED = 0
+# =====================================================================================================================
+
+
+def random_leakage_map(rng, size):
+    # Smooth humps on noise, similar to a filtered leakage map.
+    return gaussian_filter(rng.random((size, size)), sigma=rng.uniform(1, 4))
+
+
+def best_time(fn):
+    elapsed = []
+    for _ in range(N_REPEAT):
+        start_t = time.perf_counter()
+        fn()
+        elapsed.append(time.perf_counter() - start_t)
+    return min(elapsed)
+
+
+rng = np.random.default_rng(RANDOM_SEED)
+
+# Timing
+print(f"{'Map':<10}{'Points':>8}{'DBSCAN [ms]':>14}{'Grid [ms]':>12}{'Speed-up':>10}"
+      f"{'Aim (dbscan) [ms]':>20}{'Aim (grid) [ms]':>18}")
+for size in MAP_SIZES:
+    m = random_leakage_map(rng, size)
+    pts = find_top_n_percent_loc_2d(m, 0.9)
+    t_dbscan = best_time(lambda: DBSCAN(eps=1.5, min_samples=5).fit_predict(pts))
+    t_grid = best_time(lambda: grid_dbscan(pts, 1.5, 5))
+    t_aim_dbscan = best_time(lambda: aim_points_extraction(m, pts, clustering_backend='dbscan'))
+    t_aim_grid = best_time(lambda: aim_points_extraction(m, pts, clustering_backend='grid'))
+    print(f"{f'{size}x{size}':<10}{len(pts):>8}{t_dbscan * 1e3:>14.2f}{t_grid * 1e3:>12.2f}"
+          f"{t_dbscan / t_grid:>9.1f}x{t_aim_dbscan * 1e3:>20.2f}{t_aim_grid * 1e3:>18.2f}")
@@ -0,0 +1,78 @@
+#!/usr/local/bin/python
+
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+from probeshooter import *
+
+
+# ===== Parameters ====================================================================================================
+# Dataset to benchmark. If None, a synthetic PSD chunk (SYNTH_SHAPE) is generated in a temporary directory.
+# Note that the frequency-major copy ('psd_chunk_fyx.npy') is written next to 'psd_chunk.npy'.
+dataset_path = None
+SYNTH_SHAPE = (101, 101, 8001)
+
+# Number of single-frequency maps extracted per layout
+N_MAPS = 32
+RANDOM_SEED = 0
+# =====================================================================================================================
+
+
+def drop_page_cache(file_path):
+    # Evicts the (clean) pages of the file from the page cache; no root permission is required.
+    fd = os.open(file_path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def measure_map_extraction(path, layout, target_idx_list, cold):
+    _, chunk_file = find_psd_chunk_file(path, layout)
+    elapsed = []
+    for f_idx in target_idx_list:
+        if cold:
+            drop_page_cache(chunk_file)
+        chunk = load_psd_chunk(path, verbose=False, lazy=True, layout=layout)
+        start_t = time.perf_counter()
+        m = np.array(chunk.data[:, :, f_idx])
+        elapsed.append(time.perf_counter() - start_t)
+        del chunk, m
+        pass
+    return np.array(elapsed)
+
+
+if dataset_path is None:
+    temp_dir = tempfile.TemporaryDirectory()
+    dataset_path = temp_dir.name + os.sep + 'synthetic'
+    os.makedirs(dataset_path)
+    rng = np.random.default_rng(RANDOM_SEED)
+    synth = np.lib.format.open_memmap(dataset_path + os.sep + 'psd_chunk.npy', mode='w+',
+                                      dtype=np.float32, shape=SYNTH_SHAPE)
+    for y in range(SYNTH_SHAPE[0]):
+        synth[y] = rng.random(SYNTH_SHAPE[1:], dtype=np.float32)
+    synth.flush()
+    del synth
+    np.save(dataset_path + os.sep + 'freq.npy', np.linspace(500e6, 1600e6, SYNTH_SHAPE[2]))
+    with open(dataset_path + os.sep + 'meta.txt', 'w') as fp:
+        fp.write(str({}))
+
+print(f"Converting '{dataset_path}' to the frequency-major layout...")
+start_t = time.perf_counter()
+convert_psd_chunk_layout(dataset_path, layout='fyx')
+print(f"Conversion completed. ({time.perf_counter() - start_t:.2f}s)\n")
+
+bins = load_psd_chunk(dataset_path, verbose=False, lazy=True, layout='yxf').bins
+target_idx_list = np.random.default_rng(RANDOM_SEED).choice(bins, size=min(N_MAPS, bins), replace=False)
+
+print(f"{'Layout':<8}{'Cache':<8}{'Mean [ms]':>12}{'Median [ms]':>14}{'Max [ms]':>12}")
+for layout in ['yxf', 'fyx']:
+    for cold in [True, False]:
+        if not cold:
+            measure_map_extraction(dataset_path, layout, target_idx_list, cold=False)  # warm-up
+        r = measure_map_extraction(dataset_path, layout, target_idx_list, cold=cold) * 1e3
+        print(f"{layout:<8}{'cold' if cold else 'warm':<8}{r.mean():>12.3f}{np.median(r):>14.3f}{r.max():>12.3f}")
+    pass
+sys.stdout.flush()
@@ -0,0 +1,58 @@
+#!/usr/local/bin/python
+
+import numpy as np
+from probeshooter import *
+from dummy_hardware_api import *
+
+
+# ===== Parameters ====================================================================================================
+# Position (x, y)
+POS_LEFT_TOP = (1400000, 500000)
+POS_RIGHT_BOTTOM = (1600000, 900000)
+GRID_X_DIV = 61
+GRID_Y_DIV = 61
+
+# Per-axis speed (position units per second) and settling time of the stage
+XYZ_AXIS_SPEED = (200000, 100000, 100000)
+XYZ_SETTLE_S = 0.05
+
+# Sparse target sets
+N_SPARSE_POINTS = 500
+N_REVISIT_POINTS = 40
+RANDOM_SEED = 0
+
+METHODS = ['serpentine', 'nn', 'nn+2opt', 'serpentine+2opt']
+# =====================================================================================================================
+
+
+def simulate_move_time(points_xy, order, start_xy):
+    # Replays the path on the simulated stage; must match the planner's prediction.
+    xyz = SimulatedXYZ(velocity_xyz=XYZ_AXIS_SPEED, settle_s=XYZ_SETTLE_S, time_scale=0)
+    xyz.move_to_xyz(start_xy[0], start_xy[1], 0)
+    t0 = xyz.motion_time_s
+    for x, y in points_xy[order]:
+        xyz.move_to_xyz(x, y, 0)
+    return xyz.motion_time_s - t0
+
+
+rng = np.random.default_rng(RANDOM_SEED)
+x_space = np.linspace(POS_LEFT_TOP[0], POS_RIGHT_BOTTOM[0], GRID_X_DIV)
+y_space = np.linspace(POS_LEFT_TOP[1], POS_RIGHT_BOTTOM[1], GRID_Y_DIV)
+grid = np.stack(np.meshgrid(x_space, y_space), axis=-1).reshape(-1, 2)
+target_sets = {
+    'full grid': grid,
+    'sparse (random)': grid[rng.choice(len(grid), N_SPARSE_POINTS, replace=False)],
+    'revisits (aim pts)': np.stack([rng.uniform(POS_LEFT_TOP[0], POS_RIGHT_BOTTOM[0], N_REVISIT_POINTS),
+                                    rng.uniform(POS_LEFT_TOP[1], POS_RIGHT_BOTTOM[1], N_REVISIT_POINTS)], axis=1)
+}
+motion_model = MotionTimeModel(XYZ_AXIS_SPEED, XYZ_SETTLE_S)
+
+for name, points_xy in target_sets.items():
+    print(f"[ {name} ] - {len(points_xy)} points")
+    r = compare_scan_paths(points_xy, motion_model, start_xy=POS_LEFT_TOP, methods=METHODS)
+    for method in METHODS:
+        simulated_s = simulate_move_time(points_xy, r[method]['order'], POS_LEFT_TOP)
+        assert np.isclose(simulated_s, r[method]['move_time_s']), (method, simulated_s, r[method]['move_time_s'])
+    best = min(METHODS, key=lambda m: r[m]['move_time_s'])
+    print(f"* Best: {best} ({r['serpentine']['move_time_s'] / r[best]['move_time_s']:.2f}x vs. serpentine)\n")
+    pass
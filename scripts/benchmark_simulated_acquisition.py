@@ -0,0 +1,106 @@
+#!/usr/local/bin/python
+
+import os
+import time
+import tempfile
+import numpy as np
+from probeshooter import *
+from dummy_hardware_api import *
+
+
+# ===== Parameters ====================================================================================================
+# Spectrum analyzer
+SA_FREQ_START = 500e6
+SA_FREQ_STOP = 1600e6
+SA_FREQ_RBW = 500e3
+SA_FREQ_BINS = 4001
+
+# Position (x, y)
+POS_LEFT_TOP = (1400000, 500000)
+POS_RIGHT_BOTTOM = (1600000, 700000)
+GRID_X_DIV = 41
+GRID_Y_DIV = 41
+
+# Simulated die: hotspots (x, y) with clock 1.2GHz and c_gadget 7
+HOTSPOTS = [LeakageHotspot(1450000, 560000, 1.2e9, 7, radius=12000),
+            LeakageHotspot(1550000, 640000, 1.2e9, 7, radius=12000, imd_power_w=6e-12)]
+F_CLOCK = 1.2e9
+C_GADGET = 7
+
+# Simulated instruments (time_scale < 1 shortens the real waiting; reported times are simulated)
+XYZ_VELOCITY_XYZ = (100000, 100000, 100000)
+XYZ_SETTLE_S = 0.02
+SA_TRANSFER_BANDWIDTH_BPS = 1e6
+TIME_SCALE = 0.02
+RANDOM_SEED = 0
+# =====================================================================================================================
+
+
+def build_scan_points():
+    x_space = np.linspace(POS_LEFT_TOP[0], POS_RIGHT_BOTTOM[0], GRID_X_DIV, dtype=np.int32)
+    y_space = np.linspace(POS_LEFT_TOP[1], POS_RIGHT_BOTTOM[1], GRID_Y_DIV, dtype=np.int32)
+    points = []
+    for id_y, y in enumerate(y_space):
+        x_order = range(GRID_X_DIV) if id_y % 2 == 0 else range(GRID_X_DIV - 1, -1, -1)
+        points += [((id_y, id_x), (x_space[id_x], y)) for id_x in x_order]
+    return points
+
+
+def build_instruments():
+    die = SimulatedDie(HOTSPOTS, seed=RANDOM_SEED)
+    xyz = SimulatedXYZ(XYZ_VELOCITY_XYZ, XYZ_SETTLE_S, time_scale=TIME_SCALE)
+    sa = SimulatedSpectrumAnalyzer(die, xyz, transfer_bandwidth_bps=SA_TRANSFER_BANDWIDTH_BPS, time_scale=TIME_SCALE)
+    sa.set_params(SA_FREQ_START, SA_FREQ_STOP, SA_FREQ_RBW, SA_FREQ_BINS)
+    xyz.move_to_xyz(POS_LEFT_TOP[0], POS_LEFT_TOP[1], 0)
+    return xyz, sa
+
+
+def run_sequential(path, points):
+    xyz, sa = build_instruments()
+    writer = PSDChunkWriter(path, GRID_Y_DIV, GRID_X_DIV, SA_FREQ_BINS, resume=False)
+    start_t = time.perf_counter()
+    for (id_y, id_x), (x, y) in points:
+        xyz.move_to_xyz(int(x), int(y), None, block=True)
+        sa.trigger_single_sweep()
+        freq, psd = sa.get_psd()
+        writer.write_sweep(id_y, id_x, psd, freq)
+    wall_s = time.perf_counter() - start_t
+    writer.finalize(metadata=sa.get_status_dict())
+    return wall_s
+
+
+def run_pipelined(path, points):
+    xyz, sa = build_instruments()
+    writer = PSDChunkWriter(path, GRID_Y_DIV, GRID_X_DIV, SA_FREQ_BINS, resume=False)
+    acquisition = PipelinedAcquisition(xyz, sa, writer)
+    acquisition.run(points)
+    writer.finalize(metadata=sa.get_status_dict())
+    return acquisition.timing.wall_s
+
+
+def aiming_error(path):
+    psd_chunk = load_psd_chunk(path, verbose=False)
+    m_imd = psd_chunk.parse_from_nearest_freq_list([F_CLOCK - F_CLOCK / C_GADGET,
+                                                    F_CLOCK + F_CLOCK / C_GADGET]).data.mean(axis=2)
+    m = simple_2d_filter(simple_2d_filter(m_imd, 'median', (3, 3)), 'mean', (3, 3))
+    r = aim_points_extraction(m, find_top_n_percent_loc_2d(m, 0.9), top_n=0.05)
+    unit_xy = ((POS_RIGHT_BOTTOM[0] - POS_LEFT_TOP[0]) / (GRID_X_DIV - 1),
+               (POS_RIGHT_BOTTOM[1] - POS_LEFT_TOP[1]) / (GRID_Y_DIV - 1))
+    aim_xy = np.array([(POS_LEFT_TOP[0] + x * unit_xy[0], POS_LEFT_TOP[1] + y * unit_xy[1])
+                       for x, y in r['final_pt_xy']])
+    errors = []
+    for h in HOTSPOTS:
+        errors.append(np.min(np.hypot(aim_xy[:, 0] - h.position_x, aim_xy[:, 1] - h.position_y)))
+    return np.array(errors), len(aim_xy)
+
+
+temp_dir = tempfile.TemporaryDirectory()
+scan_points = build_scan_points()
+print(f"Grid: {GRID_X_DIV}x{GRID_Y_DIV}, bins: {SA_FREQ_BINS}, time scale: {TIME_SCALE}\n")
+for name, runner in [('sequential', run_sequential), ('pipelined', run_pipelined)]:
+    dataset_path = temp_dir.name + os.sep + name
+    wall_s = runner(dataset_path, scan_points)
+    err, n_aim = aiming_error(dataset_path)
+    print(f"[{name:<10}] wall: {wall_s:.2f}s (simulated: {wall_s / TIME_SCALE:.1f}s), "
+          f"{len(scan_points) / wall_s * TIME_SCALE:.2f} pts/s (simulated), "
+          f"aim points: {n_aim}, aim error per hotspot: {', '.join(f'{e:.0f}' for e in err)} [stage units]")
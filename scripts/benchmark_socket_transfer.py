@@ -0,0 +1,48 @@
+#!/usr/local/bin/python
+
+import time
+import numpy as np
+from dummy_hardware_api import *
+
+
+# ===== Parameters ====================================================================================================
+# Spectrum analyzer
+SA_FREQ_START = 500e6
+SA_FREQ_STOP = 1600e6
+SA_FREQ_RBW = 50e3
+SA_FREQ_BINS = 40001
+
+N_SWEEPS = 20
+# =====================================================================================================================
+
+
+def measure(sa, queued):
+    sa.trigger_single_sweep()
+    sa.get_psd()  # warm-up
+    start_t = time.perf_counter()
+    if queued:
+        _, psd = sa.get_psd_averaged(N_SWEEPS)
+    else:
+        for _ in range(N_SWEEPS):
+            sa.trigger_single_sweep()
+            _, psd = sa.get_psd()
+    elapsed_s = (time.perf_counter() - start_t) / N_SWEEPS
+    assert len(psd) == SA_FREQ_BINS
+    return elapsed_s
+
+
+# Loopback mock server; the backend sweeps instantly, so only the transport is measured.
+with MockSpectrumAnalyzerServer() as server:
+    host, port = server.address
+    print(f"Mock analyzer at {host}:{port}, {SA_FREQ_BINS:,} points per trace\n")
+    print(f"{'Format':<10}{'Requests':<12}{'Per sweep [ms]':>16}{'Throughput [MB/s]':>20}")
+    for binary in [False, True]:
+        sa = SocketSpectrumAnalyzer(binary=binary)
+        sa.connect(host, port)
+        sa.set_params(SA_FREQ_START, SA_FREQ_STOP, SA_FREQ_RBW, SA_FREQ_BINS)
+        for queued in [False, True]:
+            elapsed_s = measure(sa, queued)
+            print(f"{'REAL,32' if binary else 'ASCII':<10}{'queued' if queued else 'one by one':<12}"
+                  f"{elapsed_s * 1e3:>16.2f}{SA_FREQ_BINS * 4 / elapsed_s / 1e6:>20.1f}")
+        sa.disconnect()
+        pass
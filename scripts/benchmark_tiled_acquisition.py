@@ -0,0 +1,87 @@
+#!/usr/local/bin/python
+
+import os
+import time
+import tempfile
+import numpy as np
+from probeshooter import *
+from dummy_hardware_api import *
+
+
+# ===== Parameters ====================================================================================================
+# Spectrum analyzer
+SA_FREQ_START = 1000e6
+SA_FREQ_STOP = 1400e6
+SA_FREQ_RBW = 500e3
+SA_FREQ_BINS = 2001
+
+# Position (x, y)
+POS_LEFT_TOP = (1400000, 500000)
+POS_RIGHT_BOTTOM = (1600000, 700000)
+GRID_X_DIV = 41
+GRID_Y_DIV = 41
+
+# Tiles (one simulated rig per tile)
+N_TILES_Y = 2
+N_TILES_X = 2
+TILE_OVERLAP = 1
+
+# Simulated die / instruments
+HOTSPOTS = [LeakageHotspot(1450000, 560000, 1.2e9, 7, radius=12000),
+            LeakageHotspot(1550000, 640000, 1.2e9, 7, radius=12000, imd_power_w=6e-12)]
+F_CLOCK = 1.2e9
+C_GADGET = 7
+XYZ_VELOCITY_XYZ = (100000, 100000, 100000)
+XYZ_SETTLE_S = 0.02
+TIME_SCALE = 0.02
+RANDOM_SEED = 0
+# =====================================================================================================================
+
+
+def build_instruments(tile_id):
+    # Called in each worker process; every rig sees the same die with its own noise.
+    die = SimulatedDie(HOTSPOTS, seed=RANDOM_SEED + tile_id)
+    xyz = SimulatedXYZ(XYZ_VELOCITY_XYZ, XYZ_SETTLE_S, time_scale=TIME_SCALE)
+    sa = SimulatedSpectrumAnalyzer(die, xyz, time_scale=TIME_SCALE)
+    sa.set_params(SA_FREQ_START, SA_FREQ_STOP, SA_FREQ_RBW, SA_FREQ_BINS)
+    return xyz, sa
+
+
+def aim_xy(psd_chunk):
+    m = psd_chunk.parse_from_nearest_freq_list([F_CLOCK - F_CLOCK / C_GADGET,
+                                                F_CLOCK + F_CLOCK / C_GADGET]).data.mean(axis=2)
+    m = simple_2d_filter(simple_2d_filter(m, 'median', (3, 3)), 'mean', (3, 3))
+    r = aim_points_extraction(m, find_top_n_percent_loc_2d(m, 0.9), top_n=0.05)
+    return np.round(np.array(r['final_pt_xy']), 2).tolist()
+
+
+if __name__ == '__main__':
+    temp_dir = tempfile.TemporaryDirectory()
+    x_space = np.linspace(POS_LEFT_TOP[0], POS_RIGHT_BOTTOM[0], GRID_X_DIV, dtype=np.int32)
+    y_space = np.linspace(POS_LEFT_TOP[1], POS_RIGHT_BOTTOM[1], GRID_Y_DIV, dtype=np.int32)
+    print(f"Grid: {GRID_X_DIV}x{GRID_Y_DIV}, bins: {SA_FREQ_BINS}, time scale: {TIME_SCALE}\n")
+
+    results = {}
+    for name, (n_tiles_y, n_tiles_x, overlap) in [('1 rig', (1, 1, 0)),
+                                                  (f'{N_TILES_Y * N_TILES_X} rigs',
+                                                   (N_TILES_Y, N_TILES_X, TILE_OVERLAP))]:
+        path = temp_dir.name + os.sep + name.replace(' ', '_')
+        tiles = split_grid_into_tiles(GRID_Y_DIV, GRID_X_DIV, n_tiles_y, n_tiles_x, overlap)
+        acquisition = TiledAcquisition(path, x_space, y_space, SA_FREQ_BINS, tiles, build_instruments)
+        start_t = time.perf_counter()
+        acquisition.run()
+        wall_s = time.perf_counter() - start_t
+        start_t = time.perf_counter()
+        psd_chunk = acquisition.merge(overlap_mode='mean')
+        merge_s = time.perf_counter() - start_t
+        provenance = np.load(path + os.sep + PROVENANCE_FILE_NAME)
+        assert psd_chunk.shape == (GRID_Y_DIV, GRID_X_DIV, SA_FREQ_BINS) and np.all(provenance != -2)
+        results[name] = wall_s
+        print(f"[ {name} ] - {len(tiles)} tile(s)")
+        print(f"* Scan wall time : {wall_s:.2f}s (simulated bench time ~ {wall_s / TIME_SCALE / 60:.1f}m)")
+        print(f"* Merge time     : {merge_s:.2f}s")
+        print(f"* Overlap points : {int(np.sum(provenance == -1))}")
+        print(f"* Aim points     : {aim_xy(psd_chunk)}\n")
+        pass
+    names = list(results)
+    print(f"Speed-up: {results[names[0]] / results[names[1]]:.2f}x")
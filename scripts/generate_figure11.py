@@ -31,16 +31,11 @@ target_maps_median = [simple_2d_filter(m, 'median', (3, 3)) for m in target_maps
 # Uniform filter
 target_maps_median_uniform = [simple_2d_filter(m, 'mean', (5, 5)) for m in target_maps_median]
 
-# Aiming
-result_dicts = []
-for core_id, m in enumerate(target_maps_median_uniform):
-    if core_id == 2:
-        humps_mask_xy_list = find_top_n_percent_loc_2d(m, 0.95)
-        r = aim_points_extraction(combined_leakage_map_2d=m, hump_mask_xy_list=humps_mask_xy_list, top_n=0.03)
-    else:
-        humps_mask_xy_list = find_top_n_percent_loc_2d(m, 0.92)
-        r = aim_points_extraction(combined_leakage_map_2d=m, hump_mask_xy_list=humps_mask_xy_list, top_n=0.03)
-    result_dicts.append(r)
+# Aiming (all cores in one call; percentile 0.95 for core 2, 0.92 for the others)
+percentiles = [0.95 if core_id == 2 else 0.92 for core_id in range(len(target_maps_median_uniform))]
+_, result_dicts = aim_points_extraction_batch(target_maps_median_uniform, percentiles=percentiles, top_n=0.03,
+                                              return_full=True)
+for core_id, (m, r) in enumerate(zip(target_maps_median_uniform, result_dicts)):
     print(f"CORE{core_id}")
     for loc in r['final_pt_xy']:
         real_x_mm, real_y_mm = convert_to_mm_location_from_origin(m, loc, (7.48, 6.64))
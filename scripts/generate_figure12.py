@@ -1,6 +1,5 @@
 #!/usr/local/bin/python
 
-import sys
 import numpy as np
 from probeshooter import *
 from matplotlib.font_manager import FontProperties
@@ -13,27 +12,14 @@ psd_chunk = load_psd_chunk(base_path, rotate_90d=0)
 real_freq = np.load(base_path + "/real_freq.npy")
 tot_psd_cnt = real_freq.shape[0] * real_freq.shape[1]
 gadget_clock = 17
+side_band_hz = 1e6
 
 
-def estimate_core_clock(psd, freq, opp_freq_list, side_band_hz):
-    power_density_list = []
-    for g_clock in opp_freq_list:
-        fc_selector = ((g_clock - side_band_hz) <= freq) & (freq <= (g_clock + side_band_hz))
-        power_density_list.append(np.mean(psd[fc_selector]))
-        pass
-    power_density_list = np.array(power_density_list)
-    return opp_freq_list[np.argmax(power_density_list)]
-
-
-# Known clock
-Mclock = np.empty(shape=(101, 101), dtype=np.float32)
-M1 = np.empty(shape=(101, 101), dtype=np.float32)
-M2 = np.empty(shape=(101, 101), dtype=np.float32)
-
 # Generate pseudo-clock map
 clock_by_acc = []
 unique_clock = np.unique(real_freq)
-for pseudo_acc in [0.25, 0.5, 0.75, 1]:
+acc_list = [0.25, 0.5, 0.75, 1]
+for pseudo_acc in acc_list:
     manip_freq = np.copy(real_freq)
     pos_candidate = np.random.choice(np.arange(101 * 101), size=round((1 - pseudo_acc) * tot_psd_cnt), replace=False)
     for rand_idx in pos_candidate:
@@ -48,47 +34,28 @@ for pseudo_acc in [0.25, 0.5, 0.75, 1]:
     clock_by_acc.append(manip_freq)
     pass
 
+# Clock map estimated from the chunk itself (mean PSD around each OPP frequency, all pixels at once)
+estimated_clock = estimate_core_clock_map(psd_chunk, unique_clock * 1e6, side_band_hz) / 1e6
+estimated_acc = np.mean(np.isclose(estimated_clock, real_freq))
+print(f"Estimated clock map accuracy: {estimated_acc * 100:.2f}%\n")
+clock_by_acc.append(estimated_clock)
+titles = [f'Acc. {int(acc * 100)}%' for acc in acc_list] + [f'Est. ({estimated_acc * 100:.0f}%)']
+n_cols = len(clock_by_acc)
+
 
 leakage_maps = []
 acc_maps = []
 for clock_selector in clock_by_acc:
-    acc_map = np.empty(shape=(101, 101), dtype=np.bool_)
-    for pos1 in range(101):
-        for pos2 in range(101):
-            _psd = psd_chunk.data[pos1, pos2, :]
-            _f_clock = real_freq[pos1, pos2]
-
-            estimated_clock = clock_selector[pos1, pos2]
-
-            if estimated_clock == _f_clock:
-                acc_map[pos1, pos2] = True
-            else:
-                acc_map[pos1, pos2] = False
-
-            #########################
-            # target_clock = _f_clock
-            target_clock = estimated_clock * 1e6
-            #########################
-
-            target_freq_hz_list = [target_clock,
-                                   target_clock - (target_clock / gadget_clock),
-                                   target_clock + (target_clock / gadget_clock)]
-            nearset_indices = []
-            diff_hz = []
-            for t_hz in target_freq_hz_list:
-                idx = np.argmin(np.abs(psd_chunk.freq - t_hz))
-                nearset_indices.append(idx)
-                diff_hz.append(np.abs(t_hz - psd_chunk.freq[idx]))
-                pass
-            nearset_indices = np.array(nearset_indices, dtype=np.int32)
-            diff_hz = np.array(diff_hz, dtype=np.float64)
-            if np.sum(nearset_indices == 0) > 0 or np.sum(nearset_indices == len(psd_chunk.freq) - 1) > 0:
-                print("[Warning] The frequency of the edge has been selected.", file=sys.stderr)
-
-            Mclock[pos1, pos2] = _psd[nearset_indices[0]]
-            M1[pos1, pos2] = _psd[nearset_indices[1]]
-            M2[pos1, pos2] = _psd[nearset_indices[2]]
-            pass
+    acc_map = clock_selector == real_freq
+
+    #########################
+    # target_clock = real_freq
+    target_clock = clock_selector * 1e6
+    #########################
+
+    Mclock, M1, M2 = psd_chunk.gather_from_nearest_freq_maps([target_clock,
+                                                              target_clock - (target_clock / gadget_clock),
+                                                              target_clock + (target_clock / gadget_clock)])
     leakage_maps.append((M1 + M2) / 2)
     acc_maps.append(acc_map)
 
@@ -136,29 +103,29 @@ unit_map = {'w': 'W', 'uw': r'$\mu$W', 'nw': 'nW', 'pw': 'pW', 'dbm': 'dBm', Non
 unit_mul = {'w': 1, 'uw': 1e6, 'nw': 1e9, 'pw': 1e12, 'dbm': 1, None: 1}
 
 
-fig = plt.figure(figsize=(9.5, 5))
-gs = GridSpec(2, 4, wspace=0.09, hspace=-0.10,
+fig = plt.figure(figsize=(9.5 * n_cols / 4, 5))
+gs = GridSpec(2, n_cols, wspace=0.09, hspace=-0.10,
               left=0.08, right=1.10, bottom=0.09, top=0.97)
 
 axes_top = []
 axes_bot = []
 
-# 0 ~ 4
+# Top row: leakage maps
 _temp_im = None
-for i, acc in zip(range(4), [0.25, 0.5, 0.75, 1.0]):
+for i, title in enumerate(titles):
     ax = fig.add_subplot(gs[i])
     im = ax.imshow(f_target_maps[i] * unit_mul[unit], interpolation='none', cmap=cmap_str)
     if i == 0:
         _temp_im = im
-    ax.set_title(f'Acc. {int(acc * 100)}%', fontsize=label_size)
+    ax.set_title(title, fontsize=label_size)
     axes_top.append(ax)
 
-# 5 ~ 8
-for i in range(4, 8):
+# Bottom row: aiming results
+for i in range(n_cols, 2 * n_cols):
     ax_xy = fig.add_subplot(gs[i])
     cmap = plt.get_cmap('Set1').colors
 
-    result_dict = result_dicts[i - 4]
+    result_dict = result_dicts[i - n_cols]
     reference_2d_arr = f_target_maps[0]
     if not only_pt:
         bm = np.full_like(reference_2d_arr, dtype=np.float32, fill_value=0)
@@ -210,9 +177,9 @@ for i in range(4, 8):
 
 # Label remove
 for i, ax in enumerate(axes_top + axes_bot):
-    if i % 4 != 0:
+    if i % n_cols != 0:
         ax.set_yticks([])
-    if i < 4:
+    if i < n_cols:
         ax.set_xticks([])
     else:
         ax.xaxis.set_major_locator(ticker.MaxNLocator(nbins=5))
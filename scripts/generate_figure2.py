@@ -6,7 +6,7 @@ from probeshooter import *
 output_path = r"/root/ProbeShooter/scripts/output"
 database_root = r"/root/ProbeShooter/PSD-chunks"
 base_path = database_root + r"/PSA-IMXRT1061-24mhz"
-psd_chunk = load_psd_chunk(base_path, rotate_90d=0)
+psd_chunk = load_psd_chunk(base_path, rotate_90d=0, lazy=True)
 
 
 f_target = 23.5035e6
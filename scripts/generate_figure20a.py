@@ -12,8 +12,8 @@ target_maps = []
 for core_id, psd_chunk_dir in enumerate(target_dir):
     center = 1210.0115e6
     sub_span = 5e3
-    psd_chunk = load_psd_chunk(psd_chunk_dir, rotate_90d=0)
-    p_slice_target = psd_chunk.parse_from_freq_range_closed(center - sub_span, center + sub_span)
+    psd_chunk = load_psd_chunk(psd_chunk_dir, rotate_90d=0, lazy=True)
+    p_slice_target = psd_chunk.parse_from_freq_range_closed(center - sub_span, center + sub_span, view=True)
     m_target = p_slice_target.data.sum(axis=2)
     target_maps.append(m_target)
 
@@ -23,16 +23,11 @@ target_maps_median = [simple_2d_filter(m, 'median', (3, 3)) for m in target_maps
 # Uniform filter
 target_maps_median_uniform = [simple_2d_filter(m, 'mean', (5, 5)) for m in target_maps_median]
 
-# Aiming
-result_dicts = []
-for core_id, m in enumerate(target_maps_median_uniform):
-    if core_id == 3:
-        humps_mask_xy_list = find_top_n_percent_loc_2d(m, 0.81)
-        r = aim_points_extraction(combined_leakage_map_2d=m, hump_mask_xy_list=humps_mask_xy_list, top_n=0.03)
-    else:
-        humps_mask_xy_list = find_top_n_percent_loc_2d(m, 0.75)
-        r = aim_points_extraction(combined_leakage_map_2d=m, hump_mask_xy_list=humps_mask_xy_list, top_n=0.03)
-    result_dicts.append(r)
+# Aiming (all cores in one call; percentile 0.81 for core 3, 0.75 for the others)
+percentiles = [0.81 if core_id == 3 else 0.75 for core_id in range(len(target_maps_median_uniform))]
+_, result_dicts = aim_points_extraction_batch(target_maps_median_uniform, percentiles=percentiles, top_n=0.03,
+                                              return_full=True)
+for core_id, (m, r) in enumerate(zip(target_maps_median_uniform, result_dicts)):
     print(f"CORE{core_id}")
     for loc in r['final_pt_xy']:
         real_x_mm, real_y_mm = convert_to_mm_location_from_origin(m, loc, (7.48, 6.64))
@@ -1,10 +1,10 @@
 #!/usr/local/bin/python
 
 import sys
-import time
 import itertools
 import numpy as np
 from tqdm import tqdm
+from probeshooter import *
 from dummy_hardware_api import *
 
 
@@ -23,6 +23,18 @@ SA_FREQ_RBW = 50e3
 SA_FREQ_BINS = 40001
 SA_TRACE_AVG = 1
 
+# Narrowband mode: only the bins inside the target bands are stored (None: all SA_FREQ_BINS bins).
+# TARGET_BANDS = [[lower_hz, upper_hz], ...], or derived from the clock(s) and the gadget divisors (f, f ± f/c_gadget).
+TARGET_BANDS = None
+TARGET_CLOCK_HZ = None  # e.g., [1.2e9]
+TARGET_C_GADGET = [7]
+TARGET_BAND_WINDOW_HZ = 2e6
+
+# Live leakage map / aiming during the scan (None: disabled), e.g., [f, f - f/c_gadget, f + f/c_gadget]
+LIVE_AIM_TARGET_FREQ_HZ = None
+LIVE_AIM_EVERY = 500  # points
+LIVE_AIM_EARLY_STOP = False  # Stop once the aim points are stable (the rest of the grid stays resumable)
+
 # Position (x, y)
 POS_LEFT_TOP = (1400000, 500000)  # Origin
 POS_RIGHT_BOTTOM = (1600000, 900000)
@@ -39,6 +51,11 @@ XYZ_MAX_POS_Y = int(3e6)
 XYZ_MAX_POS_Z = int(3e7)
 XYZ_MAX_VELOCITY = 2047
 XYZ_VELOCITY = XYZ_MAX_VELOCITY
+
+# Scan path ('serpentine', 'nn', 'nn+2opt' or 'serpentine+2opt'), planned with the per-axis motion-time model
+SCAN_PATH_METHOD = 'serpentine'
+XYZ_AXIS_SPEED = (200000, 200000, 200000)  # Position units per second at XYZ_VELOCITY
+XYZ_SETTLE_S = 0.05
 # =====================================================================================================================
 
 
@@ -65,67 +82,124 @@ if __name__ == '__main__':
     assert (GRID_X_DIV % 2 == 1) and (GRID_Y_DIV % 2 == 1)
     x_space = np.linspace(POS_LEFT_TOP[0], POS_LEFT_TOP[0] + distance_to_dest[0], GRID_X_DIV, dtype=np.int32)
     y_space = np.linspace(POS_LEFT_TOP[1], POS_LEFT_TOP[1] + distance_to_dest[1], GRID_Y_DIV, dtype=np.int32)
-    xy_space = list((itertools.product(x_space, y_space)))
-    xy_space_with_id = [(idx, (idx // GRID_Y_DIV, idx % GRID_Y_DIV), t) for idx, t in enumerate(xy_space)]
-    for i in range(GRID_Y_DIV, GRID_Y_DIV ** 2, GRID_Y_DIV * 2):
-        temp = xy_space_with_id[i: i + GRID_Y_DIV]
-        xy_space_with_id = xy_space_with_id[:i] + temp[::-1] + xy_space_with_id[i + GRID_Y_DIV:]
+    xy_space = np.array(list(itertools.product(x_space, y_space)))
+    xy_id = [(idx // GRID_Y_DIV, idx % GRID_Y_DIV) for idx in range(len(xy_space))]
+
+    # Visiting order. 'serpentine' is the column-by-column order of the original script; it is computed on the grid
+    # indices, so it does not depend on the direction of the position axes (the original loop stopped alternating
+    # after GRID_Y_DIV columns when GRID_X_DIV > GRID_Y_DIV). The other methods minimize the modelled motion time
+    # (compared against the serpentine order).
+    if SCAN_PATH_METHOD == 'serpentine':
+        scan_order = serpentine_order(np.array(xy_id), row_axis=0)
+    else:
+        motion_model = MotionTimeModel(XYZ_AXIS_SPEED, XYZ_SETTLE_S)
+        scan_order = compare_scan_paths(xy_space, motion_model, start_xy=POS_LEFT_TOP,
+                                        methods=['serpentine', SCAN_PATH_METHOD], row_axis=0)[SCAN_PATH_METHOD]['order']
+    xy_space_with_id = [(int(idx), xy_id[idx], tuple(xy_space[idx])) for idx in scan_order]
+# =====================================================================================================================
+
+
+# ===== Target bands ==================================================================================================
+    # The analyzer's actual frequency axis (bin placement may differ from an ideal linspace).
+    sa.trigger_single_sweep()
+    sa_freq, _ = sa.get_psd()
+    bands = TARGET_BANDS
+    if bands is None and TARGET_CLOCK_HZ is not None:
+        bands = derive_target_bands(TARGET_CLOCK_HZ, TARGET_C_GADGET, TARGET_BAND_WINDOW_HZ)
+    keep_idx = None
+    if bands is not None:
+        bands = merge_bands(bands)
+        keep_idx = select_band_idx(sa_freq, bands)
+        print(f"Narrowband mode: {len(keep_idx):,}/{len(sa_freq):,} bins in {len(bands)} band(s) are stored.")
 # =====================================================================================================================
 
 
 # ===== PSD chunk acquisition =========================================================================================
+    # Sweeps are streamed to disk as they arrive; re-running the script resumes an interrupted scan.
+    writer = PSDChunkWriter(dataset_path, GRID_Y_DIV, GRID_X_DIV, len(sa_freq), dtype=np.float32, resume=True,
+                            keep_idx=keep_idx)
+    # Scan time of the previous sessions (a resumed scan); the metadata accumulates it.
+    prev_duration_s = 0.
+    if writer.resumed:
+        print(f"Resuming the scan. ({writer.n_completed}/{len(xy_space_with_id)} points completed)")
+        try:
+            prev_duration_s = float(read_psd_chunk_metadata(dataset_path).get('duration_s', 0.))
+        except FileNotFoundError:
+            pass
+    n_completed_before = writer.n_completed
+
     # Position initialization
     xyz.move_to_xyz(POS_LEFT_TOP[0], POS_LEFT_TOP[1], POS_DOWN_Z, velocity=XYZ_VELOCITY)
 
-    start_t = time.time()
-    data = np.zeros(shape=(GRID_Y_DIV, GRID_X_DIV, SA_FREQ_BINS), dtype=np.float32)
-    tqdm_progress = tqdm(range(len(xy_space_with_id)), leave=True, ncols=100, ascii=True, file=sys.stdout)
-    for pos_id, (id_x, id_y), (target_x, target_y) in xy_space_with_id:
-
-        # Move to the next position
-        xyz.move_to_xyz(int(target_x), int(target_y), None, velocity=XYZ_VELOCITY)
-
-        # Spectrum sweep
-        sa.trigger_single_sweep()
-
-        #  PSD / Frequency data receiving
-        freq, psd = sa.get_psd() if SA_TRACE_AVG == 1 else sa.get_psd_averaged(SA_TRACE_AVG)
-        data[id_y, id_x] = psd
-
-        # Store PSD and metadata
-        if pos_id == 0:
-            meta = sa.get_status_dict()
-            meta['grid_x_div'] = GRID_X_DIV
-            meta['grid_y_div'] = GRID_Y_DIV
-            meta['pos_left_top'] = POS_LEFT_TOP
-            meta['pos_right_bottom'] = POS_RIGHT_BOTTOM
-            meta['pos_down_z'] = POS_DOWN_Z
-            meta['rot_90d'] = PSD_CHUNK_ROTATE_90d
-            with open(dataset_path + f"\\meta.txt", "w") as fp:
-                fp.write(str(meta))
-            np.save(dataset_path + f"\\freq.npy", freq)
-
-        # tqdm progress update
+    # The move to the next point overlaps with the trace transfer and storing of the current one.
+    acquisition = PipelinedAcquisition(xyz, sa, writer, position_z=None, velocity=XYZ_VELOCITY,
+                                       trace_avg=SA_TRACE_AVG)
+    scan_points = [((id_y, id_x), (target_x, target_y))
+                   for pos_id, (id_x, id_y), (target_x, target_y) in xy_space_with_id]
+    tqdm_progress = tqdm(range(len(xy_space_with_id)), leave=True, ncols=100, ascii=True, file=sys.stdout,
+                         initial=writer.n_completed)
+    live_map = None
+    if LIVE_AIM_TARGET_FREQ_HZ is not None:
+        live_map = LiveLeakageMap((GRID_Y_DIV, GRID_X_DIV),
+                                  make_nearest_freq_leakage_fn(sa_freq, LIVE_AIM_TARGET_FREQ_HZ),
+                                  aim_every=LIVE_AIM_EVERY)
+
+    def build_metadata(status_dict):
+        r = dict(status_dict)
+        r['grid_x_div'] = GRID_X_DIV
+        r['grid_y_div'] = GRID_Y_DIV
+        r['pos_left_top'] = POS_LEFT_TOP
+        r['pos_right_bottom'] = POS_RIGHT_BOTTOM
+        r['pos_down_z'] = POS_DOWN_Z
+        r['rot_90d'] = PSD_CHUNK_ROTATE_90d
+        r['duration_s'] = prev_duration_s
+        if bands is not None:
+            r['bands'] = bands
+            r['full_bins'] = len(sa_freq)
+        return r
+
+    meta_written = []
+
+    def on_point(id_y, id_x, psd):
         tqdm_progress.update(1)
-        pass
-
+        # Metadata as soon as the first sweep is stored, so a partial (resumable) dataset is loadable.
+        if not meta_written and acquisition.status_dict is not None:
+            writer.write_metadata(build_metadata(acquisition.status_dict))
+            meta_written.append(True)
+        if live_map is None:
+            return
+        live_map(id_y, id_x, psd)
+        if live_map.n_updates % LIVE_AIM_EVERY == 0 and live_map.last_aim is not None:
+            tqdm_progress.set_postfix_str(f"aim: {np.round(live_map.last_aim['final_pt_xy'], 1).tolist()}")
+        if LIVE_AIM_EARLY_STOP and live_map.is_converged():
+            acquisition.stop()
+
+    acquisition.run(scan_points, progress=on_point)
     tqdm_progress.close()
-    end_t = time.time()
-    print(f'Scanning completed. ({(end_t - start_t) / 60}m)')
+    if live_map is not None:
+        live_map.close()
+    print(f'Scanning completed. ({acquisition.timing.wall_s / 60}m)')
+    acquisition.timing.report()
 # =====================================================================================================================
 
 
 # ===== Export PSD and metadata =======================================================================================
-    # Export PSD chunk
-    if PSD_CHUNK_ROTATE_90d % 4 != 0:
-        data = np.ascontiguousarray(np.rot90(data, k=PSD_CHUNK_ROTATE_90d, axes=(0, 1)))
-    np.save(dataset_path + f"\\psd_chunk.npy", data)
-    
-    # Export metadata (overwrite)
-    meta['duration_s'] = end_t - start_t
-    with open(dataset_path + f"\\meta.txt", "w") as fp:
-        fp.write(str(meta))
-    print('Export completed...!')
+    meta = build_metadata(acquisition.status_dict if acquisition.status_dict is not None else sa.get_status_dict())
+    n_completed = writer.n_completed
+    meta['duration_s'] = prev_duration_s + acquisition.timing.wall_s
+    meta['session_points'] = n_completed - n_completed_before
+    if n_completed == GRID_Y_DIV * GRID_X_DIV:
+        # Rotate the PSD chunk (if required) and export metadata (overwrite)
+        writer.finalize(rotate_90d=PSD_CHUNK_ROTATE_90d, metadata=meta)
+        print('Export completed...!')
+    else:
+        # Early stop: the chunk is neither rotated nor finalized, and 'progress.npy' is kept, so re-running the
+        # script resumes the remaining points.
+        meta['rot_90d'] = 0
+        meta['early_stopped'] = True
+        writer.write_metadata(meta)
+        writer.close()
+        print(f'Scan stopped early. ({n_completed}/{GRID_Y_DIV * GRID_X_DIV} points; re-run to resume)')
 # =====================================================================================================================
 
 
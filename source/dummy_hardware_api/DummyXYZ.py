@@ -22,6 +22,10 @@ class DummyXYZ:
                     ) -> None:
         pass
 
+    def wait_for_motion(self) -> None:
+        # Blocks until a non-blocking move (block=False) has finished.
+        pass
+
     def set_params(self, max_pos_x, max_pos_y, max_pos_z, max_velocity) -> None:
         pass
     pass
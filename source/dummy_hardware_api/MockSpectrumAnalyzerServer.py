@@ -0,0 +1,141 @@
+import socket
+import threading
+import socketserver
+import numpy as np
+from typing import Optional
+from .SimulatedDie import SimulatedDie
+from .SimulatedXYZ import SimulatedXYZ
+from .SimulatedSpectrumAnalyzer import SimulatedSpectrumAnalyzer
+from .SocketSpectrumAnalyzer import encode_binary_block
+
+
+__all__ = [
+    'MockSpectrumAnalyzerServer'
+]
+
+
+_STATUS_QUERIES = {
+    'FREQ:STAR?': 'freq_start',
+    'FREQ:STOP?': 'freq_stop',
+    'BAND:RES?': 'rbw',
+    'BAND:VID?': 'vbw',
+    'SWE:POIN?': 'bins',
+    'SWE:TIME?': 'sweep_time_s',
+    'DISP:TRAC:Y:RLEV?': 'ref_level',
+    'AVER:COUN?': 'avg_maxh_count',
+    'UNIT:POW?': 'psd_unit'
+}
+
+
+class MockSpectrumAnalyzerServer:
+    # Loopback SCPI server for 'SocketSpectrumAnalyzer'. Sweeps and traces come from 'backend' (any analyzer with
+    # the DummySpectrumAnalyzer interface; by default a noise-only SimulatedSpectrumAnalyzer without delays).
+    # port=0 picks a free port; see 'address'. 'max_bins' coerces larger 'SWE:POIN' values, like an instrument
+    # with a limited trace length.
+    def __init__(self,
+                 backend=None,
+                 host: str = '127.0.0.1',
+                 port: int = 0,
+                 max_bins: Optional[int] = None):
+        if backend is None:
+            backend = SimulatedSpectrumAnalyzer(SimulatedDie([]), SimulatedXYZ(time_scale=0), time_scale=0)
+        self.backend = backend
+        self.max_bins = max_bins
+        self.n_requests = 0
+        self.__backend_lock = threading.Lock()
+        server = self
+
+        class _Handler(socketserver.StreamRequestHandler):
+            def setup(self):
+                super().setup()
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                self.binary = False
+                self.params = {}
+                pass
+
+            def handle(self):
+                for line in self.rfile:
+                    for command in line.decode().strip().split(';'):
+                        if command:
+                            server._handle_command(self, command.strip())
+                    self.wfile.flush()
+                pass
+            pass
+
+        self.__server = socketserver.ThreadingTCPServer((host, port), _Handler, bind_and_activate=False)
+        self.__server.allow_reuse_address = True
+        self.__server.daemon_threads = True
+        self.__server.server_bind()
+        self.__server.server_activate()
+        self.__thread = None
+        pass
+
+    def start(self) -> 'MockSpectrumAnalyzerServer':
+        self.__thread = threading.Thread(target=self.__server.serve_forever, daemon=True)
+        self.__thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self.__thread is None:
+            return
+        self.__server.shutdown()
+        self.__server.server_close()
+        self.__thread.join()
+        self.__thread = None
+        pass
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+        pass
+
+    @property
+    def address(self) -> (str, int):
+        return self.__server.server_address[:2]
+
+    def _handle_command(self, handler, command: str) -> None:
+        self.n_requests += 1
+        header, _, argument = command.partition(' ')
+        header = header.upper()
+        if header == '*IDN?':
+            self.__reply(handler, 'ProbeShooter,MockSpectrumAnalyzer,0,1.0')
+        elif header == 'FORM':
+            handler.binary = argument.upper().startswith('REAL')
+        elif header == 'FORM:BORD':
+            pass  # Always little-endian ('SWAP')
+        elif header in ['FREQ:STAR', 'FREQ:STOP', 'BAND:RES', 'SWE:POIN']:
+            handler.params[header] = float(argument)
+            if header == 'SWE:POIN' and self.max_bins is not None:
+                handler.params[header] = min(handler.params[header], self.max_bins)
+            if len(handler.params) == 4:
+                with self.__backend_lock:
+                    self.backend.set_params(handler.params['FREQ:STAR'], handler.params['FREQ:STOP'],
+                                            handler.params['BAND:RES'], int(handler.params['SWE:POIN']))
+        elif header == 'INIT:IMM':
+            with self.__backend_lock:
+                self.backend.trigger_single_sweep()
+        elif header == '*OPC?':
+            self.__reply(handler, '1')
+        elif header == 'TRAC:DATA?':
+            with self.__backend_lock:
+                _, psd = self.backend.get_psd()
+            psd = np.asarray(psd, dtype='<f4')
+            if handler.binary:
+                handler.wfile.write(encode_binary_block(psd.tobytes()) + b'\n')
+            else:
+                self.__reply(handler, ','.join(f'{v:.7e}' for v in psd))
+        elif header in _STATUS_QUERIES:
+            with self.__backend_lock:
+                value = self.backend.get_status_dict().get(_STATUS_QUERIES[header], 0)
+            self.__reply(handler, str(value).upper() if isinstance(value, str) else repr(float(value)))
+        else:
+            print(f"[Warning] Mock analyzer: unknown command '{command}'.")
+        pass
+
+    @staticmethod
+    def __reply(handler, response: str) -> None:
+        handler.wfile.write(response.encode() + b'\n')
+        pass
+    pass
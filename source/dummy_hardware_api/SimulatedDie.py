@@ -0,0 +1,94 @@
+import numpy as np
+from typing import Optional, Union, Sequence
+
+
+__all__ = [
+    'LeakageHotspot',
+    'SimulatedDie'
+]
+
+
+class LeakageHotspot:
+    # A leaking core at (position_x, position_y) in stage units, running a gadget with 'c_gadget' cycles per
+    # iteration; it emits at the clock and at the IMD sidebands clock ± clock/c_gadget.
+    def __init__(self,
+                 position_x: Union[float, int],
+                 position_y: Union[float, int],
+                 clock_hz: Union[float, int],
+                 c_gadget: Optional[int] = 7,
+                 clock_power_w: float = 2e-11,
+                 imd_power_w: float = 1e-11,
+                 radius: Union[float, int] = 10000):
+        self.position_x = position_x
+        self.position_y = position_y
+        self.clock_hz = clock_hz
+        self.c_gadget = c_gadget
+        self.clock_power_w = clock_power_w
+        self.imd_power_w = imd_power_w
+        self.radius = radius
+        pass
+
+    @property
+    def emission_freq_power_list(self) -> list:
+        r = [(self.clock_hz, self.clock_power_w)]
+        if self.c_gadget is not None:
+            r.append((self.clock_hz - self.clock_hz / self.c_gadget, self.imd_power_w))
+            r.append((self.clock_hz + self.clock_hz / self.c_gadget, self.imd_power_w))
+        return r
+    pass
+
+
+class SimulatedDie:
+    # Synthetic leakage model: each hotspot contributes a Gaussian spatial falloff (sigma = radius) times
+    # RBW-wide spectral lines on top of a chi-square distributed noise floor.
+    def __init__(self,
+                 hotspots: Sequence[LeakageHotspot],
+                 noise_floor_w: float = 1e-13,
+                 seed: Optional[int] = None):
+        self.hotspots = list(hotspots)
+        self.noise_floor_w = noise_floor_w
+        self.rng = np.random.default_rng(seed)
+        pass
+
+    def spatial_weight(self,
+                       hotspot: LeakageHotspot,
+                       position_x: Union[float, int, np.ndarray],
+                       position_y: Union[float, int, np.ndarray]
+                       ) -> Union[float, np.ndarray]:
+        d2 = (np.asarray(position_x, dtype=np.float64) - hotspot.position_x) ** 2 + \
+             (np.asarray(position_y, dtype=np.float64) - hotspot.position_y) ** 2
+        return np.exp(-d2 / (2 * hotspot.radius ** 2))
+
+    def psd(self,
+            freq: np.ndarray,
+            position_x: Union[float, int],
+            position_y: Union[float, int],
+            rbw: Union[float, int],
+            noise: bool = True
+            ) -> np.ndarray:
+        r = np.full(len(freq), self.noise_floor_w, dtype=np.float64)
+        if noise:
+            r *= self.rng.chisquare(4, size=len(freq)) / 4
+        for hotspot in self.hotspots:
+            w = self.spatial_weight(hotspot, position_x, position_y)
+            if w < 1e-9:
+                continue
+            for f_hz, power_w in hotspot.emission_freq_power_list:
+                # Only the bins within a few RBWs of the line are touched.
+                lower, upper = np.searchsorted(freq, [f_hz - 4 * rbw, f_hz + 4 * rbw])
+                if upper > lower:
+                    r[lower:upper] += w * power_w * np.exp(-0.5 * ((freq[lower:upper] - f_hz) / (rbw / 2)) ** 2)
+            pass
+        return r.astype(np.float32)
+
+    def leakage_map(self,
+                    x_space: np.ndarray,
+                    y_space: np.ndarray
+                    ) -> np.ndarray:
+        # Noise-free IMD leakage (mean of both sidebands) over a grid, Y x X; useful as ground truth.
+        xx, yy = np.meshgrid(x_space, y_space)
+        r = np.zeros(xx.shape, dtype=np.float64)
+        for hotspot in self.hotspots:
+            r += self.spatial_weight(hotspot, xx, yy) * hotspot.imd_power_w
+        return r
+    pass
@@ -0,0 +1,118 @@
+import sys
+import time
+import numpy as np
+from typing import Optional
+from .SimulatedDie import SimulatedDie
+from .SimulatedXYZ import SimulatedXYZ
+
+
+__all__ = [
+    'SimulatedSpectrumAnalyzer'
+]
+
+
+class SimulatedSpectrumAnalyzer:
+    # Swept analyzer: sweep time = k * span / RBW^2 (at least 'min_sweep_s' + 'per_bin_s' per bin), transfer
+    # time = latency + bins * 'bytes_per_point' / bandwidth. The PSD is taken from 'die' at the probe position
+    # of 'xyz' when the sweep is triggered. 'time_scale' works as in 'SimulatedXYZ'.
+    def __init__(self,
+                 die: SimulatedDie,
+                 xyz: SimulatedXYZ,
+                 sweep_k: float = 2.5,
+                 min_sweep_s: float = 0.001,
+                 per_bin_s: float = 1e-6,
+                 transfer_bandwidth_bps: float = 10e6,
+                 transfer_latency_s: float = 0.002,
+                 bytes_per_point: int = 4,
+                 time_scale: float = 1.0):
+        self.die = die
+        self.xyz = xyz
+        self.sweep_k = sweep_k
+        self.min_sweep_s = min_sweep_s
+        self.per_bin_s = per_bin_s
+        self.transfer_bandwidth_bps = transfer_bandwidth_bps
+        self.transfer_latency_s = transfer_latency_s
+        self.bytes_per_point = bytes_per_point
+        self.time_scale = time_scale
+        self.sweep_time_total_s = 0.0
+        self.transfer_time_total_s = 0.0
+        self.n_sweeps = 0
+        self.__freq = None
+        self.__rbw = None
+        self.__trace = None
+        self.__status = {}
+        pass
+
+    def connect(self, ip_addr) -> None:
+        pass
+
+    def disconnect(self) -> None:
+        pass
+
+    def trigger_single_sweep(self) -> None:
+        assert self.__freq is not None, "Call 'set_params' first."
+        if self.xyz.is_moving:
+            print("[Warning] Sweep triggered while the stage is moving.", file=sys.stderr)
+        position_x, position_y, _ = self.xyz.position
+        self.__trace = self.die.psd(self.__freq, position_x, position_y, self.__rbw)
+        self.__wait(self.sweep_time_s)
+        self.sweep_time_total_s += self.sweep_time_s
+        self.n_sweeps += 1
+        pass
+
+    def get_psd(self) -> (np.ndarray, np.ndarray):
+        assert self.__trace is not None, "Call 'trigger_single_sweep' first."
+        self.__wait(self.transfer_time_s)
+        self.transfer_time_total_s += self.transfer_time_s
+        return np.copy(self.__freq), self.__trace
+
+    def get_psd_averaged(self, avg_number) -> (np.ndarray, np.ndarray):
+        acc = np.zeros(len(self.__freq), dtype=np.float64)
+        for _ in range(avg_number):
+            self.trigger_single_sweep()
+            acc += self.__trace
+        self.__trace = (acc / avg_number).astype(np.float32)
+        return self.get_psd()
+
+    def set_params(self, freq_start, freq_stop, freq_rbw, freq_bins) -> None:
+        self.__freq = np.linspace(freq_start, freq_stop, int(freq_bins))
+        self.__rbw = freq_rbw
+        self.__status = {
+            'freq_start': freq_start,
+            'freq_stop': freq_stop,
+            'freq_span': freq_stop - freq_start,
+            'freq_center': (freq_start + freq_stop) / 2,
+            'rbw': freq_rbw,
+            'vbw': freq_rbw,
+            'bins': int(freq_bins),
+            'psd_unit': 'w',
+            'ref_level': 0,
+            'avg': False,
+            'maxh': False,
+            'avg_maxh_count': 1,
+            'sweep_time_s': self.sweep_time_s,
+            'sweep_time_ms': self.sweep_time_s * 1e3
+        }
+        pass
+
+    def get_status_dict(self) -> dict:
+        return dict(self.__status)
+
+    @property
+    def sweep_time_s(self) -> Optional[float]:
+        if self.__freq is None:
+            return None
+        span = self.__freq[-1] - self.__freq[0]
+        return max(self.sweep_k * span / self.__rbw ** 2, self.min_sweep_s) + self.per_bin_s * len(self.__freq)
+
+    @property
+    def transfer_time_s(self) -> Optional[float]:
+        if self.__freq is None:
+            return None
+        return self.transfer_latency_s + len(self.__freq) * self.bytes_per_point / self.transfer_bandwidth_bps
+
+    def __wait(self, duration_s: float) -> None:
+        if self.time_scale > 0:
+            time.sleep(duration_s * self.time_scale)
+        pass
+    pass
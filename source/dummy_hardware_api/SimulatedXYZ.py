@@ -0,0 +1,91 @@
+import time
+import threading
+import numpy as np
+from typing import Optional, Union, Sequence
+
+
+__all__ = [
+    'SimulatedXYZ'
+]
+
+
+class SimulatedXYZ:
+    # XYZ stage with per-axis velocity [units/s] and settle time [s]. Axes move concurrently, so a move takes
+    # max(|dx|/vx, |dy|/vy, |dz|/vz) + settle_s. 'time_scale' shrinks the real waiting (0: no waiting); the
+    # simulated time is always accumulated in 'motion_time_s'.
+    def __init__(self,
+                 velocity_xyz: Sequence[Union[float, int]] = (200000, 200000, 200000),
+                 settle_s: float = 0.05,
+                 time_scale: float = 1.0):
+        self.velocity_xyz = tuple(velocity_xyz)
+        self.settle_s = settle_s
+        self.time_scale = time_scale
+        self.motion_time_s = 0.0
+        self.n_moves = 0
+        self.__max_velocity = None
+        self.__position = [0, 0, 0]
+        self.__target = [0, 0, 0]
+        self.__done_t = 0.0
+        self.__lock = threading.Lock()
+        pass
+
+    def connect(self, port) -> None:
+        pass
+
+    def disconnect(self) -> None:
+        pass
+
+    def move_to_xyz(self,
+                    position_x: Optional[int],
+                    position_y: Optional[int],
+                    position_z: Optional[int],
+                    velocity: int = -1,
+                    block: bool = True
+                    ) -> None:
+        self.wait_for_motion()
+        with self.__lock:
+            target = [self.__position[i] if p is None else p for i, p in enumerate((position_x, position_y,
+                                                                                     position_z))]
+            move_s = self.calc_move_time(self.__position, target, velocity)
+            self.motion_time_s += move_s
+            self.n_moves += 1
+            self.__target = target
+            self.__done_t = time.perf_counter() + move_s * self.time_scale
+        if block:
+            self.wait_for_motion()
+        pass
+
+    def wait_for_motion(self) -> None:
+        with self.__lock:
+            remaining_s = self.__done_t - time.perf_counter()
+            self.__position = list(self.__target)
+        if remaining_s > 0:
+            time.sleep(remaining_s)
+        pass
+
+    def calc_move_time(self,
+                       source_xyz: Sequence[Union[float, int]],
+                       target_xyz: Sequence[Union[float, int]],
+                       velocity: int = -1
+                       ) -> float:
+        scale = 1.0
+        if velocity > 0 and self.__max_velocity:
+            scale = velocity / self.__max_velocity
+        axis_s = [abs(t - s) / (v * scale) for s, t, v in zip(source_xyz, target_xyz, self.velocity_xyz)]
+        if max(axis_s) == 0:
+            return 0.0
+        return max(axis_s) + self.settle_s
+
+    def set_params(self, max_pos_x, max_pos_y, max_pos_z, max_velocity) -> None:
+        self.__max_velocity = max_velocity
+        pass
+
+    @property
+    def is_moving(self) -> bool:
+        return time.perf_counter() < self.__done_t
+
+    @property
+    def position(self) -> tuple:
+        # The commanded target while moving; the probe is there once 'wait_for_motion()' returns.
+        return tuple(self.__target)
+    pass
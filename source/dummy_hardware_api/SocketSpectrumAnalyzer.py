@@ -0,0 +1,198 @@
+import socket
+import threading
+import collections
+import numpy as np
+from typing import Optional, Sequence
+from concurrent.futures import Future
+
+
+__all__ = [
+    'read_binary_block',
+    'encode_binary_block',
+    'SocketSpectrumAnalyzer'
+]
+
+
+def encode_binary_block(payload: bytes) -> bytes:
+    # IEEE-488.2 definite-length arbitrary block: '#' <n digits> <length> <payload>.
+    length = str(len(payload)).encode()
+    return b'#' + str(len(length)).encode() + length + payload
+
+
+def read_binary_block(reader) -> bytes:
+    # 'reader' is a buffered binary file object (e.g., socket.makefile('rb')). The message terminator is consumed.
+    head = reader.read(2)
+    if len(head) < 2 or head[:1] != b'#':
+        raise ValueError(f"Not an IEEE-488.2 binary block: {head!r}")
+    n_digits = int(head[1:2])
+    if n_digits == 0:
+        raise ValueError("Indefinite-length blocks are not supported.")
+    length = int(reader.read(n_digits))
+    payload = reader.read(length)
+    if len(payload) != length:
+        raise ConnectionError("Connection closed during a binary block transfer.")
+    reader.readline()
+    return payload
+
+
+class SocketSpectrumAnalyzer:
+    # SCPI-over-TCP (raw socket, e.g., port 5025) analyzer with binary trace transfer (FORM REAL,32, little-endian).
+    # The connection is kept open; requests are sent as soon as they are submitted and their responses are
+    # matched in FIFO order by a reader thread, so several requests (e.g., sweeps of an average) can be in flight.
+    # Reads have no socket timeout (a '*OPC?' returns only when the sweep ends); 'query_timeout_s' bounds the wait
+    # for a single response instead, without breaking the connection. After a read error the connection is dead
+    # and every later request raises it.
+    def __init__(self, binary: bool = True, query_timeout_s: Optional[float] = None):
+        self.binary = binary
+        self.query_timeout_s = query_timeout_s
+        self.__sock = None
+        self.__reader = None
+        self.__reader_thread = None
+        self.__send_lock = threading.Lock()
+        self.__pending = collections.deque()
+        self.__pending_cv = threading.Condition()
+        self.__closed = True
+        self.__error = None
+        self.__freq = None
+        self.__trace = None
+        pass
+
+    def connect(self, ip_addr, port: int = 5025, timeout_s: float = 10.0) -> None:
+        # 'timeout_s' only applies to establishing the connection.
+        self.__sock = socket.create_connection((ip_addr, port), timeout=timeout_s)
+        self.__sock.settimeout(None)
+        self.__sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.__reader = self.__sock.makefile('rb', buffering=1 << 20)
+        self.__closed = False
+        self.__error = None
+        self.__reader_thread = threading.Thread(target=self.__read_loop, daemon=True)
+        self.__reader_thread.start()
+        self.write('FORM REAL,32;FORM:BORD SWAP' if self.binary else 'FORM ASC')
+        pass
+
+    def disconnect(self) -> None:
+        if self.__closed:
+            return
+        self.__closed = True
+        with self.__pending_cv:
+            self.__pending_cv.notify_all()
+        try:
+            self.__sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.__sock.close()
+        self.__reader_thread.join()
+        self.__reader.close()
+        pass
+
+    def write(self, command: str) -> None:
+        with self.__send_lock:
+            self.__check_alive()
+            self.__sock.sendall(command.encode() + b'\n')
+        pass
+
+    def submit(self, command: str, block: bool = False) -> Future:
+        # Queues a query; 'block=True' for binary block responses. The future holds a str (or bytes).
+        future = Future()
+        with self.__send_lock:
+            with self.__pending_cv:
+                self.__check_alive()
+                self.__pending.append((future, block))
+                self.__pending_cv.notify()
+            self.__sock.sendall(command.encode() + b'\n')
+        return future
+
+    def query(self, command: str) -> str:
+        return self.submit(command).result(self.query_timeout_s)
+
+    def query_many(self, commands: Sequence[str]) -> list:
+        futures = [self.submit(c) for c in commands]
+        return [f.result(self.query_timeout_s) for f in futures]
+
+    def trigger_single_sweep(self) -> None:
+        self.query('INIT:IMM;*OPC?')
+        pass
+
+    def get_psd(self) -> (np.ndarray, np.ndarray):
+        return np.copy(self.__freq), self.__fetch_trace().result(self.query_timeout_s)
+
+    def get_psd_averaged(self, avg_number) -> (np.ndarray, np.ndarray):
+        # All sweeps and trace requests are queued at once; the traces are averaged as they arrive.
+        futures = []
+        for _ in range(avg_number):
+            self.submit('INIT:IMM;*OPC?')
+            futures.append(self.__fetch_trace())
+        acc = np.zeros(len(self.__freq), dtype=np.float64)
+        for f in futures:
+            acc += f.result(self.query_timeout_s)
+        return np.copy(self.__freq), (acc / avg_number).astype(np.float32)
+
+    def set_params(self, freq_start, freq_stop, freq_rbw, freq_bins) -> None:
+        self.write(f'FREQ:STAR {freq_start};FREQ:STOP {freq_stop};BAND:RES {freq_rbw};SWE:POIN {int(freq_bins)}')
+        # The instrument may coerce the values (e.g., to its supported point counts); the axis follows its answers.
+        start, stop, bins = self.query_many(['FREQ:STAR?', 'FREQ:STOP?', 'SWE:POIN?'])
+        self.__freq = np.linspace(float(start), float(stop), int(float(bins)))
+        pass
+
+    def get_status_dict(self) -> dict:
+        keys = ['freq_start', 'freq_stop', 'rbw', 'vbw', 'bins', 'sweep_time_s', 'ref_level', 'avg_maxh_count']
+        values = self.query_many(['FREQ:STAR?', 'FREQ:STOP?', 'BAND:RES?', 'BAND:VID?', 'SWE:POIN?', 'SWE:TIME?',
+                                  'DISP:TRAC:Y:RLEV?', 'AVER:COUN?'])
+        status_dict = {k: float(v) for k, v in zip(keys, values)}
+        status_dict['bins'] = int(status_dict['bins'])
+        status_dict['avg_maxh_count'] = int(status_dict['avg_maxh_count'])
+        status_dict['freq_span'] = status_dict['freq_stop'] - status_dict['freq_start']
+        status_dict['freq_center'] = (status_dict['freq_start'] + status_dict['freq_stop']) / 2
+        status_dict['sweep_time_ms'] = status_dict['sweep_time_s'] * 1e3
+        status_dict['psd_unit'] = self.query('UNIT:POW?').lower()
+        status_dict['avg'] = False
+        status_dict['maxh'] = False
+        return status_dict
+
+    def __fetch_trace(self) -> Future:
+        raw = self.submit('TRAC:DATA? TRACE1', block=self.binary)
+        trace = Future()
+        raw.add_done_callback(lambda f: trace.set_exception(f.exception()) if f.exception() is not None
+                              else trace.set_result(self.__decode_trace(f.result())))
+        return trace
+
+    def __check_alive(self) -> None:
+        if self.__error is not None:
+            raise ConnectionError(f"The connection is dead: {self.__error!r}") from self.__error
+        if self.__closed:
+            raise ConnectionError("Not connected.")
+        pass
+
+    def __decode_trace(self, response) -> np.ndarray:
+        if self.binary:
+            return np.frombuffer(response, dtype='<f4').copy()
+        return np.array(response.split(','), dtype=np.float32)
+
+    def __read_loop(self) -> None:
+        while True:
+            with self.__pending_cv:
+                while not self.__pending and not self.__closed:
+                    self.__pending_cv.wait()
+                if not self.__pending:
+                    return
+                future, block = self.__pending[0]
+            try:
+                if block:
+                    response = read_binary_block(self.__reader)
+                else:
+                    line = self.__reader.readline()
+                    if not line:
+                        raise ConnectionError("Connection closed by the instrument.")
+                    response = line.decode().strip()
+            except (OSError, ValueError) as e:
+                with self.__pending_cv:
+                    self.__error = e
+                    while self.__pending:
+                        self.__pending.popleft()[0].set_exception(e)
+                return
+            with self.__pending_cv:
+                self.__pending.popleft()
+            future.set_result(response)
+            pass
+        pass
+    pass
@@ -1,2 +1,7 @@
 from .DummySpectrumAnalyzer import *
 from .DummyXYZ import *
+from .SimulatedDie import *
+from .SimulatedXYZ import *
+from .SimulatedSpectrumAnalyzer import *
+from .SocketSpectrumAnalyzer import *
+from .MockSpectrumAnalyzerServer import *
@@ -0,0 +1,174 @@
+#  Copyright (c) 2025 Daehyeon Bae
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+import numpy as np
+from typing import Optional, Callable, Sequence, Union
+from scipy.ndimage import distance_transform_edt, binary_dilation
+from .writer import PSDChunkWriter
+from .engine import PipelinedAcquisition
+from .path_planner import MotionTimeModel, serpentine_order, plan_scan_path
+from ..aiming.aiming import aim_points_extraction
+from ..aiming.filter import simple_2d_filter, get_2d_binary_mask_from_pts
+from ..aiming.finder import find_top_n_percent_loc_2d
+
+
+__all__ = [
+    'make_nearest_freq_leakage_fn',
+    'fill_unmeasured_nearest',
+    'AdaptiveScan'
+]
+
+
+def make_nearest_freq_leakage_fn(freq: np.ndarray,
+                                 target_freq_hz_list: Union[list, tuple, np.ndarray]
+                                 ) -> Callable[[np.ndarray], float]:
+    # Leakage of a single sweep = mean PSD of the bins nearest to the targets (e.g., both IMD sidebands).
+    target_idx = np.array([np.argmin(np.abs(freq - t_hz)) for t_hz in target_freq_hz_list])
+    return lambda psd: float(np.mean(psd[target_idx]))
+
+
+def fill_unmeasured_nearest(value_map: np.ndarray,
+                            measured_mask: np.ndarray
+                            ) -> np.ndarray:
+    # Each unmeasured pixel takes the value of the nearest measured one.
+    if np.all(measured_mask):
+        return np.copy(value_map)
+    _, (idx_y, idx_x) = distance_transform_edt(~measured_mask, return_indices=True)
+    return value_map[idx_y, idx_x]
+
+
+class AdaptiveScan:
+    # Coarse-to-fine acquisition on the full-resolution grid (x_space x y_space):
+    #   1) scan every 'coarse_step'-th point,
+    #   2) build the leakage map (unmeasured points: nearest measured value), filter it and aim,
+    #   3) halve the step and scan only the points around the top-n points of every cluster,
+    # and repeat until the step is 1 and the aim points move less than 'converge_tol_pts' between rounds.
+    # All sweeps go to 'writer', so the result is still a regular (partially filled) PSD chunk.
+    def __init__(self,
+                 xyz,
+                 sa,
+                 writer: PSDChunkWriter,
+                 x_space: np.ndarray,
+                 y_space: np.ndarray,
+                 leakage_fn: Callable[[np.ndarray], float],
+                 coarse_step: int = 8,
+                 percentile: float = 0.9,
+                 top_n: Union[int, float] = 0.05,
+                 dbscan_min_samples: int = 5,
+                 dbscan_eps: float = 1.5,
+                 filter_chain: Sequence = (('median', (3, 3)), ('mean', (3, 3))),
+                 converge_tol_pts: float = 1.0,
+                 max_rounds: int = 10,
+                 position_z: Optional[int] = None,
+                 velocity: int = -1,
+                 motion_model: Optional[MotionTimeModel] = None):
+        self.__writer = writer
+        self.__x_space = np.asarray(x_space)
+        self.__y_space = np.asarray(y_space)
+        self.__leakage_fn = leakage_fn
+        self.__coarse_step = max(int(coarse_step), 1)
+        self.__percentile = percentile
+        self.__top_n = top_n
+        self.__dbscan_min_samples = dbscan_min_samples
+        self.__dbscan_eps = dbscan_eps
+        self.__filter_chain = filter_chain
+        self.__converge_tol_pts = converge_tol_pts
+        self.__max_rounds = max_rounds
+        self.__motion_model = motion_model
+        self.__last_xy = None
+        self.__acquisition = PipelinedAcquisition(xyz, sa, writer, position_z=position_z, velocity=velocity)
+        shape = (len(self.__y_space), len(self.__x_space))
+        self.leakage_map = np.zeros(shape, dtype=np.float64)
+        # A resumed writer: the acquisition skips its completed points, so they are taken from the stored sweeps.
+        self.measured_mask = writer.completion_map
+        assert self.measured_mask.shape == shape, "The writer does not match the grid."
+        for id_y, id_x in np.argwhere(self.measured_mask):
+            self.leakage_map[id_y, id_x] = leakage_fn(writer.read_sweep(id_y, id_x))
+        self.history = []
+        pass
+
+    def run(self) -> dict:
+        step = self.__coarse_step
+        selection = np.zeros_like(self.measured_mask)
+        selection[::step, ::step] = True
+        selection[-1, ::step] = True
+        selection[::step, -1] = True
+        prev_aim_xy = None
+        result = None
+        for _ in range(self.__max_rounds):
+            n_new = self.__scan(selection & ~self.measured_mask)
+            result = self.aim()
+            aim_xy = np.array(result['final_pt_xy']).reshape(-1, 2)
+            self.history.append({'step': step, 'n_new_points': n_new, 'n_points': int(np.sum(self.measured_mask)),
+                                 'final_pt_xy': aim_xy})
+            converged = prev_aim_xy is not None and len(prev_aim_xy) == len(aim_xy) and \
+                (len(aim_xy) == 0 or np.max(np.hypot(*(prev_aim_xy - aim_xy).T)) <= self.__converge_tol_pts)
+            if step == 1 and (converged or n_new == 0):
+                break
+            prev_aim_xy = aim_xy
+            # Densify around the candidate clusters; the margin covers the gap to the previous samples.
+            candidate_mask = get_2d_binary_mask_from_pts(self.measured_mask,
+                                                         np.concatenate(result['each_cluster_top_n_pt_xy']) if
+                                                         result['each_cluster_top_n_pt_xy'] else [])
+            candidate_mask = binary_dilation(candidate_mask, np.ones((2 * step + 1, 2 * step + 1), dtype=np.bool_))
+            step = max(step // 2, 1)
+            selection = np.zeros_like(self.measured_mask)
+            selection[::step, ::step] = True
+            selection &= candidate_mask
+        result['n_points'] = int(np.sum(self.measured_mask))
+        result['history'] = self.history
+        return result
+
+    def aim(self) -> dict:
+        m = fill_unmeasured_nearest(self.leakage_map, self.measured_mask)
+        for filter_type, filter_size_xy in self.__filter_chain:
+            m = simple_2d_filter(m, filter_type, filter_size_xy)
+        humps_mask_xy_list = find_top_n_percent_loc_2d(m, self.__percentile)
+        r = aim_points_extraction(combined_leakage_map_2d=m, hump_mask_xy_list=humps_mask_xy_list,
+                                  top_n=self.__top_n, dbscan_min_samples=self.__dbscan_min_samples,
+                                  dbscan_eps=self.__dbscan_eps)
+        r['leakage_map'] = m
+        return r
+
+    def __scan(self, selection: np.ndarray) -> int:
+        # Serpentine order over the selected points, or a planned path (starting from the last visited point)
+        # if a motion-time model is given.
+        id_y_list, id_x_list = np.nonzero(selection)
+        if len(id_y_list) == 0:
+            return 0
+        points_xy = np.stack([self.__x_space[id_x_list], self.__y_space[id_y_list]], axis=1)
+        if self.__motion_model is None:
+            order = serpentine_order(points_xy)
+        else:
+            order = plan_scan_path(points_xy, self.__motion_model, start_xy=self.__last_xy, method='nn+2opt')['order']
+        points = [((int(id_y_list[i]), int(id_x_list[i])), tuple(points_xy[i])) for i in order]
+        self.__acquisition.run(points, progress=self.__on_point)
+        self.__last_xy = points_xy[order[-1]]
+        return len(points)
+
+    def __on_point(self, id_y: int, id_x: int, psd: np.ndarray) -> None:
+        self.leakage_map[id_y, id_x] = self.__leakage_fn(psd)
+        self.measured_mask[id_y, id_x] = True
+        pass
+
+    @property
+    def timing(self):
+        return self.__acquisition.timing
+    pass
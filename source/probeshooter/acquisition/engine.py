@@ -0,0 +1,185 @@
+#  Copyright (c) 2025 Daehyeon Bae
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+import time
+import queue
+import threading
+import numpy as np
+from typing import Optional, Callable, Sequence
+from .writer import PSDChunkWriter
+
+
+__all__ = [
+    'AcquisitionTiming',
+    'PipelinedAcquisition'
+]
+
+
+class AcquisitionTiming:
+    def __init__(self):
+        self.__total_s = {}
+        self.__count = {}
+        self.__max_s = {}
+        self.__lock = threading.Lock()
+        self.wall_s = 0.0
+        pass
+
+    def add(self, stage: str, elapsed_s: float) -> None:
+        with self.__lock:
+            self.__total_s[stage] = self.__total_s.get(stage, 0.0) + elapsed_s
+            self.__count[stage] = self.__count.get(stage, 0) + 1
+            self.__max_s[stage] = max(self.__max_s.get(stage, 0.0), elapsed_s)
+        pass
+
+    def summary(self) -> dict:
+        r = {}
+        for stage, total_s in self.__total_s.items():
+            r[stage] = {'total_s': total_s,
+                        'mean_s': total_s / self.__count[stage],
+                        'max_s': self.__max_s[stage],
+                        'count': self.__count[stage]}
+        r['wall_s'] = self.wall_s
+        return r
+
+    def report(self) -> None:
+        print(f"{'Stage':<10}{'Total [s]':>12}{'Mean [ms]':>12}{'Max [ms]':>12}{'Count':>8}")
+        for stage, s in self.summary().items():
+            if stage == 'wall_s':
+                continue
+            print(f"{stage:<10}{s['total_s']:>12.2f}{s['mean_s'] * 1e3:>12.2f}{s['max_s'] * 1e3:>12.2f}{s['count']:>8}")
+        print(f"* Wall time: {self.wall_s:.2f}s")
+        pass
+    pass
+
+
+class PipelinedAcquisition:
+    # Overlaps the stage motion to the next point with the trace transfer of the current point, and the storing
+    # with both (writer thread). Per point: wait for motion -> sweep -> start the next move (block=False) ->
+    # transfer -> hand over to the writer thread. With trace_avg > 1, the averaged sweeps and their transfer run
+    # before the next move (only the storing overlaps). The probe never moves during a sweep.
+    def __init__(self,
+                 xyz,
+                 sa,
+                 writer: PSDChunkWriter,
+                 position_z: Optional[int] = None,
+                 velocity: int = -1,
+                 trace_avg: int = 1,
+                 queue_size: int = 8):
+        self.__xyz = xyz
+        self.__sa = sa
+        self.__writer = writer
+        self.__position_z = position_z
+        self.__velocity = velocity
+        self.__trace_avg = trace_avg
+        self.__queue_size = queue_size
+        self.timing = AcquisitionTiming()
+        self.status_dict = None
+        self.__stop_event = threading.Event()
+        pass
+
+    def stop(self) -> None:
+        # Early stop (e.g., from 'progress'); the remaining points stay uncompleted, so a later run resumes them.
+        self.__stop_event.set()
+        pass
+
+    def run(self,
+            scan_points: Sequence,
+            progress: Optional[Callable[[int, int, np.ndarray], None]] = None
+            ) -> dict:
+        # scan_points: visiting order of ((id_y, id_x), (position_x, position_y)); completed points are skipped.
+        # progress(id_y, id_x, psd) is called from the writer thread after each point has been stored.
+        points = [p for p in scan_points if not self.__writer.is_completed(*p[0])]
+        self.__stop_event.clear()
+        store_queue = queue.Queue(maxsize=self.__queue_size)
+        store_error = []
+        store_thread = threading.Thread(target=self.__store_loop, args=(store_queue, store_error, progress),
+                                        daemon=True)
+        store_thread.start()
+        wall_start_t = time.perf_counter()
+        try:
+            if points:
+                self.__move(points[0][1], block=False)
+            for i, ((id_y, id_x), _) in enumerate(points):
+                if store_error or self.__stop_event.is_set():
+                    break
+                t = time.perf_counter()
+                self.__xyz.wait_for_motion()
+                self.timing.add('move', time.perf_counter() - t)
+
+                if self.__trace_avg == 1:
+                    t = time.perf_counter()
+                    self.__sa.trigger_single_sweep()
+                    self.timing.add('sweep', time.perf_counter() - t)
+
+                    # The trace is captured; the probe can already head to the next point.
+                    self.__move_to_next(points, i)
+
+                    t = time.perf_counter()
+                    freq, psd = self.__sa.get_psd()
+                    self.timing.add('transfer', time.perf_counter() - t)
+                else:
+                    # 'get_psd_averaged' triggers its own sweeps, so the probe must stay until it returns.
+                    t = time.perf_counter()
+                    freq, psd = self.__sa.get_psd_averaged(self.__trace_avg)
+                    self.timing.add('sweep', time.perf_counter() - t)
+                    self.__move_to_next(points, i)
+                if self.status_dict is None:
+                    self.status_dict = self.__sa.get_status_dict()
+                store_queue.put((id_y, id_x, freq, psd))
+                pass
+        finally:
+            store_queue.put(None)
+            store_thread.join()
+            self.__xyz.wait_for_motion()
+            self.__writer.flush()
+            self.timing.wall_s = time.perf_counter() - wall_start_t
+        if store_error:
+            raise store_error[0]
+        return self.timing.summary()
+
+    def __move_to_next(self, points: list, i: int) -> None:
+        if i + 1 < len(points) and not self.__stop_event.is_set():
+            self.__move(points[i + 1][1], block=False)
+        pass
+
+    def __move(self, position_xy, block: bool) -> None:
+        self.__xyz.move_to_xyz(int(position_xy[0]), int(position_xy[1]), self.__position_z,
+                               velocity=self.__velocity, block=block)
+        pass
+
+    def __store_loop(self, store_queue: queue.Queue, store_error: list, progress) -> None:
+        while True:
+            item = store_queue.get()
+            if item is None:
+                return
+            if store_error:
+                continue
+            id_y, id_x, freq, psd = item
+            try:
+                t = time.perf_counter()
+                self.__writer.write_sweep(id_y, id_x, psd, freq)
+                self.timing.add('store', time.perf_counter() - t)
+                if progress is not None:
+                    progress(id_y, id_x, psd)
+            except Exception as e:
+                store_error.append(e)
+            pass
+        pass
+    pass
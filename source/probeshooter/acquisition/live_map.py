@@ -0,0 +1,222 @@
+#  Copyright (c) 2025 Daehyeon Bae
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+import sys
+import warnings
+import threading
+import numpy as np
+from typing import Optional, Callable, Sequence, Union
+from numpy.lib.stride_tricks import sliding_window_view
+from ..aiming.aiming import aim_points_extraction
+from ..aiming.finder import calc_top_n_percentile_value
+
+
+__all__ = [
+    'LiveLeakageMap'
+]
+
+
+# scipy.ndimage padding mode -> np.pad mode
+_PAD_MODES = {'nearest': 'edge', 'reflect': 'symmetric', 'mirror': 'reflect', 'wrap': 'wrap', 'constant': 'constant'}
+_NAN_REDUCERS = {'min': np.nanmin, 'max': np.nanmax, 'mean': np.nanmean, 'median': np.nanmedian}
+
+
+def _nan_2d_filter(target_2d_arr: np.ndarray,
+                   filter_type: str,
+                   filter_size_xy: (int, int),
+                   padding_mode: str = 'nearest'
+                   ) -> np.ndarray:
+    # 'simple_2d_filter' over the non-NaN pixels of each window only (NaN if the window has none), with the same
+    # window placement as scipy.ndimage. Each output depends only on its window, as for 'simple_2d_filter'.
+    assert filter_type in _NAN_REDUCERS, "Not supported 'filter_type'."
+    size_y, size_x = filter_size_xy[1], filter_size_xy[0]
+    padded = np.pad(target_2d_arr, ((size_y // 2, size_y - 1 - size_y // 2), (size_x // 2, size_x - 1 - size_x // 2)),
+                    mode=_PAD_MODES[padding_mode])
+    windows = sliding_window_view(padded, (size_y, size_x))
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # All-NaN windows
+        return _NAN_REDUCERS[filter_type](windows, axis=(2, 3))
+
+
+class LiveLeakageMap:
+    # Leakage map accumulated point by point during the scan (pass the instance, or a wrapper, as 'progress' of
+    # 'PipelinedAcquisition.run'). Unmeasured pixels are NaN and every stage of 'filter_chain' only uses the
+    # measured pixels of its window, so the unscanned area does not bias the values next to it. On each new pixel,
+    # every stage is recomputed only on the region it can affect (the previous region grown by half the filter
+    # size) from a margin-padded window, so the filtered map always equals the full chain on the current map.
+    # With aim_every > 0, aiming runs on a background thread (requests arriving while it runs are coalesced), so
+    # it never holds up the caller (e.g., the writer thread); call 'close()' at the end.
+    def __init__(self,
+                 shape: (int, int),
+                 leakage_fn: Callable[[np.ndarray], float],
+                 filter_chain: Sequence = (('median', (3, 3)), ('mean', (3, 3))),
+                 padding_mode: str = 'nearest',
+                 percentile: float = 0.9,
+                 top_n: Union[int, float] = 0.05,
+                 dbscan_min_samples: int = 5,
+                 dbscan_eps: float = 1.5,
+                 aim_every: int = 0):
+        self.__leakage_fn = leakage_fn
+        self.__filter_chain = tuple(filter_chain)
+        self.__padding_mode = padding_mode
+        self.__percentile = percentile
+        self.__top_n = top_n
+        self.__dbscan_min_samples = dbscan_min_samples
+        self.__dbscan_eps = dbscan_eps
+        self.__aim_every = aim_every
+        self.__lock = threading.Lock()
+        self.__raw_map = np.full(shape, np.nan, dtype=np.float64)
+        # Stage outputs; __stages[0] is the raw map and __stages[-1] the filtered map.
+        self.__stages = [self.__raw_map]
+        for filter_type, filter_size_xy in self.__filter_chain:
+            self.__stages.append(_nan_2d_filter(self.__stages[-1], filter_type, filter_size_xy, padding_mode))
+        self.measured_mask = np.zeros(shape, dtype=np.bool_)
+        self.n_updates = 0
+        self.last_aim = None
+        self.history = []
+        self.__aim_cv = threading.Condition()
+        self.__aim_pending = False
+        self.__aim_busy = False
+        self.__aim_thread = None
+        self.__closed = False
+        pass
+
+    def __call__(self, id_y: int, id_x: int, psd: np.ndarray) -> None:
+        self.update(id_y, id_x, self.__leakage_fn(psd))
+        pass
+
+    def update(self,
+               id_y: int,
+               id_x: int,
+               value: float
+               ) -> None:
+        with self.__lock:
+            self.__raw_map[id_y, id_x] = value
+            self.measured_mask[id_y, id_x] = True
+            self.n_updates += 1
+            y_div, x_div = self.__raw_map.shape
+            region = (id_y, id_y + 1, id_x, id_x + 1)  # affected region, half-open [y0, y1) x [x0, x1)
+            for k, (filter_type, filter_size_xy) in enumerate(self.__filter_chain):
+                # Filters take (x, y) sizes. A pixel affects the outputs within half the size around it.
+                ry, rx = filter_size_xy[1] // 2, filter_size_xy[0] // 2
+                region = (max(region[0] - ry, 0), min(region[1] + ry, y_div),
+                          max(region[2] - rx, 0), min(region[3] + rx, x_div))
+                window = (max(region[0] - ry, 0), min(region[1] + ry, y_div),
+                          max(region[2] - rx, 0), min(region[3] + rx, x_div))
+                local = _nan_2d_filter(self.__stages[k][window[0]:window[1], window[2]:window[3]],
+                                       filter_type, filter_size_xy, self.__padding_mode)
+                self.__stages[k + 1][region[0]:region[1], region[2]:region[3]] = \
+                    local[region[0] - window[0]:region[1] - window[0], region[2] - window[2]:region[3] - window[2]]
+                pass
+        if self.__aim_every > 0 and self.n_updates % self.__aim_every == 0:
+            self.__request_aim()
+        pass
+
+    def aim(self) -> Optional[dict]:
+        # Aiming on the partial map: the percentile threshold and the hump candidates only consider measured pixels.
+        # None if there are not enough candidates to form a cluster yet.
+        with self.__lock:
+            m = np.copy(self.__stages[-1])
+            measured = np.copy(self.measured_mask)
+        if np.sum(measured) < self.__dbscan_min_samples:
+            return None
+        threshold = calc_top_n_percentile_value(m[measured], self.__percentile)
+        humps_mask_xy_list = np.argwhere((m >= threshold) & measured)[:, [1, 0]]
+        if len(humps_mask_xy_list) < self.__dbscan_min_samples:
+            return None
+        r = aim_points_extraction(combined_leakage_map_2d=m, hump_mask_xy_list=humps_mask_xy_list,
+                                  top_n=self.__top_n, dbscan_min_samples=self.__dbscan_min_samples,
+                                  dbscan_eps=self.__dbscan_eps)
+        r['leakage_map'] = m
+        r['n_points'] = int(np.sum(measured))
+        self.last_aim = r
+        self.history.append({'n_points': r['n_points'], 'final_pt_xy': np.array(r['final_pt_xy']).reshape(-1, 2)})
+        return r
+
+    def wait_for_aim(self, timeout_s: Optional[float] = None) -> bool:
+        # Waits until no background aiming is requested or running; False on timeout.
+        with self.__aim_cv:
+            return self.__aim_cv.wait_for(lambda: not self.__aim_pending and not self.__aim_busy, timeout_s)
+
+    def close(self) -> None:
+        # Finishes a requested aiming and stops the background thread.
+        with self.__aim_cv:
+            self.__closed = True
+            self.__aim_cv.notify_all()
+        if self.__aim_thread is not None:
+            self.__aim_thread.join()
+            self.__aim_thread = None
+        pass
+
+    def __request_aim(self) -> None:
+        with self.__aim_cv:
+            if self.__closed:
+                return
+            self.__aim_pending = True
+            if self.__aim_thread is None:
+                self.__aim_thread = threading.Thread(target=self.__aim_loop, daemon=True)
+                self.__aim_thread.start()
+            self.__aim_cv.notify_all()
+        pass
+
+    def __aim_loop(self) -> None:
+        while True:
+            with self.__aim_cv:
+                self.__aim_cv.wait_for(lambda: self.__aim_pending or self.__closed)
+                if not self.__aim_pending:
+                    return
+                self.__aim_pending = False
+                self.__aim_busy = True
+            try:
+                self.aim()
+            except Exception as e:
+                print(f"[Warning] Live aiming failed: {e!r}", file=sys.stderr)
+            with self.__aim_cv:
+                self.__aim_busy = False
+                self.__aim_cv.notify_all()
+            pass
+        pass
+
+    def is_converged(self,
+                     tol_pts: float = 1.0,
+                     n_stable: int = 3
+                     ) -> bool:
+        # True if the aim points moved less than 'tol_pts' over the last 'n_stable' aims (e.g., for early stopping
+        # with 'PipelinedAcquisition.stop').
+        if len(self.history) < n_stable + 1:
+            return False
+        recent = [h['final_pt_xy'] for h in self.history[-(n_stable + 1):]]
+        if any(len(pts) != len(recent[-1]) or len(pts) == 0 for pts in recent):
+            return False
+        return all(np.max(np.hypot(*(pts - recent[-1]).T)) <= tol_pts for pts in recent[:-1])
+
+    @property
+    def raw_map(self) -> np.ndarray:
+        # NaN at unmeasured pixels.
+        return self.__raw_map
+
+    @property
+    def filtered_map(self) -> np.ndarray:
+        return self.__stages[-1]
+
+    @property
+    def coverage(self) -> float:
+        return float(np.mean(self.measured_mask))
+    pass
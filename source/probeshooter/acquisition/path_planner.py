@@ -0,0 +1,191 @@
+#  Copyright (c) 2025 Daehyeon Bae
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+import time
+import numpy as np
+from typing import Optional, Sequence, Union
+
+
+__all__ = [
+    'MotionTimeModel',
+    'serpentine_order',
+    'nearest_neighbor_order',
+    'improve_order_2opt',
+    'plan_scan_path',
+    'compare_scan_paths'
+]
+
+
+class MotionTimeModel:
+    # Axes move concurrently: t(a, b) = max_axis(|b - a| / velocity_axis) + settle_s (0 if a == b).
+    def __init__(self,
+                 velocity_xyz: Sequence[Union[float, int]] = (200000, 200000, 200000),
+                 settle_s: float = 0.05):
+        self.velocity_xyz = np.asarray(velocity_xyz, dtype=np.float64)
+        self.settle_s = settle_s
+        pass
+
+    def move_time(self,
+                  source_pts: np.ndarray,
+                  target_pts: np.ndarray
+                  ) -> np.ndarray:
+        # Broadcasts over leading dimensions; the last dimension holds the (x, y[, z]) coordinates.
+        source_pts = np.asarray(source_pts, dtype=np.float64)
+        target_pts = np.asarray(target_pts, dtype=np.float64)
+        n_axes = source_pts.shape[-1]
+        axis_s = np.abs(target_pts - source_pts) / self.velocity_xyz[:n_axes]
+        t = np.max(axis_s, axis=-1)
+        return np.where(t > 0, t + self.settle_s, 0.0)
+
+    def path_time(self, path_pts: np.ndarray) -> float:
+        path_pts = np.asarray(path_pts, dtype=np.float64)
+        if len(path_pts) < 2:
+            return 0.0
+        return float(np.sum(self.move_time(path_pts[:-1], path_pts[1:])))
+    pass
+
+
+def _start_point(start_xy: Sequence, n_axes: int) -> np.ndarray:
+    # A stage position (x, y[, z]) as the start of an N x n_axes path; extra axes are dropped.
+    start_xy = np.asarray(start_xy, dtype=np.float64).ravel()
+    assert len(start_xy) >= n_axes, "'start_xy' has fewer axes than the points."
+    return start_xy[:n_axes]
+
+
+def serpentine_order(points_xy: np.ndarray,
+                     row_axis: int = 1
+                     ) -> np.ndarray:
+    # Rows of equal coordinate on 'row_axis' (1: Y, 0: X); every other row is visited backwards.
+    # Works for any point set (sparse or ragged rows included).
+    points_xy = np.asarray(points_xy)
+    _, row_ids = np.unique(points_xy[:, row_axis], return_inverse=True)
+    along = points_xy[:, 1 - row_axis]
+    along_key = np.where(row_ids % 2 == 0, along, -along)
+    return np.lexsort((along_key, row_ids))
+
+
+def nearest_neighbor_order(points_xy: np.ndarray,
+                           motion_model: MotionTimeModel,
+                           start_xy: Optional[Sequence] = None
+                           ) -> np.ndarray:
+    points_xy = np.asarray(points_xy, dtype=np.float64)
+    n = len(points_xy)
+    visited = np.zeros(n, dtype=np.bool_)
+    order = np.empty(n, dtype=np.int64)
+    current = _start_point(start_xy, points_xy.shape[1]) if start_xy is not None else points_xy[0]
+    for k in range(n):
+        t = motion_model.move_time(current, points_xy)
+        t[visited] = np.inf
+        nxt = int(np.argmin(t))
+        order[k] = nxt
+        visited[nxt] = True
+        current = points_xy[nxt]
+        pass
+    return order
+
+
+def improve_order_2opt(points_xy: np.ndarray,
+                       order: np.ndarray,
+                       motion_model: MotionTimeModel,
+                       start_xy: Optional[Sequence] = None,
+                       max_passes: int = 5,
+                       time_limit_s: Optional[float] = 30.0
+                       ) -> np.ndarray:
+    # Open-path 2-opt (the start position stays first). For each edge (i, i+1), the best reversal of
+    # path[i+1..j] over all j is found in one vectorized evaluation.
+    points_xy = np.asarray(points_xy, dtype=np.float64)
+    order = np.asarray(order)
+    if start_xy is not None:
+        path = np.concatenate([_start_point(start_xy, points_xy.shape[1])[np.newaxis], points_xy[order]])
+        idx = np.concatenate([[-1], order])
+    else:
+        path = points_xy[order]
+        idx = np.array(order)
+    n = len(path)
+    start_t = time.perf_counter()
+    for _ in range(max_passes):
+        improved = False
+        for i in range(n - 2):
+            if time_limit_s is not None and time.perf_counter() - start_t > time_limit_s:
+                break
+            a, b = path[i], path[i + 1]
+            j = np.arange(i + 2, n)
+            c = path[j]
+            d_ab = motion_model.move_time(a, b)
+            d_ac = motion_model.move_time(a, c)
+            d_cd = np.zeros(len(j))
+            d_bd = np.zeros(len(j))
+            has_next = j + 1 < n
+            d_cd[has_next] = motion_model.move_time(c[has_next], path[j[has_next] + 1])
+            d_bd[has_next] = motion_model.move_time(b, path[j[has_next] + 1])
+            delta = d_ac + d_bd - d_ab - d_cd
+            best = int(np.argmin(delta))
+            if delta[best] < -1e-12:
+                jj = j[best]
+                path[i + 1:jj + 1] = path[i + 1:jj + 1][::-1]
+                idx[i + 1:jj + 1] = idx[i + 1:jj + 1][::-1]
+                improved = True
+            pass
+        if not improved:
+            break
+    return idx[1:] if start_xy is not None else idx
+
+
+def plan_scan_path(points_xy: np.ndarray,
+                   motion_model: MotionTimeModel,
+                   start_xy: Optional[Sequence] = None,
+                   method: str = 'nn+2opt',
+                   row_axis: int = 1,
+                   max_2opt_passes: int = 5,
+                   time_limit_s: Optional[float] = 30.0
+                   ) -> dict:
+    # points_xy: N x 2 (or N x 3) stage targets in any order, e.g., a full grid, adaptive points or revisits.
+    assert method in ['serpentine', 'nn', 'nn+2opt', 'serpentine+2opt'], "Not supported 'method'."
+    points_xy = np.asarray(points_xy)
+    if len(points_xy) == 0:
+        return {'order': np.zeros(0, dtype=np.int64), 'move_time_s': 0.0, 'method': method}
+    if method.startswith('serpentine'):
+        order = serpentine_order(points_xy, row_axis)
+    else:
+        order = nearest_neighbor_order(points_xy, motion_model, start_xy)
+    if method.endswith('2opt'):
+        order = improve_order_2opt(points_xy, order, motion_model, start_xy, max_2opt_passes, time_limit_s)
+    path = points_xy[order]
+    if start_xy is not None:
+        path = np.concatenate([_start_point(start_xy, points_xy.shape[1])[np.newaxis], path])
+    return {'order': order, 'move_time_s': motion_model.path_time(path), 'method': method}
+
+
+def compare_scan_paths(points_xy: np.ndarray,
+                       motion_model: MotionTimeModel,
+                       start_xy: Optional[Sequence] = None,
+                       methods: Sequence[str] = ('serpentine', 'nn', 'nn+2opt'),
+                       row_axis: int = 1,
+                       verbose: bool = True
+                       ) -> dict:
+    r = {}
+    for method in methods:
+        t = time.perf_counter()
+        r[method] = plan_scan_path(points_xy, motion_model, start_xy, method, row_axis)
+        r[method]['planning_s'] = time.perf_counter() - t
+        if verbose:
+            print(f"* {method:<16}: predicted move time {r[method]['move_time_s']:10.2f}s "
+                  f"(planning {r[method]['planning_s']:.2f}s)")
+    return r
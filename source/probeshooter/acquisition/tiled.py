@@ -0,0 +1,230 @@
+#  Copyright (c) 2025 Daehyeon Bae
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+import os
+import sys
+import numpy as np
+from typing import Optional, Callable, NamedTuple, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from .writer import PSDChunkWriter
+from .engine import PipelinedAcquisition
+from .path_planner import serpentine_order
+from ..handler.psd_chunk_dtype import PSDChunk
+from ..handler.psd_chunk_handler import load_psd_chunk
+from ..handler.psd_chunk_metadata import read_psd_chunk_metadata, write_psd_chunk_metadata
+
+
+__all__ = [
+    'TILES_DIR_NAME',
+    'PROVENANCE_FILE_NAME',
+    'TileSpec',
+    'split_grid_into_tiles',
+    'TiledAcquisition',
+    'merge_psd_chunk_tiles'
+]
+
+
+TILES_DIR_NAME = 'tiles'
+PROVENANCE_FILE_NAME = 'provenance.npy'
+
+
+class TileSpec(NamedTuple):
+    # Half-open index ranges on the global grid (overlap included).
+    tile_id: int
+    y_start: int
+    y_stop: int
+    x_start: int
+    x_stop: int
+
+
+def split_grid_into_tiles(grid_y_div: int,
+                          grid_x_div: int,
+                          n_tiles_y: int,
+                          n_tiles_x: int,
+                          overlap: int = 0
+                          ) -> list:
+    # Near-equal tiles; each tile is extended by 'overlap' grid points towards its neighbours.
+    assert 0 < n_tiles_y <= grid_y_div and 0 < n_tiles_x <= grid_x_div and overlap >= 0
+    y_edges = np.linspace(0, grid_y_div, n_tiles_y + 1).round().astype(int)
+    x_edges = np.linspace(0, grid_x_div, n_tiles_x + 1).round().astype(int)
+    tiles = []
+    for ty in range(n_tiles_y):
+        for tx in range(n_tiles_x):
+            tiles.append(TileSpec(len(tiles),
+                                  int(max(y_edges[ty] - overlap, 0)), int(min(y_edges[ty + 1] + overlap, grid_y_div)),
+                                  int(max(x_edges[tx] - overlap, 0)), int(min(x_edges[tx + 1] + overlap, grid_x_div))))
+        pass
+    return tiles
+
+
+def _tile_path(dataset_path: str, tile_id: int) -> str:
+    return f"{dataset_path}{os.sep}{TILES_DIR_NAME}{os.sep}tile_{tile_id:03d}"
+
+
+def _scan_tile(dataset_path: str,
+               tile: TileSpec,
+               x_space: np.ndarray,
+               y_space: np.ndarray,
+               bins: int,
+               instrument_factory: Callable,
+               position_z: Optional[int],
+               velocity: int,
+               trace_avg: int
+               ) -> dict:
+    # Runs in its own process: the instruments are created (and connected) there by 'instrument_factory(tile_id)'.
+    xyz, sa = instrument_factory(tile.tile_id)
+    tile_y_div, tile_x_div = tile.y_stop - tile.y_start, tile.x_stop - tile.x_start
+    writer = PSDChunkWriter(_tile_path(dataset_path, tile.tile_id), tile_y_div, tile_x_div, bins, resume=True)
+    # Marks the (partial) tile dataset as a tile, e.g., for 'PSDChunkCatalog.index'; completed on finalize.
+    writer.write_metadata({'tile': list(tile)})
+    id_y, id_x = np.divmod(np.arange(tile_y_div * tile_x_div), tile_x_div)
+    points_xy = np.stack([x_space[tile.x_start + id_x], y_space[tile.y_start + id_y]], axis=1)
+    scan_points = [((int(id_y[i]), int(id_x[i])), tuple(points_xy[i])) for i in serpentine_order(points_xy)]
+    acquisition = PipelinedAcquisition(xyz, sa, writer, position_z=position_z, velocity=velocity, trace_avg=trace_avg)
+    timing = acquisition.run(scan_points)
+    metadata = acquisition.status_dict if acquisition.status_dict is not None else sa.get_status_dict()
+    metadata = dict(metadata)
+    metadata['tile'] = list(tile)
+    metadata['duration_s'] = acquisition.timing.wall_s
+    writer.finalize(metadata=metadata)
+    return timing
+
+
+class TiledAcquisition:
+    # Splits the grid (x_space x y_space) into tiles and scans them concurrently, one process per instrument pair;
+    # each tile is a regular (resumable) dataset under '<dataset_path>/tiles/'. 'instrument_factory(tile_id)' must be
+    # picklable (a module-level function or a functools.partial of one) and return the (xyz, sa) pair of that tile.
+    def __init__(self,
+                 dataset_path: str,
+                 x_space: np.ndarray,
+                 y_space: np.ndarray,
+                 bins: int,
+                 tiles: Sequence[TileSpec],
+                 instrument_factory: Callable,
+                 position_z: Optional[int] = None,
+                 velocity: int = -1,
+                 trace_avg: int = 1):
+        self.__dataset_path = dataset_path
+        self.__x_space = np.asarray(x_space)
+        self.__y_space = np.asarray(y_space)
+        self.__bins = bins
+        self.__tiles = list(tiles)
+        self.__instrument_factory = instrument_factory
+        self.__position_z = position_z
+        self.__velocity = velocity
+        self.__trace_avg = trace_avg
+        self.tile_timing = {}
+        pass
+
+    def run(self) -> dict:
+        os.makedirs(f"{self.__dataset_path}{os.sep}{TILES_DIR_NAME}", exist_ok=True)
+        with ProcessPoolExecutor(max_workers=len(self.__tiles)) as executor:
+            futures = {tile.tile_id: executor.submit(_scan_tile, self.__dataset_path, tile, self.__x_space,
+                                                     self.__y_space, self.__bins, self.__instrument_factory,
+                                                     self.__position_z, self.__velocity, self.__trace_avg)
+                       for tile in self.__tiles}
+            self.tile_timing = {tile_id: future.result() for tile_id, future in futures.items()}
+        return self.tile_timing
+
+    def merge(self,
+              overlap_mode: str = 'mean',
+              metadata: Optional[dict] = None,
+              verbose: bool = False
+              ) -> PSDChunk:
+        return merge_psd_chunk_tiles(self.__dataset_path, self.__tiles, (len(self.__y_space), len(self.__x_space)),
+                                     overlap_mode, metadata, verbose)
+
+    @property
+    def tiles(self) -> list:
+        return self.__tiles
+    pass
+
+
+def merge_psd_chunk_tiles(dataset_path: str,
+                          tiles: Sequence[TileSpec],
+                          grid_shape: (int, int),
+                          overlap_mode: str = 'mean',
+                          metadata: Optional[dict] = None,
+                          verbose: bool = False
+                          ) -> PSDChunk:
+    # Mosaics the tile datasets into '<dataset_path>/psd_chunk.npy', tile by tile (each tile is memory-mapped).
+    # overlap_mode: 'mean' (average of all tiles), 'first' (lowest tile id) or 'max' (per bin).
+    # 'provenance.npy' (Y x X, int16) holds the tile id of each point: -1 where tiles were averaged, -2 where no
+    # tile covers the point.
+    assert overlap_mode in ['mean', 'first', 'max'], "Not supported 'overlap_mode'."
+    tiles = sorted(tiles, key=lambda t: t.tile_id)
+    freq = None
+    chunks = []
+    for tile in tiles:
+        chunk = load_psd_chunk(_tile_path(dataset_path, tile.tile_id), verbose=False, lazy=True)
+        assert chunk.shape[:2] == (tile.y_stop - tile.y_start, tile.x_stop - tile.x_start), \
+            f"Tile {tile.tile_id} does not match its spec."
+        if freq is None:
+            freq = np.array(chunk.freq)
+        elif len(chunk.freq) != len(freq) or not np.allclose(chunk.freq, freq):
+            raise ValueError(f"Tile {tile.tile_id} has a different frequency axis.")
+        chunks.append(chunk)
+        pass
+    y_div, x_div = grid_shape
+    dtype = chunks[0].data.dtype
+    out = np.lib.format.open_memmap(f"{dataset_path}{os.sep}psd_chunk.npy", mode='w+',
+                                    dtype=np.result_type(dtype, np.float32) if overlap_mode == 'mean' else dtype,
+                                    shape=(y_div, x_div, len(freq)))
+    count = np.zeros(grid_shape, dtype=np.int32)
+    provenance = np.full(grid_shape, -2, dtype=np.int16)
+    for tile, chunk in zip(tiles, chunks):
+        ys, xs = slice(tile.y_start, tile.y_stop), slice(tile.x_start, tile.x_stop)
+        for local_y in range(tile.y_stop - tile.y_start):
+            y = tile.y_start + local_y
+            row = np.asarray(chunk.data[local_y])
+            first = count[y, xs] == 0
+            if overlap_mode == 'first':
+                out[y, xs][first] = row[first]
+            elif overlap_mode == 'max':
+                out[y, xs] = np.where(first[:, np.newaxis], row, np.maximum(out[y, xs], row))
+            else:
+                out[y, xs] = np.where(first[:, np.newaxis], row, out[y, xs] + row)
+            pass
+        region = provenance[ys, xs]
+        region[count[ys, xs] == 0] = tile.tile_id
+        if overlap_mode != 'first':
+            region[count[ys, xs] > 0] = -1
+        count[ys, xs] += 1
+        if verbose:
+            print(f"[Tiles] Merged tile {tile.tile_id}.")
+        pass
+    if overlap_mode == 'mean':
+        for y in range(y_div):
+            out[y] /= np.maximum(count[y], 1)[:, np.newaxis]
+    out.flush()
+    del out, chunks
+    np.save(f"{dataset_path}{os.sep}freq.npy", freq)
+    np.save(f"{dataset_path}{os.sep}{PROVENANCE_FILE_NAME}", provenance)
+    if np.any(count == 0):
+        print("[Warning] Some grid points are not covered by any tile.", file=sys.stderr)
+    if metadata is None:
+        metadata = dict(read_psd_chunk_metadata(_tile_path(dataset_path, tiles[0].tile_id)))
+        metadata.pop('tile', None)
+        metadata.pop('duration_s', None)
+    metadata = dict(metadata)
+    metadata['tiles'] = [list(t) for t in tiles]
+    metadata['overlap_mode'] = overlap_mode
+    write_psd_chunk_metadata(dataset_path, metadata)
+    return load_psd_chunk(dataset_path, verbose=False, lazy=True)
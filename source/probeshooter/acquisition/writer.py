@@ -0,0 +1,193 @@
+#  Copyright (c) 2025 Daehyeon Bae
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+import os
+import mmap
+import numpy as np
+from typing import Optional, Union
+from ..handler.psd_chunk_metadata import write_psd_chunk_metadata
+
+
+__all__ = [
+    'PROGRESS_FILE_NAME',
+    'PSDChunkWriter'
+]
+
+
+PROGRESS_FILE_NAME = 'progress.npy'
+
+
+class PSDChunkWriter:
+    # Streams sweeps into a pre-allocated, memory-mapped 'psd_chunk.npy' (Y x X x F) and records a completion
+    # bitmap ('progress.npy'). A sweep is marked completed only after its data has been flushed, so after a crash
+    # the scan resumes from the completed points ('resume=True') and RAM usage does not depend on the grid size.
+    # keep_idx: narrowband mode; only these bins of each sweep (e.g., 'select_band_idx(freq, bands)') are stored.
+    def __init__(self,
+                 dataset_path: str,
+                 grid_y_div: int,
+                 grid_x_div: int,
+                 bins: int,
+                 dtype: Union[str, np.dtype] = np.float32,
+                 resume: bool = True,
+                 flush_every: int = 1,
+                 keep_idx: Optional[np.ndarray] = None):
+        os.makedirs(dataset_path, exist_ok=True)
+        self.__dataset_path = dataset_path
+        self.__chunk_path = f"{dataset_path}{os.sep}psd_chunk.npy"
+        self.__progress_path = f"{dataset_path}{os.sep}{PROGRESS_FILE_NAME}"
+        self.__freq_path = f"{dataset_path}{os.sep}freq.npy"
+        self.__flush_every = max(int(flush_every), 1)
+        self.__pending = []
+        self.__bins = bins
+        self.__keep_idx = None if keep_idx is None else np.asarray(keep_idx, dtype=np.int64)
+        if self.__keep_idx is not None:
+            assert len(self.__keep_idx) > 0 and np.all((0 <= self.__keep_idx) & (self.__keep_idx < bins))
+        shape = (grid_y_div, grid_x_div, bins if self.__keep_idx is None else len(self.__keep_idx))
+        resumable = resume and os.path.exists(self.__chunk_path) and os.path.exists(self.__progress_path)
+        if resume and not resumable and os.path.exists(self.__chunk_path):
+            raise FileExistsError(f"'{self.__chunk_path}' is already finalized; use resume=False to overwrite it.")
+        if resumable:
+            self.__data = np.lib.format.open_memmap(self.__chunk_path, mode='r+')
+            self.__progress = np.lib.format.open_memmap(self.__progress_path, mode='r+')
+            assert self.__data.shape == shape and self.__data.dtype == np.dtype(dtype), \
+                "The existing PSD chunk does not match the grid; use resume=False to start over."
+        else:
+            self.__data = np.lib.format.open_memmap(self.__chunk_path, mode='w+', dtype=dtype, shape=shape)
+            self.__progress = np.lib.format.open_memmap(self.__progress_path, mode='w+', dtype=np.bool_,
+                                                        shape=shape[:2])
+            self.__progress[:] = False
+            self.__progress.flush()
+        self.__resumed = bool(resumable)
+        pass
+
+    def write_sweep(self,
+                    id_y: int,
+                    id_x: int,
+                    psd: np.ndarray,
+                    freq: Optional[np.ndarray] = None
+                    ) -> None:
+        if self.__keep_idx is not None:
+            assert len(psd) == self.__bins, "The sweep does not match 'bins'."
+            psd = psd[self.__keep_idx]
+            freq = None if freq is None else np.asarray(freq)[self.__keep_idx]
+        self.__data[id_y, id_x] = psd
+        if freq is not None and not os.path.exists(self.__freq_path):
+            np.save(self.__freq_path, freq)
+        self.__pending.append((id_y, id_x))
+        if len(self.__pending) >= self.__flush_every:
+            self.flush()
+        pass
+
+    def write_metadata(self, metadata: dict) -> None:
+        write_psd_chunk_metadata(self.__dataset_path, metadata)
+        pass
+
+    def flush(self) -> None:
+        if not self.__pending:
+            return
+        self.__flush_pending_rows()
+        for id_y, id_x in self.__pending:
+            self.__progress[id_y, id_x] = True
+        self.__progress.flush()
+        self.__pending = []
+        pass
+
+    def __flush_pending_rows(self) -> None:
+        # Syncs only the bytes of the pending sweeps (one contiguous range of Y x X rows), not the whole mapping.
+        mm = getattr(self.__data, '_mmap', None)
+        if mm is None:
+            self.__data.flush()
+            return
+        x_div = self.__data.shape[1]
+        row_nbytes = self.__data.shape[2] * self.__data.dtype.itemsize
+        row_ids = [id_y * x_div + id_x for id_y, id_x in self.__pending]
+        # The mapping starts at the header offset aligned down to the allocation granularity.
+        base = self.__data.offset % mmap.ALLOCATIONGRANULARITY
+        start = base + min(row_ids) * row_nbytes
+        stop = base + (max(row_ids) + 1) * row_nbytes
+        start -= start % mmap.ALLOCATIONGRANULARITY
+        mm.flush(start, stop - start)
+        pass
+
+    def is_completed(self, id_y: int, id_x: int) -> bool:
+        return bool(self.__progress[id_y, id_x])
+
+    def read_sweep(self, id_y: int, id_x: int) -> np.ndarray:
+        # A stored sweep on the full 'bins' axis (narrowband mode: NaN outside 'keep_idx').
+        psd = np.array(self.__data[id_y, id_x])
+        if self.__keep_idx is None:
+            return psd
+        r = np.full(self.__bins, np.nan, dtype=psd.dtype)
+        r[self.__keep_idx] = psd
+        return r
+
+    def finalize(self,
+                 rotate_90d: int = 0,
+                 metadata: Optional[dict] = None
+                 ) -> None:
+        # Rotation (if any) is done row-blockwise into a new file, so memory stays bounded.
+        self.flush()
+        if rotate_90d % 4 != 0:
+            rotated = np.rot90(self.__data, k=rotate_90d, axes=(0, 1))
+            tmp_path = self.__chunk_path + '.tmp.npy'
+            out = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=self.__data.dtype, shape=rotated.shape)
+            for y in range(rotated.shape[0]):
+                out[y] = rotated[y]
+            out.flush()
+            del out, rotated
+            self.__data = None
+            os.replace(tmp_path, self.__chunk_path)
+        if metadata is not None:
+            self.write_metadata(metadata)
+        self.close()
+        if os.path.exists(self.__progress_path):
+            os.remove(self.__progress_path)
+        pass
+
+    def close(self) -> None:
+        if self.__data is not None:
+            self.flush()
+        self.__data = None
+        self.__progress = None
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        pass
+
+    @property
+    def completion_map(self) -> np.ndarray:
+        return np.array(self.__progress)
+
+    @property
+    def n_completed(self) -> int:
+        return int(np.sum(self.__progress))
+
+    @property
+    def resumed(self) -> bool:
+        return self.__resumed
+
+    @property
+    def dataset_path(self) -> str:
+        return self.__dataset_path
+    pass
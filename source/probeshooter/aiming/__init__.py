@@ -22,3 +22,7 @@ from .aiming import *
 from .coord_converter import *
 from .filter import *
 from .finder import *
+from .clustering import *
+from .batch import *
+from .result import *
+from .sweep import *
@@ -19,8 +19,8 @@
 #  SOFTWARE.
 
 import numpy as np
-from typing import Union
-from sklearn.cluster import DBSCAN
+from typing import Union, Optional
+from .clustering import cluster_points
 
 
 __all__ = [
@@ -32,11 +32,19 @@ def aim_points_extraction(combined_leakage_map_2d: np.ndarray,
                           hump_mask_xy_list: np.ndarray,
                           top_n: Union[int, float] = 0.05,
                           dbscan_min_samples: int = 5,
-                          dbscan_eps: float = 1.5
+                          dbscan_eps: float = 1.5,
+                          clustering_backend: str = 'auto',
+                          hump_labels: Optional[np.ndarray] = None
                           ) -> dict:
+    # clustering_backend: 'dbscan' (sklearn), 'grid' (labels identical to DBSCAN on grid points, see
+    # 'grid_dbscan') or 'auto' (grid whenever applicable). hump_labels: 'cluster_points' labels of
+    # 'hump_mask_xy_list' computed beforehand with the same eps/min_samples (e.g., reused across top_n).
     result = {}
-    model = DBSCAN(metric='euclidean', min_samples=dbscan_min_samples, eps=dbscan_eps)
-    label_pre_c = model.fit_predict(hump_mask_xy_list)
+    if hump_labels is None:
+        label_pre_c = cluster_points(hump_mask_xy_list, dbscan_eps, dbscan_min_samples, clustering_backend)
+    else:
+        assert len(hump_labels) == len(hump_mask_xy_list)
+        label_pre_c = np.asarray(hump_labels)
     unique_labels, unique_counts = np.unique(label_pre_c, return_counts=True)
     result['cluster_cnt'] = len(unique_labels)
 
@@ -51,7 +59,7 @@ def aim_points_extraction(combined_leakage_map_2d: np.ndarray,
         if uniq_l == -1:
             continue
         cluster_loc_xy_list = hump_mask_xy_list[label_pre_c == uniq_l]
-        cluster_val_list = np.array([combined_leakage_map_2d[y, x] for x, y in cluster_loc_xy_list])
+        cluster_val_list = np.asarray(combined_leakage_map_2d)[cluster_loc_xy_list[:, 1], cluster_loc_xy_list[:, 0]]
 
         all_cluster_loc_xy_list.append(cluster_loc_xy_list)
         all_cluster_val_list.append(cluster_val_list)
@@ -68,8 +76,7 @@ def aim_points_extraction(combined_leakage_map_2d: np.ndarray,
         all_cluster_top_n_val_list.append(cluster_val_list[sorted_idx[:_top_n]])
 
     for xy_list, val_list in zip(all_cluster_top_n_loc_xy_list, all_cluster_top_n_val_list):
-        m = DBSCAN(metric='euclidean', min_samples=dbscan_min_samples, eps=dbscan_eps)
-        label_pre_c = m.fit_predict(xy_list)
+        label_pre_c = cluster_points(xy_list, dbscan_eps, dbscan_min_samples, clustering_backend)
         unique_labels, unique_counts = np.unique(label_pre_c, return_counts=True)
         if len(unique_labels) != 1:
             max_idx = np.argmax(unique_counts)
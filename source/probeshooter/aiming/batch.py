@@ -0,0 +1,133 @@
+#  Copyright (c) 2025 Daehyeon Bae
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+import numpy as np
+from typing import Union, Optional, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from .aiming import aim_points_extraction
+from .finder import calc_top_n_percentile_index, calc_top_n_percentile_values_approx
+from .result import AimResult
+
+
+__all__ = [
+    'AIM_TABLE_DTYPE',
+    'calc_top_n_percentile_values_batch',
+    'aim_points_extraction_batch'
+]
+
+
+# One row per aim point; maps without any cluster have no rows.
+AIM_TABLE_DTYPE = np.dtype([
+    ('map_id', np.int32),
+    ('rank', np.int16),          # cluster rank by confidence (0: most confident)
+    ('x', np.float64),
+    ('y', np.float64),
+    ('confidence', np.float64),
+    ('cluster_size', np.int32),  # points of the cluster (above the threshold)
+    ('threshold', np.float64),
+    ('percentile', np.float64),
+    ('top_n', np.float64)
+])
+
+
+def calc_top_n_percentile_values_batch(maps: np.ndarray,
+                                       percentiles: Union[float, Sequence[float], np.ndarray],
+                                       approx: bool = False,
+                                       n_bins: int = 4096
+                                       ) -> np.ndarray:
+    # 'calc_top_n_percentile_value' of every map of a K x Y x X stack: one selection per distinct percentile over
+    # all maps sharing it, or the histogram approximation ('calc_top_n_percentile_values_approx') with approx=True.
+    maps = np.asarray(maps)
+    n_maps = maps.shape[0]
+    percentiles = np.broadcast_to(np.asarray(percentiles, dtype=np.float64), (n_maps, ))
+    assert np.all((0 <= percentiles) & (percentiles <= 1))
+    if approx:
+        return calc_top_n_percentile_values_approx(maps, percentiles, n_bins)
+    flat = maps.reshape(n_maps, -1)
+    idx = calc_top_n_percentile_index(flat.shape[1], percentiles)
+    r = np.empty(n_maps, dtype=np.float64)
+    for k in np.unique(idx):
+        rows = idx == k
+        r[rows] = np.partition(flat[rows], k, axis=1)[:, k]
+    return r
+
+
+def _aim_single(args) -> Optional[dict]:
+    m, threshold, top_n, dbscan_min_samples, dbscan_eps, clustering_backend = args
+    humps_mask_xy_list = np.argwhere(m >= threshold)[:, [1, 0]]
+    if len(humps_mask_xy_list) == 0:
+        return None
+    return aim_points_extraction(combined_leakage_map_2d=m, hump_mask_xy_list=humps_mask_xy_list, top_n=top_n,
+                                 dbscan_min_samples=dbscan_min_samples, dbscan_eps=dbscan_eps,
+                                 clustering_backend=clustering_backend)
+
+
+def aim_points_extraction_batch(maps: Union[np.ndarray, Sequence[np.ndarray]],
+                                percentiles: Union[float, Sequence[float], np.ndarray] = 0.9,
+                                top_n: Union[int, float, Sequence, np.ndarray] = 0.05,
+                                dbscan_min_samples: int = 5,
+                                dbscan_eps: float = 1.5,
+                                clustering_backend: str = 'auto',
+                                n_workers: Optional[int] = None,
+                                return_full: bool = False,
+                                full_as_aim_result: bool = False
+                                ) -> Union[np.ndarray, tuple]:
+    # 'find_top_n_percent_loc_2d' + 'aim_points_extraction' for a stack (K x Y x X, or a list) of maps with
+    # per-map (or shared) percentiles and top_n. Thresholds are computed for the whole stack at once; clustering
+    # runs per map, on a process pool with n_workers > 1. Returns the result table (AIM_TABLE_DTYPE), and the list
+    # of per-map result dicts (None for a map without any hump point) with return_full=True; one AimResult
+    # (one run per map) instead with full_as_aim_result=True (implies return_full).
+    same_shape = not isinstance(maps, (list, tuple)) or len({np.shape(m) for m in maps}) == 1
+    n_maps = len(maps)
+    percentiles = np.broadcast_to(np.asarray(percentiles, dtype=np.float64), (n_maps, ))
+    # Each top_n is passed as given (an int stays an int) and checked with the rule of 'aim_points_extraction'.
+    top_n = list(top_n) if np.ndim(top_n) > 0 else [top_n] * n_maps
+    assert len(top_n) == n_maps, "'top_n' does not match the number of maps."
+    for t in top_n:
+        assert 0 < t < 1 or 5 <= t, f"Invalid 'top_n' ({t}); a fraction (0 < top_n < 1) or at least 5."
+    if same_shape:
+        maps = np.asarray(maps)
+        thresholds = calc_top_n_percentile_values_batch(maps, percentiles)
+    else:
+        thresholds = np.array([calc_top_n_percentile_values_batch(np.asarray(m)[np.newaxis], p)[0]
+                               for m, p in zip(maps, percentiles)])
+    tasks = [(np.asarray(maps[k]), thresholds[k], top_n[k], dbscan_min_samples, dbscan_eps, clustering_backend)
+             for k in range(n_maps)]
+    if n_workers is not None and n_workers > 1:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            results = list(executor.map(_aim_single, tasks, chunksize=max(n_maps // (4 * n_workers), 1)))
+    else:
+        results = [_aim_single(t) for t in tasks]
+
+    rows = []
+    for k, r in enumerate(results):
+        if r is None:
+            continue
+        for rank, (pt, confidence, cluster_pts) in enumerate(zip(r['final_pt_xy'], r['each_cluster_confidence'],
+                                                                 r['each_cluster_pt_xy'])):
+            rows.append((k, rank, pt[0], pt[1], confidence, len(cluster_pts), thresholds[k], percentiles[k],
+                         top_n[k]))
+        pass
+    table = np.array(rows, dtype=AIM_TABLE_DTYPE)
+    if return_full or full_as_aim_result:
+        if full_as_aim_result:
+            return table, AimResult.concatenate([AimResult.from_dict(r) for r in results])
+        return table, results
+    return table
@@ -0,0 +1,106 @@
+#  Copyright (c) 2025 Daehyeon Bae
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+import numpy as np
+from typing import Union
+from sklearn.cluster import DBSCAN
+from scipy.ndimage import correlate, label, minimum_filter, generate_binary_structure
+
+
+__all__ = [
+    'grid_dbscan',
+    'cluster_points'
+]
+
+
+def _grid_footprint(eps: float) -> Union[np.ndarray, None]:
+    # Integer points within 'eps' (euclidean): 4-neighbourhood for 1 <= eps < sqrt(2), 8-neighbourhood for
+    # sqrt(2) <= eps < 2. Other radii are not a fixed 3 x 3 footprint.
+    if 1 <= eps < np.sqrt(2):
+        return generate_binary_structure(2, 1)
+    if np.sqrt(2) <= eps < 2:
+        return generate_binary_structure(2, 2)
+    return None
+
+
+def grid_dbscan(points_xy: np.ndarray,
+                eps: float = 1.5,
+                min_samples: int = 5
+                ) -> np.ndarray:
+    # DBSCAN on distinct integer grid points, on the rasterized point mask: neighbour counts by one correlation,
+    # clusters as connected components of the core points, and border points given the lowest cluster label
+    # among their core neighbours. Labels (numbering included) are identical to sklearn's DBSCAN, which numbers
+    # clusters in the order of their first core point and lets the first cluster claim a shared border point.
+    points_xy = np.asarray(points_xy)
+    footprint = _grid_footprint(eps)
+    assert footprint is not None, "'eps' must be in [1, 2) for the grid backend."
+    n = len(points_xy)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    assert np.issubdtype(points_xy.dtype, np.integer) or np.all(np.mod(points_xy, 1) == 0), \
+        "The grid backend requires integral points."
+    pts = points_xy.astype(np.int64)
+    x, y = pts[:, 0] - pts[:, 0].min(), pts[:, 1] - pts[:, 1].min()
+    grid_shape = (int(y.max()) + 1, int(x.max()) + 1)
+    occupancy = np.zeros(grid_shape, dtype=np.int32)
+    occupancy[y, x] = 1
+    assert np.count_nonzero(occupancy) == n, "The grid backend requires distinct points."
+    neighbour_count = correlate(occupancy, footprint.astype(np.int32), mode='constant', cval=0)[y, x]
+    is_core = neighbour_count >= min_samples
+
+    core_mask = np.zeros(grid_shape, dtype=np.bool_)
+    core_mask[y[is_core], x[is_core]] = True
+    component_grid, n_components = label(core_mask, structure=footprint)
+    labels = np.full(n, -1, dtype=np.int64)
+    if n_components == 0:
+        return labels
+    # Renumber the components by the index of their first core point.
+    core_idx = np.nonzero(is_core)[0]
+    core_component = component_grid[y[core_idx], x[core_idx]] - 1
+    first_idx = np.full(n_components, n, dtype=np.int64)
+    np.minimum.at(first_idx, core_component, core_idx)
+    renumber = np.empty(n_components, dtype=np.int64)
+    renumber[np.argsort(first_idx, kind='stable')] = np.arange(n_components)
+    labels[core_idx] = renumber[core_component]
+
+    label_grid = np.full(grid_shape, n_components, dtype=np.int64)
+    label_grid[y[core_idx], x[core_idx]] = labels[core_idx]
+    nearest_label = minimum_filter(label_grid, footprint=footprint, mode='constant', cval=n_components)[y, x]
+    border = ~is_core & (nearest_label < n_components)
+    labels[border] = nearest_label[border]
+    return labels
+
+
+def cluster_points(points_xy: np.ndarray,
+                   eps: float = 1.5,
+                   min_samples: int = 5,
+                   backend: str = 'auto'
+                   ) -> np.ndarray:
+    # backend: 'dbscan' (sklearn), 'grid' ('grid_dbscan') or 'auto' (grid if the points are distinct integers and
+    # 'eps' allows it, else sklearn).
+    assert backend in ['auto', 'grid', 'dbscan'], "Not supported 'backend'."
+    points_xy = np.asarray(points_xy)
+    if backend == 'auto':
+        use_grid = _grid_footprint(eps) is not None and len(points_xy) > 0 and \
+            np.all(np.mod(points_xy, 1) == 0) and len(np.unique(points_xy, axis=0)) == len(points_xy)
+        backend = 'grid' if use_grid else 'dbscan'
+    if backend == 'grid':
+        return grid_dbscan(points_xy, eps, min_samples)
+    return DBSCAN(metric='euclidean', min_samples=min_samples, eps=eps).fit_predict(points_xy)
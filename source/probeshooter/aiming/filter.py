@@ -25,8 +25,10 @@
 #  copies of the Software, and to permit persons to whom the Software is
 #  furnished to do so, subject to the following conditions:
 
+import os
 import numpy as np
-from typing import Union
+from typing import Union, Optional
+from concurrent.futures import ThreadPoolExecutor
 from scipy.ndimage import minimum_filter1d, maximum_filter1d, uniform_filter1d, median_filter
 from scipy.ndimage import minimum_filter, maximum_filter, uniform_filter
 
@@ -35,6 +37,7 @@ __all__ = [
     'convert_1d_filter_size_from_freq',
     'simple_1d_filter',
     'simple_2d_filter',
+    'simple_2d_filter_stack',
     'get_2d_binary_mask_from_pts'
 ]
 
@@ -90,10 +93,51 @@ def simple_2d_filter(target_2d_arr: np.ndarray,
     pass
 
 
+def simple_2d_filter_stack(target_3d_arr: np.ndarray,
+                           filter_type: str,
+                           filter_size_xy: (int, int),
+                           padding_mode: str = 'nearest',
+                           block_bins: int = 256,
+                           n_workers: Optional[int] = None,
+                           out: Optional[np.ndarray] = None,
+                           verbose: bool = False
+                           ) -> np.ndarray:
+    # Applies 'simple_2d_filter' to every Y x X plane of a Y x X x F stack. Each block of planes is filtered by a
+    # single 3D call whose footprint is 1 along the last axis (identical result), and blocks run on a thread pool
+    # (the scipy.ndimage kernels release the GIL). 'out' may be a memory-mapped array.
+    assert filter_type in ['min', 'median', 'max', 'mean'], "Not supported 'filter_type'."
+    assert target_3d_arr.ndim == 3
+    if out is None:
+        out = np.empty_like(target_3d_arr)
+    assert out.shape == target_3d_arr.shape
+    size = (filter_size_xy[1], filter_size_xy[0], 1)
+    filter_func = {'min': minimum_filter, 'max': maximum_filter,
+                   'mean': uniform_filter, 'median': median_filter}[filter_type]
+    n_bins = target_3d_arr.shape[2]
+
+    def _filter_block(f_start):
+        f_stop = min(f_start + block_bins, n_bins)
+        out[:, :, f_start:f_stop] = filter_func(np.asarray(target_3d_arr[:, :, f_start:f_stop]), size,
+                                                mode=padding_mode)
+        return f_stop - f_start
+
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    done = 0
+    with ThreadPoolExecutor(max_workers=max(n_workers, 1)) as executor:
+        for n_done in executor.map(_filter_block, range(0, n_bins, block_bins)):
+            done += n_done
+            if verbose:
+                print(f"{done}/{n_bins} Completed.")
+            pass
+    return out
+
+
 def get_2d_binary_mask_from_pts(reference_2d_arr: np.ndarray,
                                 points_xy_list: Union[np.ndarray, list, tuple]
                                 ) -> np.ndarray:
     r = np.zeros_like(reference_2d_arr, dtype=np.bool_)
-    for x, y in points_xy_list:
-        r[y, x] = True
+    points_xy_list = np.asarray(points_xy_list).reshape(-1, 2)
+    if len(points_xy_list) > 0:
+        r[points_xy_list[:, 1], points_xy_list[:, 0]] = True
     return r
@@ -24,24 +24,148 @@ from typing import Union, Optional
 
 
 __all__ = [
+    'calc_top_n_percentile_index',
     'calc_top_n_percentile_value',
+    'calc_top_n_percentile_values',
+    'calc_top_n_percentile_values_approx',
+    'PercentileHistogram',
     'calc_n_percent_value_of_global_maxima',
     'find_local_maxima_loc_2d',
-    'find_top_n_percent_loc_2d'
+    'find_top_n_percent_loc_2d',
+    'find_top_n_percent_masks_2d'
 ]
 
 
+def calc_top_n_percentile_index(n: int,
+                                percentile: Union[float, np.ndarray]
+                                ) -> Union[int, np.ndarray]:
+    # Index into the ascending values: ceil(percentile * n), clamped so that percentile=1 is the maximum.
+    assert n > 0
+    idx = np.minimum(np.ceil(np.asarray(percentile, dtype=np.float64) * n).astype(np.int64), n - 1)
+    return int(idx) if idx.ndim == 0 else idx
+
+
 def calc_top_n_percentile_value(target_arr: np.ndarray,
                                 percentile: float
                                 ) -> Union[float, int]:
     assert 0 <= percentile <= 1
-    flat_arr = target_arr.flatten()
-    sorted_flat_arr = np.sort(flat_arr)
-    top_n_percentile_index = int(np.ceil((percentile * len(sorted_flat_arr))))
-    closest_value = sorted_flat_arr[top_n_percentile_index]
+    flat_arr = np.ravel(target_arr)
+    top_n_percentile_index = calc_top_n_percentile_index(len(flat_arr), percentile)
+    # Selection (O(n)) instead of a full sort.
+    closest_value = np.partition(flat_arr, top_n_percentile_index)[top_n_percentile_index]
     return float(closest_value)
 
 
+def calc_top_n_percentile_values(target_arr: np.ndarray,
+                                 percentiles: Union[list, tuple, np.ndarray]
+                                 ) -> np.ndarray:
+    # 'calc_top_n_percentile_value' of many percentiles by one multi-selection over the array.
+    percentiles = np.asarray(percentiles, dtype=np.float64)
+    assert np.all((0 <= percentiles) & (percentiles <= 1))
+    flat_arr = np.ravel(target_arr)
+    idx = calc_top_n_percentile_index(len(flat_arr), percentiles)
+    return np.partition(flat_arr, np.unique(idx))[idx].astype(np.float64)
+
+
+def calc_top_n_percentile_values_approx(target_arr: np.ndarray,
+                                        percentiles: Union[float, list, tuple, np.ndarray],
+                                        n_bins: int = 4096,
+                                        block_maps: int = 256
+                                        ) -> np.ndarray:
+    # Histogram-based 'calc_top_n_percentile_value' of every map of a K x ... stack (may be memory-mapped), with
+    # per-map (or shared) percentiles. Each map gets 'n_bins' bins over its own [min, max] and the value is
+    # interpolated within the bin, so the error is below (max - min) / n_bins. Memory is bounded by 'block_maps'.
+    n_maps = target_arr.shape[0]
+    percentiles = np.broadcast_to(np.asarray(percentiles, dtype=np.float64), (n_maps, ))
+    assert np.all((0 <= percentiles) & (percentiles <= 1))
+    r = np.empty(n_maps, dtype=np.float64)
+    for m_start in range(0, n_maps, block_maps):
+        m_stop = min(m_start + block_maps, n_maps)
+        flat = np.asarray(target_arr[m_start:m_stop]).reshape(m_stop - m_start, -1)
+        n_block, n = flat.shape
+        lower, upper = flat.min(axis=1), flat.max(axis=1)
+        width = (upper.astype(np.float64) - lower) / n_bins
+        scale = np.where(width > 0, 1 / np.where(width > 0, width, 1), 0)
+        bin_idx = np.subtract(flat, lower[:, np.newaxis], dtype=np.float64)
+        bin_idx *= scale[:, np.newaxis]
+        bin_idx = np.minimum(bin_idx.astype(np.intp), n_bins - 1)
+        bin_idx += np.arange(n_block)[:, np.newaxis] * n_bins
+        counts = np.bincount(bin_idx.ravel(), minlength=n_block * n_bins).reshape(n_block, n_bins)
+        cum_counts = np.cumsum(counts, axis=1)
+        k = calc_top_n_percentile_index(n, percentiles[m_start:m_stop])
+        b = np.count_nonzero(cum_counts <= k[:, np.newaxis], axis=1)
+        rows = np.arange(n_block)
+        below = cum_counts[rows, b] - counts[rows, b]
+        r[m_start:m_stop] = np.clip(lower + (b + (k - below + 0.5) / counts[rows, b]) * width, lower, upper)
+        pass
+    return r
+
+
+class PercentileHistogram:
+    # Streaming (approximate) 'calc_top_n_percentile_value' over all values seen by 'update', in fixed memory.
+    # Values outside [lower, upper] are counted in the edge bins.
+    def __init__(self,
+                 lower: Union[float, int],
+                 upper: Union[float, int],
+                 n_bins: int = 4096):
+        assert lower < upper and n_bins > 0
+        self.__edges = np.linspace(lower, upper, n_bins + 1)
+        self.__counts = np.zeros(n_bins, dtype=np.int64)
+        self.__min = np.inf
+        self.__max = -np.inf
+        pass
+
+    def update(self, values: Union[float, np.ndarray]) -> None:
+        values = np.ravel(values)
+        if len(values) == 0:
+            return
+        n_bins = len(self.__counts)
+        bin_idx = np.clip(np.searchsorted(self.__edges, values, side='right') - 1, 0, n_bins - 1)
+        self.__counts += np.bincount(bin_idx, minlength=n_bins)
+        self.__min = min(self.__min, float(values.min()))
+        self.__max = max(self.__max, float(values.max()))
+        pass
+
+    def merge(self, other: 'PercentileHistogram') -> None:
+        assert np.array_equal(self.__edges, other.edges)
+        self.__counts += other.counts
+        self.__min = min(self.__min, other.min)
+        self.__max = max(self.__max, other.max)
+        pass
+
+    def value(self, percentile: Union[float, np.ndarray]) -> Union[float, np.ndarray]:
+        assert self.count > 0
+        assert np.all((0 <= np.asarray(percentile)) & (np.asarray(percentile) <= 1))
+        cum_counts = np.cumsum(self.__counts)
+        k = calc_top_n_percentile_index(self.count, percentile)
+        b = np.searchsorted(cum_counts, k, side='right')
+        below = cum_counts[b] - self.__counts[b]
+        r = self.__edges[b] + (k - below + 0.5) / self.__counts[b] * (self.__edges[b + 1] - self.__edges[b])
+        r = np.clip(r, self.__min, self.__max)
+        return float(r) if np.ndim(r) == 0 else r
+
+    @property
+    def count(self) -> int:
+        return int(self.__counts.sum())
+
+    @property
+    def counts(self) -> np.ndarray:
+        return self.__counts
+
+    @property
+    def edges(self) -> np.ndarray:
+        return self.__edges
+
+    @property
+    def min(self) -> float:
+        return self.__min
+
+    @property
+    def max(self) -> float:
+        return self.__max
+    pass
+
+
 def calc_n_percent_value_of_global_maxima(target_arr: np.ndarray,
                                           percent: float
                                           ) -> Union[float, int]:
@@ -68,3 +192,11 @@ def find_top_n_percent_loc_2d(target_arr: np.ndarray,
                               ) -> np.ndarray:
     top_n_percentile_index = calc_top_n_percentile_value(target_arr, percentile)
     return np.argwhere(target_arr >= top_n_percentile_index)[:, [1, 0]]
+
+
+def find_top_n_percent_masks_2d(target_arr: np.ndarray,
+                                percentiles: Union[list, tuple, np.ndarray]
+                                ) -> (np.ndarray, np.ndarray):
+    # Thresholds (P) and masks (P x Y x X) of many percentiles; the mask of each is 'find_top_n_percent_loc_2d'.
+    thresholds = calc_top_n_percentile_values(target_arr, percentiles)
+    return thresholds, np.asarray(target_arr)[np.newaxis] >= thresholds[:, np.newaxis, np.newaxis]
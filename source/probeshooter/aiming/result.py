@@ -0,0 +1,194 @@
+#  Copyright (c) 2025 Daehyeon Bae
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+import numpy as np
+from typing import Union, Optional, Sequence
+
+
+__all__ = [
+    'AIM_RESULT_LEVELS',
+    'AimResult'
+]
+
+
+# Point sets of 'aim_points_extraction', per cluster: all points above the threshold, the top-n points, and the
+# top-n points after the second clustering.
+AIM_RESULT_LEVELS = {
+    'pt': ('each_cluster_pt_xy', 'each_cluster_pt_val'),
+    'top_n': ('each_cluster_top_n_pt_xy', 'each_cluster_top_n_pt_val'),
+    'top_n_filtered': ('each_cluster_top_n_pt_xy_filtered', 'each_cluster_top_n_pt_val_filtered')
+}
+
+
+class AimResult:
+    # Array-backed aiming results of one or more runs (maps). Per level, the points of all clusters of all runs
+    # are stored flat (xy: N x 2, val: N) with CSR offsets per cluster (n_clusters + 1); clusters are assigned to
+    # runs by 'run_offsets' (n_runs + 1). Clusters keep the confidence order of 'aim_points_extraction', and the
+    # points keep the dtypes of the source result (e.g., int64 xy from np.argwhere, values in the map dtype).
+    def __init__(self,
+                 final_pt_xy: np.ndarray,
+                 confidence: np.ndarray,
+                 run_offsets: np.ndarray,
+                 points: dict,
+                 cluster_cnt: np.ndarray):
+        self.final_pt_xy = np.asarray(final_pt_xy, dtype=np.float64).reshape(-1, 2)
+        self.confidence = np.asarray(confidence, dtype=np.float64)
+        self.run_offsets = np.asarray(run_offsets, dtype=np.int64)
+        # level -> (xy, val, offsets)
+        self.points = points
+        self.cluster_cnt = np.asarray(cluster_cnt, dtype=np.int64)
+        pass
+
+    @classmethod
+    def from_dict(cls, result_dict: Optional[dict]) -> 'AimResult':
+        # From the result dict of 'aim_points_extraction'; None (no hump point) results in a run without clusters.
+        if result_dict is None:
+            result_dict = {'final_pt_xy': [], 'each_cluster_confidence': [], 'cluster_cnt': 0}
+            result_dict.update({key: [] for keys in AIM_RESULT_LEVELS.values() for key in keys})
+        n_clusters = len(result_dict['final_pt_xy'])
+        points = {}
+        for level, (xy_key, val_key) in AIM_RESULT_LEVELS.items():
+            lengths = [len(xy) for xy in result_dict[xy_key]]
+            offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+            xy = _concatenate([np.asarray(xy).reshape(-1, 2) for xy in result_dict[xy_key]],
+                              np.zeros((0, 2), dtype=np.int64))
+            val = _concatenate([np.asarray(v) for v in result_dict[val_key]], np.zeros(0, dtype=np.float64))
+            points[level] = (xy, val, offsets)
+            pass
+        return cls(np.array(result_dict['final_pt_xy']).reshape(-1, 2), result_dict['each_cluster_confidence'],
+                   np.array([0, n_clusters]), points, [result_dict['cluster_cnt']])
+
+    def to_dict(self) -> dict:
+        # Back to the nested-list form of 'aim_points_extraction' (single run).
+        assert len(self) == 1, "Select a run first, e.g., results[i]."
+        r = {'cluster_cnt': int(self.cluster_cnt[0]), 'each_cluster_confidence': self.confidence}
+        for level, (xy_key, val_key) in AIM_RESULT_LEVELS.items():
+            xy, val, offsets = self.points[level]
+            r[xy_key] = np.split(xy, offsets[1:-1]) if self.n_clusters > 0 else []
+            r[val_key] = np.split(val, offsets[1:-1]) if self.n_clusters > 0 else []
+        r['final_pt_xy'] = list(self.final_pt_xy)
+        return r
+
+    @classmethod
+    def concatenate(cls, results: Sequence['AimResult']) -> 'AimResult':
+        # O(total size): arrays are concatenated once and the offsets shifted.
+        results = list(results)
+        assert len(results) > 0
+        run_offsets = [np.zeros(1, dtype=np.int64)]
+        cluster_base = 0
+        points = {}
+        for level in AIM_RESULT_LEVELS:
+            point_base = 0
+            level_offsets = [np.zeros(1, dtype=np.int64)]
+            for r in results:
+                offsets = r.points[level][2]
+                level_offsets.append(offsets[1:] + point_base)
+                point_base += offsets[-1]
+            points[level] = (_concatenate([r.points[level][0] for r in results]),
+                             _concatenate([r.points[level][1] for r in results]),
+                             np.concatenate(level_offsets))
+            pass
+        for r in results:
+            run_offsets.append(r.run_offsets[1:] + cluster_base)
+            cluster_base += r.n_clusters
+        return cls(np.concatenate([r.final_pt_xy for r in results]),
+                   np.concatenate([r.confidence for r in results]),
+                   np.concatenate(run_offsets), points,
+                   np.concatenate([r.cluster_cnt for r in results]))
+
+    def __getitem__(self, run_idx: int) -> 'AimResult':
+        # Single run (zero-copy slices).
+        n_runs = len(self)
+        if run_idx < 0:
+            run_idx += n_runs
+        assert 0 <= run_idx < n_runs
+        c_start, c_stop = self.run_offsets[run_idx], self.run_offsets[run_idx + 1]
+        points = {}
+        for level, (xy, val, offsets) in self.points.items():
+            p_start, p_stop = offsets[c_start], offsets[c_stop]
+            points[level] = (xy[p_start:p_stop], val[p_start:p_stop], offsets[c_start:c_stop + 1] - p_start)
+        return AimResult(self.final_pt_xy[c_start:c_stop], self.confidence[c_start:c_stop],
+                         np.array([0, c_stop - c_start]), points, self.cluster_cnt[run_idx:run_idx + 1])
+
+    def __len__(self):
+        return len(self.run_offsets) - 1
+
+    def cluster_ids(self, level: str = 'pt') -> np.ndarray:
+        # Cluster index (within the run, i.e., the rank) of every point of the level.
+        offsets = self.points[level][2]
+        global_ids = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+        return global_ids - self.run_offsets[self.run_ids()][global_ids]
+
+    def run_ids(self, level: str = None) -> np.ndarray:
+        # Run index of every cluster (level=None) or of every point of the level.
+        cluster_run = np.repeat(np.arange(len(self)), np.diff(self.run_offsets))
+        if level is None:
+            return cluster_run
+        return cluster_run[np.repeat(np.arange(self.n_clusters), np.diff(self.points[level][2]))]
+
+    def rasterize(self,
+                  shape: (int, int),
+                  level: str = 'pt',
+                  run_idx: int = 0,
+                  value: Union[bool, int, float, None] = True
+                  ) -> np.ndarray:
+        # Mask (or map of 'value'; value=None: cluster rank + 1) of the points of one run, without a per-point loop.
+        r = self[run_idx] if len(self) > 1 else self
+        xy, _, _ = r.points[level]
+        if value is None:
+            out = np.zeros(shape, dtype=np.int32)
+            out[xy[:, 1], xy[:, 0]] = r.cluster_ids(level) + 1
+        else:
+            out = np.zeros(shape, dtype=np.asarray(value).dtype)
+            out[xy[:, 1], xy[:, 0]] = value
+        return out
+
+    def save(self, path: str) -> None:
+        arrays = {'final_pt_xy': self.final_pt_xy, 'confidence': self.confidence, 'run_offsets': self.run_offsets,
+                  'cluster_cnt': self.cluster_cnt}
+        for level, (xy, val, offsets) in self.points.items():
+            arrays[f'{level}_xy'] = xy
+            arrays[f'{level}_val'] = val
+            arrays[f'{level}_offsets'] = offsets
+        np.savez_compressed(path, **arrays)
+        pass
+
+    @classmethod
+    def load(cls, path: str) -> 'AimResult':
+        with np.load(path) as f:
+            points = {level: (f[f'{level}_xy'], f[f'{level}_val'], f[f'{level}_offsets'])
+                      for level in AIM_RESULT_LEVELS}
+            return cls(f['final_pt_xy'], f['confidence'], f['run_offsets'], points, f['cluster_cnt'])
+
+    @property
+    def n_clusters(self) -> int:
+        return int(self.run_offsets[-1])
+
+    def __repr__(self):
+        return f"AimResult(runs={len(self)}, clusters={self.n_clusters}, points={len(self.points['pt'][0])})"
+    pass
+
+
+def _concatenate(arrays: list, empty: Optional[np.ndarray] = None) -> np.ndarray:
+    # Empty parts (runs or clusters without points) do not take part, so they cannot promote the dtype.
+    non_empty = [a for a in arrays if len(a) > 0]
+    if non_empty:
+        return np.concatenate(non_empty)
+    return arrays[0] if empty is None else empty
@@ -0,0 +1,250 @@
+#  Copyright (c) 2025 Daehyeon Bae
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+import time
+import itertools
+import numpy as np
+from typing import Union, Optional, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from .aiming import aim_points_extraction
+from .clustering import cluster_points
+from .filter import simple_2d_filter
+from .finder import calc_top_n_percentile_index
+from .result import AimResult
+
+
+__all__ = [
+    'SWEEP_TABLE_DTYPE',
+    'AimingParameterSweep',
+    'calc_aim_point_stability'
+]
+
+
+# One row per configuration (filter chain x percentile x top_n x eps x min_samples). The time columns are the
+# stage costs actually paid for the configuration; a stage reused from the cache costs 0.
+SWEEP_TABLE_DTYPE = np.dtype([
+    ('config_id', np.int32),
+    ('filter_id', np.int32),         # index of 'filter_chains'
+    ('percentile', np.float64),
+    ('top_n', np.float64),
+    ('dbscan_eps', np.float64),
+    ('dbscan_min_samples', np.int32),
+    ('threshold', np.float64),
+    ('hump_pts', np.int32),          # points at or above the threshold (clustered or not)
+    ('n_clusters', np.int32),
+    ('x', np.float64),               # most confident aim point (NaN without any cluster)
+    ('y', np.float64),
+    ('confidence', np.float64),
+    ('stability', np.float64),       # fraction of the configurations aiming within 'stability_radius'
+    ('filter_s', np.float64),
+    ('threshold_s', np.float64),
+    ('cluster_s', np.float64),
+    ('aim_s', np.float64)
+])
+
+
+def _canonical_filter_chain(filter_chain) -> tuple:
+    # [('median', (3, 3)), ('mean', (5, 5))] -> hashable; an empty chain is the unfiltered map.
+    return tuple((str(filter_type), (int(size_xy[0]), int(size_xy[1]))) for filter_type, size_xy in filter_chain)
+
+
+def _sweep_group(args) -> (Optional[np.ndarray], int, float, list):
+    # One (filtered map, threshold, eps, min_samples): the first clustering once, then every top_n.
+    m, threshold, dbscan_eps, dbscan_min_samples, top_n_list, clustering_backend, labels = args
+    humps_mask_xy_list = np.argwhere(m >= threshold)[:, [1, 0]]
+    n_humps = len(humps_mask_xy_list)
+    cluster_s = 0.
+    if n_humps == 0:
+        return labels, n_humps, cluster_s, [(None, 0.) for _ in top_n_list]
+    if labels is None:
+        start_t = time.perf_counter()
+        labels = cluster_points(humps_mask_xy_list, dbscan_eps, dbscan_min_samples, clustering_backend)
+        cluster_s = time.perf_counter() - start_t
+    r = []
+    for top_n in top_n_list:
+        start_t = time.perf_counter()
+        result = aim_points_extraction(combined_leakage_map_2d=m, hump_mask_xy_list=humps_mask_xy_list, top_n=top_n,
+                                       dbscan_min_samples=dbscan_min_samples, dbscan_eps=dbscan_eps,
+                                       clustering_backend=clustering_backend, hump_labels=labels)
+        r.append((result, time.perf_counter() - start_t))
+    return labels, n_humps, cluster_s, r
+
+
+class AimingParameterSweep:
+    # Grid search over the aiming pipeline of one leakage map, tabulating the aim point, its stability and the
+    # stage costs of every configuration. Stages are shared by the configurations that only differ downstream of
+    # them: filtered maps per filter-chain prefix, the sorted values per filtered map (thresholds of all
+    # percentiles), the first clustering per (threshold, eps, min_samples) across top_n, and the result per
+    # configuration. A cold sweep is still dominated by the per-cluster clustering of 'aim_points_extraction'
+    # (it depends on top_n); the caches persist across 'run' calls, so reruns and extended grids are cheap.
+    def __init__(self,
+                 leakage_map_2d: np.ndarray,
+                 padding_mode: str = 'nearest',
+                 clustering_backend: str = 'auto'):
+        assert np.ndim(leakage_map_2d) == 2
+        self.__map = np.asarray(leakage_map_2d)
+        self.__padding_mode = padding_mode
+        self.__clustering_backend = clustering_backend
+        self.__filtered = {(): self.__map}
+        self.__sorted = {}
+        self.__labels = {}
+        self.__n_humps = {}
+        self.__results = {}
+        pass
+
+    def filtered_map(self, filter_chain: Sequence) -> np.ndarray:
+        return self.__filtered_map(_canonical_filter_chain(filter_chain))[0]
+
+    def threshold(self,
+                  filter_chain: Sequence,
+                  percentile: float
+                  ) -> float:
+        return self.__threshold(_canonical_filter_chain(filter_chain), percentile)[0]
+
+    def run(self,
+            filter_chains: Sequence[Sequence] = ((('median', (3, 3)), ('mean', (5, 5))), ),
+            percentiles: Union[float, Sequence[float]] = 0.75,
+            top_n: Union[int, float, Sequence[Union[int, float]]] = 0.03,
+            dbscan_eps: Union[float, Sequence[float]] = 1.5,
+            dbscan_min_samples: Union[int, Sequence[int]] = 5,
+            stability_radius: float = 2.0,
+            n_workers: Optional[int] = None,
+            return_results: bool = False,
+            verbose: bool = False
+            ) -> Union[np.ndarray, tuple]:
+        # Every combination of the given values (scalars are single values). Returns the table
+        # (SWEEP_TABLE_DTYPE), and an AimResult with one run per configuration with return_results=True.
+        chains = [_canonical_filter_chain(c) for c in filter_chains]
+        percentiles, eps_list, min_samples_list = \
+            [list(np.atleast_1d(v)) for v in (percentiles, dbscan_eps, dbscan_min_samples)]
+        # Each top_n is passed as given (an int stays an int) and checked with the rule of 'aim_points_extraction'.
+        top_n_list = list(top_n) if np.ndim(top_n) > 0 else [top_n]
+        for t in top_n_list:
+            assert 0 < t < 1 or 5 <= t, f"Invalid 'top_n' ({t}); a fraction (0 < top_n < 1) or at least 5."
+
+        # Filtering and thresholds (cheap, in this process); stage costs are charged to the first configuration
+        # using them.
+        configs = []
+        for filter_id, chain in enumerate(chains):
+            filter_s = self.__filtered_map(chain)[1]
+            for percentile in percentiles:
+                threshold, threshold_s = self.__threshold(chain, percentile)
+                for eps, min_samples, t in itertools.product(eps_list, min_samples_list, top_n_list):
+                    configs.append((filter_id, percentile, (chain, threshold, float(eps), int(min_samples)), t,
+                                    filter_s, threshold_s))
+                    filter_s, threshold_s = 0., 0.
+                pass
+
+        # Clustering and aiming of the configurations not in the cache, one task per distinct
+        # (filtered map, threshold, eps, min_samples)
+        missing = {}
+        for _, _, key, t, _, _ in configs:
+            if (key, t) not in self.__results:
+                missing.setdefault(key, []).append(t)
+        tasks = [(self.__filtered[key[0]], key[1], key[2], key[3], top_n_missing, self.__clustering_backend,
+                  self.__labels.get(key)) for key, top_n_missing in missing.items()]
+        if n_workers is not None and n_workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                outputs = list(executor.map(_sweep_group, tasks, chunksize=max(len(tasks) // (4 * n_workers), 1)))
+        else:
+            outputs = [_sweep_group(t) for t in tasks]
+        cluster_s_list, aim_s_list = {}, {}
+        for (key, top_n_missing), (labels, n_humps, cluster_s, r) in zip(missing.items(), outputs):
+            if labels is not None:
+                self.__labels[key] = labels
+            self.__n_humps[key] = n_humps
+            cluster_s_list[key] = cluster_s
+            for t, (result, aim_s) in zip(top_n_missing, r):
+                self.__results[(key, t)] = result
+                aim_s_list[(key, t)] = aim_s
+            pass
+
+        rows = []
+        results = []
+        for filter_id, percentile, key, t, filter_s, threshold_s in configs:
+            result = self.__results[(key, t)]
+            has_pt = result is not None and len(result['final_pt_xy']) > 0
+            x, y = result['final_pt_xy'][0] if has_pt else (np.nan, np.nan)
+            rows.append((len(rows), filter_id, percentile, t, key[2], key[3], key[1], self.__n_humps[key],
+                         0 if result is None else len(result['final_pt_xy']), x, y,
+                         result['each_cluster_confidence'][0] if has_pt else np.nan, np.nan,
+                         filter_s, threshold_s, cluster_s_list.pop(key, 0.), aim_s_list.pop((key, t), 0.)))
+            results.append(result)
+            pass
+        table = np.array(rows, dtype=SWEEP_TABLE_DTYPE)
+        table['stability'] = calc_aim_point_stability(table['x'], table['y'], stability_radius)
+
+        if verbose:
+            print(f"[Sweep] {len(table)} configurations, {len(tasks)} aiming groups, "
+                  f"{len(self.__filtered) - 1} filtered maps, {len(self.__sorted)} sorts. "
+                  f"({np.sum([table[c] for c in ('filter_s', 'threshold_s', 'cluster_s', 'aim_s')]):.3f}s)")
+        if return_results:
+            return table, AimResult.concatenate([AimResult.from_dict(r) for r in results])
+        return table
+
+    def clear_cache(self) -> None:
+        self.__filtered = {(): self.__map}
+        self.__sorted = {}
+        self.__labels = {}
+        self.__n_humps = {}
+        self.__results = {}
+        pass
+
+    def __filtered_map(self, chain: tuple) -> (np.ndarray, float):
+        # Longest cached prefix first; returns the map and the time spent for the missing stages.
+        start_t = time.perf_counter()
+        n_cached = max(n for n in range(len(chain) + 1) if chain[:n] in self.__filtered)
+        m = self.__filtered[chain[:n_cached]]
+        for n in range(n_cached, len(chain)):
+            filter_type, size_xy = chain[n]
+            m = simple_2d_filter(m, filter_type, size_xy, self.__padding_mode)
+            self.__filtered[chain[:n + 1]] = m
+        return m, (time.perf_counter() - start_t) if n_cached < len(chain) else 0.
+
+    def __threshold(self, chain: tuple, percentile: float) -> (float, float):
+        assert 0 <= percentile <= 1
+        start_t = time.perf_counter()
+        cached = chain in self.__sorted
+        if not cached:
+            self.__sorted[chain] = np.sort(self.__filtered_map(chain)[0], axis=None)
+        sorted_values = self.__sorted[chain]
+        idx = calc_top_n_percentile_index(len(sorted_values), percentile)
+        return float(sorted_values[idx]), 0. if cached else time.perf_counter() - start_t
+
+    @property
+    def leakage_map(self) -> np.ndarray:
+        return self.__map
+    pass
+
+
+def calc_aim_point_stability(x: np.ndarray,
+                             y: np.ndarray,
+                             radius: float
+                             ) -> np.ndarray:
+    # For every configuration, the fraction of all configurations whose best aim point is within 'radius'
+    # (configurations without an aim point count as disagreeing, and get NaN).
+    pts = np.stack([x, y], axis=1)
+    valid = ~np.isnan(pts).any(axis=1)
+    r = np.full(len(pts), np.nan)
+    if len(pts) == 0 or not valid.any():
+        return r
+    d = np.linalg.norm(pts[valid, np.newaxis] - pts[np.newaxis, valid], axis=2)
+    r[valid] = np.count_nonzero(d <= radius, axis=1) / len(pts)
+    return r
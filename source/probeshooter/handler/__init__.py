@@ -19,4 +19,13 @@
 #  SOFTWARE.
 
 from .psd_chunk_dtype import *
+from .psd_chunk_lazy import *
 from .psd_chunk_handler import *
+from .psd_chunk_layout import *
+from .psd_chunk_band_index import *
+from .psd_chunk_clock_estimator import *
+from .psd_chunk_shared import *
+from .psd_chunk_metadata import *
+from .psd_chunk_bands import *
+from .psd_chunk_zstack import *
+from .psd_chunk_catalog import *
@@ -0,0 +1,162 @@
+#  Copyright (c) 2025 Daehyeon Bae
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+import os
+import numpy as np
+from typing import Union, Optional
+from .psd_chunk_layout import find_psd_chunk_file, load_psd_chunk_array
+
+
+__all__ = [
+    'BAND_INDEX_FILE_NAME',
+    'BandPowerIndex',
+    'build_band_power_index',
+    'load_band_power_index'
+]
+
+
+BAND_INDEX_FILE_NAME = 'psd_chunk_cumsum.npy'
+
+
+class BandPowerIndex:
+    def __init__(self,
+                 cumsum_fyx: np.ndarray,
+                 freq: np.ndarray):
+        # cumsum_fyx[k] is the sum of the frequency planes [0, k), i.e., (F + 1) x Y x X.
+        assert cumsum_fyx.ndim == 3 and cumsum_fyx.shape[0] == len(freq) + 1
+        self.__cumsum = cumsum_fyx
+        self.__freq = freq
+        pass
+
+    def band_sum_map_from_idx(self,
+                              lower_bound_idx: int,
+                              upper_bound_idx: int
+                              ) -> np.ndarray:
+        # Closed index range, same as 'PSDChunk.parse_from_idx_range_closed'.
+        assert 0 <= lower_bound_idx <= upper_bound_idx < len(self.__freq)
+        return self.__cumsum[upper_bound_idx + 1] - self.__cumsum[lower_bound_idx]
+
+    def band_sum_map(self,
+                     lower_bound_hz: Union[float, int],
+                     upper_bound_hz: Union[float, int]
+                     ) -> Optional[np.ndarray]:
+        # Closed frequency range, same as 'PSDChunk.parse_from_freq_range_closed(...).data.sum(axis=2)'.
+        lower_idx, upper_idx_excl = self.freq_range_to_idx(lower_bound_hz, upper_bound_hz)
+        if upper_idx_excl <= lower_idx:
+            return None
+        return self.__cumsum[upper_idx_excl] - self.__cumsum[lower_idx]
+
+    def band_mean_map(self,
+                      lower_bound_hz: Union[float, int],
+                      upper_bound_hz: Union[float, int]
+                      ) -> Optional[np.ndarray]:
+        lower_idx, upper_idx_excl = self.freq_range_to_idx(lower_bound_hz, upper_bound_hz)
+        if upper_idx_excl <= lower_idx:
+            return None
+        return (self.__cumsum[upper_idx_excl] - self.__cumsum[lower_idx]) / (upper_idx_excl - lower_idx)
+
+    def band_sum_maps(self,
+                      lower_bound_hz_list: Union[list, tuple, np.ndarray],
+                      upper_bound_hz_list: Union[list, tuple, np.ndarray],
+                      mean: bool = False
+                      ) -> np.ndarray:
+        # Many bands at once: two plane gathers and one subtraction. Empty bands result in NaN maps.
+        lower_idx = np.searchsorted(self.__freq, np.asarray(lower_bound_hz_list), side='left')
+        upper_idx_excl = np.searchsorted(self.__freq, np.asarray(upper_bound_hz_list), side='right')
+        upper_idx_excl = np.maximum(upper_idx_excl, lower_idx)
+        r = self.__cumsum[upper_idx_excl] - self.__cumsum[lower_idx]
+        n_bins = (upper_idx_excl - lower_idx).astype(np.float64)
+        r[n_bins == 0] = np.nan
+        if mean:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                r = r / n_bins[:, np.newaxis, np.newaxis]
+        return r
+
+    def freq_range_to_idx(self,
+                          lower_bound_hz: Optional[Union[float, int]],
+                          upper_bound_hz: Optional[Union[float, int]]
+                          ) -> (int, int):
+        assert lower_bound_hz is not None or upper_bound_hz is not None
+        lower_idx = 0 if lower_bound_hz is None else int(np.searchsorted(self.__freq, lower_bound_hz, side='left'))
+        upper_idx_excl = len(self.__freq) if upper_bound_hz is None else \
+            int(np.searchsorted(self.__freq, upper_bound_hz, side='right'))
+        return lower_idx, upper_idx_excl
+
+    def rotate(self, rotate_90d: int) -> 'BandPowerIndex':
+        if rotate_90d % 4 == 0:
+            return self
+        return BandPowerIndex(np.rot90(self.__cumsum, k=rotate_90d, axes=(1, 2)), self.__freq)
+
+    @property
+    def cumsum(self):
+        return self.__cumsum
+
+    @property
+    def freq(self):
+        return self.__freq
+
+    @property
+    def shape(self):
+        return self.__cumsum.shape[1], self.__cumsum.shape[2], len(self.__freq)
+    pass
+
+
+def build_band_power_index(psd_chunk: np.ndarray,
+                           freq: np.ndarray,
+                           out_path: Optional[str] = None,
+                           block_bins: int = 1024
+                           ) -> BandPowerIndex:
+    # Builds the prefix sums blockwise over frequency; 'psd_chunk' may be memory-mapped (Y x X x F).
+    y_div, x_div, bins = psd_chunk.shape
+    shape = (bins + 1, y_div, x_div)
+    if out_path is None:
+        cumsum = np.empty(shape, dtype=np.float64)
+    else:
+        cumsum = np.lib.format.open_memmap(out_path, mode='w+', dtype=np.float64, shape=shape)
+    cumsum[0] = 0
+    for f_start in range(0, bins, block_bins):
+        f_stop = min(f_start + block_bins, bins)
+        block = np.cumsum(np.moveaxis(np.asarray(psd_chunk[:, :, f_start:f_stop]), 2, 0), axis=0, dtype=np.float64)
+        cumsum[f_start + 1:f_stop + 1] = block + cumsum[f_start]
+        pass
+    if out_path is not None:
+        cumsum.flush()
+    return BandPowerIndex(cumsum, freq)
+
+
+def load_band_power_index(dataset_path: str,
+                          rotate_90d: int = 0,
+                          lazy: bool = True,
+                          rebuild: bool = False
+                          ) -> BandPowerIndex:
+    # The sidecar ('psd_chunk_cumsum.npy') is built from the stored (unrotated) chunk on first use.
+    index_path = f"{dataset_path}{os.sep}{BAND_INDEX_FILE_NAME}"
+    freq = np.load(f"{dataset_path}{os.sep}freq.npy")
+    _, chunk_path = find_psd_chunk_file(dataset_path)
+    if rebuild or not os.path.exists(index_path) or os.path.getmtime(index_path) < os.path.getmtime(chunk_path):
+        psd_chunk = load_psd_chunk_array(dataset_path, lazy=True)
+        tmp_path = index_path + '.tmp.npy'
+        build_band_power_index(psd_chunk, freq, out_path=tmp_path)
+        del psd_chunk
+        os.replace(tmp_path, index_path)
+    cumsum = np.load(index_path, mmap_mode='r' if lazy else None)
+    if cumsum.shape[0] != len(freq) + 1:
+        raise ValueError(f"'{index_path}' does not match 'freq.npy'. Use rebuild=True.")
+    return BandPowerIndex(cumsum, freq).rotate(rotate_90d)
@@ -0,0 +1,122 @@
+#  Copyright (c) 2025 Daehyeon Bae
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+import os
+import numpy as np
+from typing import Union, Optional, Sequence
+from .psd_chunk_layout import load_psd_chunk_array
+from .psd_chunk_metadata import read_psd_chunk_metadata, write_psd_chunk_metadata
+
+
+__all__ = [
+    'BANDS_METADATA_KEY',
+    'derive_target_bands',
+    'merge_bands',
+    'select_band_idx',
+    'is_in_bands',
+    'extract_psd_chunk_bands'
+]
+
+
+# Sparse-band chunk: a regular PSD chunk whose 'freq.npy' only holds the bins inside the listed bands;
+# the bands ([lower_hz, upper_hz], closed) are recorded in the metadata under this key.
+BANDS_METADATA_KEY = 'bands'
+
+
+def derive_target_bands(clock_hz_list: Union[list, tuple, np.ndarray],
+                        c_gadget_list: Union[list, tuple, np.ndarray],
+                        window_hz: Union[float, int],
+                        include_clock: bool = True
+                        ) -> list:
+    # Windows around each clock f and its IMD sidebands f ± f/c_gadget.
+    centers = []
+    for clock_hz in np.atleast_1d(clock_hz_list):
+        if include_clock:
+            centers.append(clock_hz)
+        for c_gadget in np.atleast_1d(c_gadget_list):
+            centers += [clock_hz - clock_hz / c_gadget, clock_hz + clock_hz / c_gadget]
+        pass
+    return merge_bands([[c - window_hz, c + window_hz] for c in centers])
+
+
+def merge_bands(bands: Sequence) -> list:
+    # Sorted, with overlapping bands merged.
+    r = []
+    for lower_hz, upper_hz in sorted([float(lo), float(hi)] for lo, hi in bands):
+        assert lower_hz <= upper_hz, "Invalid band (lower > upper)."
+        if r and lower_hz <= r[-1][1]:
+            r[-1][1] = max(r[-1][1], upper_hz)
+        else:
+            r.append([lower_hz, upper_hz])
+        pass
+    return r
+
+
+def is_in_bands(freq_hz: Union[float, int, np.ndarray],
+                bands: Sequence
+                ) -> np.ndarray:
+    bands = np.asarray(merge_bands(bands)).reshape(-1, 2)
+    freq_hz = np.asarray(freq_hz)
+    band_id = np.searchsorted(bands[:, 0], freq_hz, side='right') - 1
+    valid = band_id >= 0
+    return valid & (freq_hz <= bands[np.maximum(band_id, 0), 1])
+
+
+def select_band_idx(freq: np.ndarray,
+                    bands: Sequence
+                    ) -> np.ndarray:
+    # Indices (ascending) of the bins of 'freq' that lie inside any band.
+    return np.nonzero(is_in_bands(freq, bands))[0]
+
+
+def extract_psd_chunk_bands(src_dataset_path: str,
+                            dst_dataset_path: str,
+                            bands: Sequence,
+                            block_rows: int = 8,
+                            verbose: bool = False
+                            ) -> int:
+    # Converts an existing (full-band) dataset into a sparse-band one, row-blockwise, so the source is never
+    # fully loaded. Returns the number of bins kept.
+    bands = merge_bands(bands)
+    src = load_psd_chunk_array(src_dataset_path, lazy=True)
+    freq = np.load(f"{src_dataset_path}{os.sep}freq.npy")
+    keep_idx = select_band_idx(freq, bands)
+    assert len(keep_idx) > 0, "No bin lies inside the bands."
+    os.makedirs(dst_dataset_path, exist_ok=True)
+    y_div, x_div, _ = src.shape
+    dst = np.lib.format.open_memmap(f"{dst_dataset_path}{os.sep}psd_chunk.npy", mode='w+', dtype=src.dtype,
+                                    shape=(y_div, x_div, len(keep_idx)))
+    for y_start in range(0, y_div, block_rows):
+        y_stop = min(y_start + block_rows, y_div)
+        dst[y_start:y_stop] = np.asarray(src[y_start:y_stop])[:, :, keep_idx]
+        pass
+    dst.flush()
+    del dst, src
+    np.save(f"{dst_dataset_path}{os.sep}freq.npy", freq[keep_idx])
+    try:
+        metadata = read_psd_chunk_metadata(src_dataset_path)
+    except (OSError, ValueError, SyntaxError):
+        metadata = {}
+    metadata[BANDS_METADATA_KEY] = bands
+    metadata['full_bins'] = len(freq)
+    write_psd_chunk_metadata(dst_dataset_path, metadata)
+    if verbose:
+        print(f"[Bands] {len(keep_idx):,}/{len(freq):,} bins kept in {len(bands)} band(s). ({dst_dataset_path})")
+    return len(keep_idx)
@@ -0,0 +1,156 @@
+#  Copyright (c) 2025 Daehyeon Bae
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+import os
+import json
+import sqlite3
+from typing import Union, Optional
+from .psd_chunk_layout import PSD_CHUNK_LAYOUTS, find_psd_chunk_file
+from .psd_chunk_metadata import META_JSON_FILE_NAME, META_TXT_FILE_NAME, inspect_psd_chunk
+
+
+__all__ = [
+    'PSDChunkCatalog'
+]
+
+
+# Completion bitmap of a scan still being written (see 'PSDChunkWriter'); removed on finalize.
+_PROGRESS_FILE_NAME = 'progress.npy'
+# Sidecars that change what 'inspect_psd_chunk' reports.
+_SIDECAR_FILE_NAMES = ['freq.npy', META_JSON_FILE_NAME, META_TXT_FILE_NAME]
+
+_COLUMNS = ['path', 'identifier', 'layout', 'y_div', 'x_div', 'bins', 'dtype', 'nbytes',
+            'freq_min', 'freq_max', 'rbw', 'vbw', 'mtime', 'metadata']
+
+
+class PSDChunkCatalog:
+    # Header-only index of every dataset under a 'PSD-chunks' root, kept in a local SQLite file.
+    def __init__(self, db_path: str):
+        self.__db_path = db_path
+        self.__conn = sqlite3.connect(db_path)
+        self.__conn.row_factory = sqlite3.Row
+        self.__conn.execute("CREATE TABLE IF NOT EXISTS psd_chunks ("
+                            "path TEXT PRIMARY KEY, identifier TEXT, layout TEXT, "
+                            "y_div INTEGER, x_div INTEGER, bins INTEGER, dtype TEXT, nbytes INTEGER, "
+                            "freq_min REAL, freq_max REAL, rbw REAL, vbw REAL, mtime REAL, metadata TEXT)")
+        self.__conn.execute("CREATE INDEX IF NOT EXISTS psd_chunks_freq ON psd_chunks (freq_min, freq_max)")
+        self.__conn.commit()
+        pass
+
+    def index(self,
+              database_root: str,
+              verbose: bool = False,
+              include_tiles: bool = False
+              ) -> int:
+        # Walks the root; a dataset is a directory with 'freq.npy' and a PSD chunk file. Unchanged datasets
+        # (same latest mtime of the chunk file and its sidecars) are skipped, and vanished ones are removed. Returns
+        # the number of (re)indexed. Scans still in progress ('progress.npy') are excluded until finalized, and so
+        # are per-tile datasets of a tiled acquisition ('tile' in their metadata) unless include_tiles.
+        chunk_file_names = set(PSD_CHUNK_LAYOUTS.values())
+        found = set()
+        n_indexed = 0
+        for dir_path, _, file_names in os.walk(database_root):
+            if 'freq.npy' not in file_names or not chunk_file_names & set(file_names):
+                continue
+            if _PROGRESS_FILE_NAME in file_names:
+                continue
+            path = os.path.abspath(dir_path)
+            _, chunk_path = find_psd_chunk_file(dir_path)
+            mtime = max([os.path.getmtime(chunk_path)] +
+                        [os.path.getmtime(f"{dir_path}{os.sep}{n}") for n in _SIDECAR_FILE_NAMES if n in file_names])
+            row = self.__conn.execute("SELECT mtime FROM psd_chunks WHERE path = ?", (path, )).fetchone()
+            if row is not None and row['mtime'] == mtime:
+                found.add(path)
+                continue
+            r = inspect_psd_chunk(dir_path)
+            if not include_tiles and 'tile' in r['metadata']:
+                continue
+            found.add(path)
+            values = [path, r['identifier'], r['layout'], r['y_div'], r['x_div'], r['bins'], r['dtype'],
+                      r['nbytes'], r['freq_min'], r['freq_max'], r['rbw'], r['vbw'], mtime,
+                      json.dumps(r['metadata'], default=str)]
+            self.__conn.execute(f"INSERT OR REPLACE INTO psd_chunks ({', '.join(_COLUMNS)}) "
+                                f"VALUES ({', '.join(['?'] * len(_COLUMNS))})", values)
+            n_indexed += 1
+            if verbose:
+                print(f"[Catalog] Indexed: {path}")
+            pass
+        root = os.path.abspath(database_root)
+        for row in self.__conn.execute("SELECT path FROM psd_chunks").fetchall():
+            in_root = row['path'] == root or row['path'].startswith(root + os.sep)
+            if in_root and row['path'] not in found:
+                self.__conn.execute("DELETE FROM psd_chunks WHERE path = ?", (row['path'], ))
+        self.__conn.commit()
+        return n_indexed
+
+    def query(self,
+              covering_hz: Optional[Union[float, int, tuple]] = None,
+              max_rbw: Optional[Union[float, int]] = None,
+              min_bins: Optional[int] = None,
+              identifier_like: Optional[str] = None
+              ) -> list:
+        # covering_hz: a frequency, or a (lower, upper) range, that must lie within the chunk's frequency range.
+        conditions, params = [], []
+        if covering_hz is not None:
+            lower_hz, upper_hz = covering_hz if isinstance(covering_hz, tuple) else (covering_hz, covering_hz)
+            conditions.append("freq_min <= ? AND ? <= freq_max")
+            params += [lower_hz, upper_hz]
+        if max_rbw is not None:
+            conditions.append("rbw <= ?")
+            params.append(max_rbw)
+        if min_bins is not None:
+            conditions.append("bins >= ?")
+            params.append(min_bins)
+        if identifier_like is not None:
+            conditions.append("identifier LIKE ?")
+            params.append(identifier_like)
+        sql = "SELECT * FROM psd_chunks"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY path"
+        r = []
+        for row in self.__conn.execute(sql, params).fetchall():
+            d = dict(row)
+            d['metadata'] = json.loads(d['metadata'])
+            # A sparse-band chunk covers only its bands, not its whole frequency range.
+            if covering_hz is not None and 'bands' in d['metadata'] and \
+                    not any(lo <= lower_hz and upper_hz <= hi for lo, hi in d['metadata']['bands']):
+                continue
+            r.append(d)
+        return r
+
+    def close(self) -> None:
+        self.__conn.close()
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        pass
+
+    def __len__(self):
+        return self.__conn.execute("SELECT COUNT(*) FROM psd_chunks").fetchone()[0]
+
+    @property
+    def db_path(self):
+        return self.__db_path
+    pass
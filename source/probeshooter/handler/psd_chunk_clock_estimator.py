@@ -0,0 +1,79 @@
+#  Copyright (c) 2025 Daehyeon Bae
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+import numpy as np
+from typing import Union, Optional
+from .psd_chunk_dtype import PSDChunk
+
+
+__all__ = [
+    'calc_core_clock_scores',
+    'estimate_core_clock_map'
+]
+
+
+def calc_core_clock_scores(psd_chunk: PSDChunk,
+                           opp_freq_list: Union[list, tuple, np.ndarray],
+                           side_band_hz: Union[float, int],
+                           block_rows: int = 16,
+                           use_band_index: Optional[bool] = None
+                           ) -> np.ndarray:
+    # Score of each OPP candidate = mean PSD within [f_opp - side_band_hz, f_opp + side_band_hz], per pixel.
+    # Returns K x Y x X; candidates without any bin in their band are scored -inf.
+    opp_freq_list = np.asarray(opp_freq_list, dtype=np.float64)
+    assert opp_freq_list.ndim == 1 and len(opp_freq_list) > 0
+    if use_band_index is None:
+        use_band_index = psd_chunk.has_band_index
+    if use_band_index:
+        scores = psd_chunk.band_index.band_sum_maps(opp_freq_list - side_band_hz,
+                                                    opp_freq_list + side_band_hz,
+                                                    mean=True)
+        scores[np.isnan(scores)] = -np.inf
+        return scores
+
+    freq = psd_chunk.freq
+    lower_idx = np.searchsorted(freq, opp_freq_list - side_band_hz, side='left')
+    upper_idx_excl = np.searchsorted(freq, opp_freq_list + side_band_hz, side='right')
+    scores = np.full((len(opp_freq_list), psd_chunk.y_div, psd_chunk.x_div), fill_value=-np.inf, dtype=np.float64)
+    data = psd_chunk.data
+    # Row blocks keep the per-candidate band reads of a block in cache.
+    for y_start in range(0, psd_chunk.y_div, block_rows):
+        y_stop = min(y_start + block_rows, psd_chunk.y_div)
+        for k, (f_lower, f_upper) in enumerate(zip(lower_idx, upper_idx_excl)):
+            if f_upper > f_lower:
+                scores[k, y_start:y_stop] = np.mean(data[y_start:y_stop, :, f_lower:f_upper], axis=2, dtype=np.float64)
+            pass
+        pass
+    return scores
+
+
+def estimate_core_clock_map(psd_chunk: PSDChunk,
+                            opp_freq_list: Union[list, tuple, np.ndarray],
+                            side_band_hz: Union[float, int],
+                            return_scores: bool = False,
+                            block_rows: int = 16,
+                            use_band_index: Optional[bool] = None
+                            ) -> Union[np.ndarray, tuple]:
+    opp_freq_list = np.asarray(opp_freq_list)
+    scores = calc_core_clock_scores(psd_chunk, opp_freq_list, side_band_hz, block_rows, use_band_index)
+    clock_map = opp_freq_list[np.argmax(scores, axis=0)]
+    if return_scores:
+        return clock_map, scores
+    return clock_map
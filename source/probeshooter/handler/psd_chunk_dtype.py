@@ -19,15 +19,22 @@
 #  SOFTWARE.
 
 import sys
+import copy
 import numpy as np
+from numpy.lib.mixins import NDArrayOperatorsMixin
 from typing import Union, Optional
-from ..aiming.filter import simple_2d_filter
+from ..aiming.filter import simple_2d_filter_stack
+from .psd_chunk_layout import is_freq_major
+from .psd_chunk_band_index import BandPowerIndex, build_band_power_index
+from .psd_chunk_bands import BANDS_METADATA_KEY, is_in_bands
+from .psd_chunk_lazy import LazyPSDChunk
 
 
 __all__ = [
     'PSDChunk',
     'PSDChunkSlicesContinuous',
-    'PSDChunkSlicesDiscrete'
+    'PSDChunkSlicesDiscrete',
+    'LazyGatheredArray'
 ]
 
 
@@ -43,11 +50,13 @@ class PSDChunk:
         self.__freq = freq
         self.__metadata = metadata
         self.__id = identifier
+        self.__band_index = None
         pass
 
     def parse_from_freq_range_closed(self,
                                      lower_bound_hz: Optional[Union[float, int]],
-                                     upper_bound_hz: Optional[Union[float, int]]
+                                     upper_bound_hz: Optional[Union[float, int]],
+                                     view: bool = False
                                      ) -> Optional['PSDChunkSlicesContinuous']:
         assert lower_bound_hz is not None or upper_bound_hz is not None
         if lower_bound_hz is not None and upper_bound_hz is not None:
@@ -59,6 +68,12 @@ class PSDChunk:
         if np.sum(selector) == 0:
             return None
         target_idx = np.argwhere(selector)[:, 0]
+        if view and _is_consecutive(target_idx):
+            return PSDChunkSlicesContinuous(self.__id,
+                                            _read_only_view(self.__data[:, :, target_idx[0]:target_idx[-1]+1]),
+                                            _read_only_view(self.__freq[target_idx[0]:target_idx[-1]+1]),
+                                            self.__metadata,
+                                            self)
         return PSDChunkSlicesContinuous(self.__id,
                                         np.ascontiguousarray(np.copy(self.__data[:, :, target_idx])),
                                         np.ascontiguousarray(np.copy(self.__freq[target_idx])),
@@ -66,44 +81,49 @@ class PSDChunk:
                                         self)
 
     def parse_from_nearest_freq_list(self,
-                                     target_freq_hz_list: Union[list, tuple, np.ndarray]
+                                     target_freq_hz_list: Union[list, tuple, np.ndarray],
+                                     view: bool = False
                                      ) -> 'PSDChunkSlicesDiscrete':
         assert len(target_freq_hz_list) > 0
-        nearset_indices = []
-        diff_hz = []
-        for t_hz in target_freq_hz_list:
-            idx = np.argmin(np.abs(self.__freq - t_hz))
-            nearset_indices.append(idx)
-            diff_hz.append(np.abs(t_hz - self.__freq[idx]))
-            pass
-        nearset_indices = np.array(nearset_indices, dtype=np.int32)
-        diff_hz = np.array(diff_hz, dtype=np.float64)
-        if np.sum(nearset_indices == 0) > 0 or np.sum(nearset_indices == len(self.__freq) - 1) > 0:
-            print("[Warning] The frequency of the edge has been selected.", file=sys.stderr)
+        self.__check_in_bands(target_freq_hz_list)
+        nearset_indices, diff_hz = _find_nearest_freq_idx(self.__freq, target_freq_hz_list)
+        nearset_indices = nearset_indices.astype(np.int32)
+        if view:
+            result_data, result_freq = self.__gather_view(nearset_indices)
+        else:
+            result_data = np.ascontiguousarray(np.copy(self.__data[:, :, nearset_indices]))
+            result_freq = np.ascontiguousarray(np.copy(self.__freq[nearset_indices]))
         return PSDChunkSlicesDiscrete(self.__id,
-                                      np.ascontiguousarray(np.copy(self.__data[:, :, nearset_indices])),
-                                      np.ascontiguousarray(np.copy(self.__freq[nearset_indices])),
+                                      result_data,
+                                      result_freq,
                                       self.__metadata,
                                       self,
                                       diff_hz)
 
     def parse_from_idx_range_closed(self,
                                     lower_bound_idx: Optional[int],
-                                    upper_bound_idx: Optional[int]
+                                    upper_bound_idx: Optional[int],
+                                    view: bool = False
                                     ) -> 'PSDChunkSlicesContinuous':
         assert lower_bound_idx is not None or upper_bound_idx is not None
         if lower_bound_idx is not None and upper_bound_idx is not None:
             assert 0 <= lower_bound_idx < upper_bound_idx <= len(self.__freq)
-            result_data = np.ascontiguousarray(np.copy(self.__data[:, :, lower_bound_idx:upper_bound_idx+1]))
-            result_freq = np.ascontiguousarray(np.copy(self.__freq[lower_bound_idx:upper_bound_idx+1]))
+            result_data = self.__data[:, :, lower_bound_idx:upper_bound_idx+1]
+            result_freq = self.__freq[lower_bound_idx:upper_bound_idx+1]
         elif lower_bound_idx is not None:
             assert 0 <= lower_bound_idx
-            result_data = np.ascontiguousarray(np.copy(self.__data[:, :, lower_bound_idx:]))
-            result_freq = np.ascontiguousarray(np.copy(self.__freq[lower_bound_idx:]))
+            result_data = self.__data[:, :, lower_bound_idx:]
+            result_freq = self.__freq[lower_bound_idx:]
         else:  # upper_bound_hz is not None
             assert upper_bound_idx <= len(self.__freq)
-            result_data = np.ascontiguousarray(np.copy(self.__data[:, :, :upper_bound_idx+1]))
-            result_freq = np.ascontiguousarray(np.copy(self.__freq[:upper_bound_idx+1]))
+            result_data = self.__data[:, :, :upper_bound_idx+1]
+            result_freq = self.__freq[:upper_bound_idx+1]
+        if view:
+            result_data = _read_only_view(result_data)
+            result_freq = _read_only_view(result_freq)
+        else:
+            result_data = np.ascontiguousarray(np.copy(result_data))
+            result_freq = np.ascontiguousarray(np.copy(result_freq))
         return PSDChunkSlicesContinuous(self.__id,
                                         result_data,
                                         result_freq,
@@ -112,19 +132,65 @@ class PSDChunk:
         pass
 
     def parse_from_idx_list(self,
-                            target_idx_list
+                            target_idx_list,
+                            view: bool = False
                             ) -> 'PSDChunkSlicesDiscrete':
         target_idx_list = np.array(target_idx_list, dtype=np.int32)
         new_slice_len = len(target_idx_list)
         err_cnt = np.sum((target_idx_list < 0) | (target_idx_list >= len(self.__freq)))
         assert err_cnt == 0
+        if view:
+            result_data, result_freq = self.__gather_view(target_idx_list)
+        else:
+            result_data = np.ascontiguousarray(np.copy(self.__data[:, :, target_idx_list]))
+            result_freq = np.ascontiguousarray(np.copy(self.__freq[target_idx_list]))
         return PSDChunkSlicesDiscrete(self.__id,
-                                      np.ascontiguousarray(np.copy(self.__data[:, :, target_idx_list])),
-                                      np.ascontiguousarray(np.copy(self.__freq[target_idx_list])),
+                                      result_data,
+                                      result_freq,
                                       self.__metadata,
                                       self,
                                       np.full(fill_value=0, shape=(new_slice_len, ), dtype=np.float64))
 
+    def gather_from_nearest_freq_maps(self,
+                                      target_freq_hz_maps: Union[list, tuple, np.ndarray],
+                                      return_diff_hz: bool = False
+                                      ) -> Union[np.ndarray, tuple]:
+        # Per-pixel version of 'parse_from_nearest_freq_list': target_freq_hz_maps is a Y x X map
+        # (or a list / K x Y x X stack of maps) of target frequencies, e.g., a per-pixel clock.
+        target_freq_hz_maps = np.asarray(target_freq_hz_maps)
+        single_map = target_freq_hz_maps.ndim == 2
+        if single_map:
+            target_freq_hz_maps = target_freq_hz_maps[np.newaxis]
+        assert target_freq_hz_maps.ndim == 3 and target_freq_hz_maps.shape[1:] == self.shape[:2]
+        self.__check_in_bands(target_freq_hz_maps)
+        nearest_idx, diff_hz = _find_nearest_freq_idx(self.__freq, target_freq_hz_maps)
+        y_idx = np.arange(self.y_div)[:, np.newaxis]
+        x_idx = np.arange(self.x_div)[np.newaxis, :]
+        gathered = self.__data[y_idx, x_idx, nearest_idx]
+        if single_map:
+            gathered, diff_hz = gathered[0], diff_hz[0]
+        if return_diff_hz:
+            return gathered, diff_hz
+        return gathered
+
+    def __check_in_bands(self, target_freq_hz: Union[list, tuple, np.ndarray]) -> None:
+        # On a sparse-band chunk, the nearest stored bin of an out-of-band target may be far away.
+        if self.bands is not None and not np.all(is_in_bands(target_freq_hz, self.bands)):
+            print("[Warning] Target frequency outside the stored bands.", file=sys.stderr)
+        pass
+
+    def __gather_view(self, target_idx: np.ndarray) -> ('LazyGatheredArray', np.ndarray):
+        # A run of consecutive indices is still expressible as a strided view; anything else is gathered on demand.
+        if _is_consecutive(target_idx):
+            return (_read_only_view(self.__data[:, :, target_idx[0]:target_idx[-1]+1]),
+                    _read_only_view(self.__freq[target_idx[0]:target_idx[-1]+1]))
+        return LazyGatheredArray(self.__data, target_idx), self.__freq[target_idx]
+
+    def lazy(self) -> LazyPSDChunk:
+        # Deferred operations, e.g., psd_chunk.lazy().convert_to_dbm_scale().parse_from_freq_range_closed(lo, hi)
+        # .filter_2d('median', (3, 3)).sum().compute() reads only the bins in [lo, hi], block by block.
+        return LazyPSDChunk(self.__data, self.__freq, self.__metadata, self.__id, chunk_factory=PSDChunk)
+
     def convert_to_dbm_scale(self, correction: int = 30) -> 'PSDChunk':
         r = PSDChunk(self.__id, 10 * np.log10(self.__data) + correction, self.__freq, self.__metadata)
         r.original = False
@@ -133,20 +199,74 @@ class PSDChunk:
     def convert_to_2d_filtered_maps(self,
                                     filter_type: str,
                                     filter_size_xy: (int, int),
-                                    verbose: bool = False
+                                    verbose: bool = False,
+                                    block_bins: int = 256,
+                                    n_workers: Optional[int] = None,
+                                    out_path: Optional[str] = None
                                     ) -> 'PSDChunk':
-        filtered_psd_chunk = np.empty_like(self.__data)
-        for f_idx in range(len(self.__freq)):
-            filtered_psd_chunk[:, :, f_idx] = simple_2d_filter(self.data[:, :, f_idx], filter_type, filter_size_xy)
-            if verbose and (f_idx + 1) % 100 == 0:
-                print(f"{f_idx + 1}/{len(self.__freq)} Completed.")
+        # out_path: the filtered chunk is written to a memory-mapped '.npy' instead of RAM.
+        if out_path is None:
+            filtered_psd_chunk = np.empty_like(self.__data, subok=False)
+        elif is_freq_major(self.__data):
+            filtered_psd_chunk = np.moveaxis(np.lib.format.open_memmap(
+                out_path, mode='w+', dtype=self.__data.dtype,
+                shape=(self.bins, self.y_div, self.x_div)), 0, 2)
         else:
-            if verbose:
-                print(f"{len(self.__freq)}/{len(self.__freq)} Completed.")
+            filtered_psd_chunk = np.lib.format.open_memmap(out_path, mode='w+', dtype=self.__data.dtype,
+                                                           shape=self.shape)
+        simple_2d_filter_stack(self.__data, filter_type, filter_size_xy,
+                               block_bins=block_bins, n_workers=n_workers, out=filtered_psd_chunk, verbose=verbose)
+        if out_path is not None:
+            filtered_psd_chunk.flush()
         r = PSDChunk(self.__id, filtered_psd_chunk, self.__freq, self.__metadata)
         r.original = False
         return r
 
+    def band_sum_map(self,
+                     lower_bound_hz: Optional[Union[float, int]],
+                     upper_bound_hz: Optional[Union[float, int]]
+                     ) -> Optional[np.ndarray]:
+        # Equals 'parse_from_freq_range_closed(...).data.sum(axis=2)', but in O(Y*X) via the band index.
+        lower_idx, upper_idx_excl = self.band_index.freq_range_to_idx(lower_bound_hz, upper_bound_hz)
+        if upper_idx_excl <= lower_idx:
+            return None
+        return self.band_index.band_sum_map_from_idx(lower_idx, upper_idx_excl - 1)
+
+    def band_mean_map(self,
+                      lower_bound_hz: Optional[Union[float, int]],
+                      upper_bound_hz: Optional[Union[float, int]]
+                      ) -> Optional[np.ndarray]:
+        lower_idx, upper_idx_excl = self.band_index.freq_range_to_idx(lower_bound_hz, upper_bound_hz)
+        if upper_idx_excl <= lower_idx:
+            return None
+        return self.band_index.band_sum_map_from_idx(lower_idx, upper_idx_excl - 1) / (upper_idx_excl - lower_idx)
+
+    def build_band_index(self,
+                         out_path: Optional[str] = None,
+                         block_bins: int = 1024
+                         ) -> BandPowerIndex:
+        # Builds (blockwise; into a memory-mapped 'out_path' if given) and attaches the band index.
+        self.attach_band_index(build_band_power_index(self.__data, self.__freq, out_path=out_path,
+                                                      block_bins=block_bins))
+        return self.__band_index
+
+    def attach_band_index(self, band_index: BandPowerIndex) -> None:
+        assert band_index.shape == self.shape and np.array_equal(band_index.freq, self.__freq), \
+            "The band index does not match the PSD chunk."
+        self.__band_index = band_index
+        pass
+
+    def materialize(self) -> 'PSDChunk':
+        if not self.is_view:
+            return self
+        r = copy.copy(self)
+        if isinstance(self.__data, LazyGatheredArray):
+            r.__data = self.__data.materialize()
+        else:
+            r.__data = np.array(self.__data, order='C', copy=True)
+        r.__freq = np.array(self.__freq, order='C', copy=True)
+        return r
+
     @property
     def data(self):
         return self.__data
@@ -155,10 +275,31 @@ class PSDChunk:
     def freq(self):
         return self.__freq
 
+    @property
+    def has_band_index(self):
+        return self.__band_index is not None
+
+    @property
+    def band_index(self) -> BandPowerIndex:
+        # Never built implicitly: the index is (F + 1) x Y x X float64, i.e., about twice a float32 chunk.
+        if self.__band_index is None:
+            raise RuntimeError("No band index is attached. Use 'build_band_index()', 'attach_band_index()' or "
+                               "'load_psd_chunk(..., band_index=True)'.")
+        return self.__band_index
+
     @property
     def metadata(self):
         return self.__metadata
 
+    @property
+    def bands(self) -> Optional[list]:
+        # Only for sparse-band chunks (narrowband acquisition or 'extract_psd_chunk_bands').
+        return self.__metadata.get(BANDS_METADATA_KEY) if isinstance(self.__metadata, dict) else None
+
+    @property
+    def identifier(self):
+        return self.__id
+
     @property
     def shape(self):
         return self.__data.shape
@@ -185,12 +326,22 @@ class PSDChunk:
 
     @property
     def point_to_point_diff_hz(self):
-        return self.__metadata['freq_span'] / self.__data.shape[2]
+        return self.__metadata['freq_span'] / self.__metadata.get('full_bins', self.__data.shape[2])
 
     @property
     def n_slices(self):
         return len(self.__freq)
 
+    @property
+    def is_memory_mapped(self):
+        return isinstance(self.__data, np.memmap)
+
+    @property
+    def is_view(self):
+        if isinstance(self.__data, LazyGatheredArray) or self.is_memory_mapped:
+            return True
+        return self.__data.base is not None and not self.__data.flags.writeable
+
     def __repr__(self):
         return self.__id
     pass
@@ -230,3 +381,115 @@ class PSDChunkSlicesDiscrete(PSDChunk):
     def __repr__(self):
         return '[Slice-D] ' + super().__repr__()
     pass
+
+
+class LazyGatheredArray(NDArrayOperatorsMixin):
+    def __init__(self,
+                 source: np.ndarray,
+                 target_idx: np.ndarray):
+        self.__source = source
+        self.__target_idx = np.asarray(target_idx)
+        pass
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key, )
+        if any(k is Ellipsis for k in key):
+            e_pos = [k is Ellipsis for k in key].index(True)
+            key = key[:e_pos] + (slice(None), ) * (3 - len(key) + 1) + key[e_pos + 1:]
+        key = key + (slice(None), ) * (3 - len(key))
+        assert len(key) == 3, "Too many indices for the 3D PSD chunk."
+        if any(k is None for k in key):
+            raise IndexError("np.newaxis is not supported on a lazily gathered view; call materialize() first.")
+        # Only the requested frequency planes are gathered from the source, with ndarray indexing semantics: an
+        # integer / array frequency index maps to a source index of the same shape, while a slice maps to an index
+        # array, so the y / x indices are applied first to keep the frequency axis last.
+        freq_key = self.__target_idx[key[2]]
+        if isinstance(key[2], slice):
+            return self.__source[key[0], key[1]][..., freq_key]
+        return self.__source[key[0], key[1], freq_key]
+
+    def __setitem__(self, key, value):
+        raise ValueError("assignment destination is read-only (lazily gathered view); call materialize() first.")
+
+    def __array__(self, dtype=None, copy=None):
+        if copy is False:
+            raise ValueError("A lazily gathered view cannot be converted to an array without a copy.")
+        r = self.materialize()
+        return r if dtype is None else r.astype(dtype, copy=False)
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        inputs = tuple(i.materialize() if isinstance(i, LazyGatheredArray) else i for i in inputs)
+        return getattr(ufunc, method)(*inputs, **kwargs)
+
+    def __getattr__(self, name):
+        # ndarray methods (e.g., sum, mean, max) are evaluated on the gathered array.
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.materialize(), name)
+
+    def __len__(self):
+        return self.shape[0]
+
+    def materialize(self) -> np.ndarray:
+        return np.ascontiguousarray(self.__source[:, :, self.__target_idx])
+
+    @property
+    def shape(self):
+        return self.__source.shape[0], self.__source.shape[1], len(self.__target_idx)
+
+    @property
+    def ndim(self):
+        return 3
+
+    @property
+    def dtype(self):
+        return self.__source.dtype
+
+    @property
+    def size(self):
+        return int(np.prod(self.shape))
+
+    @property
+    def nbytes(self):
+        return self.size * self.dtype.itemsize
+
+    @property
+    def target_idx(self):
+        return self.__target_idx
+
+    def __repr__(self):
+        return f"LazyGatheredArray(shape={self.shape}, dtype={self.dtype})"
+    pass
+
+
+def _find_nearest_freq_idx(freq: np.ndarray,
+                           target_freq_hz: Union[list, tuple, np.ndarray]
+                           ) -> (np.ndarray, np.ndarray):
+    # Same result as np.argmin(np.abs(freq - t_hz)) per target (ties go to the lower index), via binary search.
+    target_freq_hz = np.asarray(target_freq_hz)
+    # Discrete slices may hold an unsorted frequency axis.
+    order = None if np.all(np.diff(freq) >= 0) else np.argsort(freq, kind='stable')
+    sorted_freq = freq if order is None else freq[order]
+    right_idx = np.clip(np.searchsorted(sorted_freq, target_freq_hz, side='left'), 1, len(freq) - 1)
+    left_idx = right_idx - 1
+    left_diff = np.abs(target_freq_hz - sorted_freq[left_idx])
+    right_diff = np.abs(sorted_freq[right_idx] - target_freq_hz)
+    nearest_idx = np.where(left_diff <= right_diff, left_idx, right_idx) if len(freq) > 1 \
+        else np.zeros_like(right_idx)
+    if order is not None:
+        nearest_idx = order[nearest_idx]
+    diff_hz = np.abs(target_freq_hz - freq[nearest_idx]).astype(np.float64)
+    if np.any(nearest_idx == 0) or np.any(nearest_idx == len(freq) - 1):
+        print("[Warning] The frequency of the edge has been selected.", file=sys.stderr)
+    return nearest_idx, diff_hz
+
+
+def _is_consecutive(target_idx: np.ndarray) -> bool:
+    return len(target_idx) > 0 and bool(np.all(np.diff(target_idx) == 1))
+
+
+def _read_only_view(arr: np.ndarray) -> np.ndarray:
+    v = arr.view()
+    v.flags.writeable = False
+    return v
@@ -20,8 +20,11 @@
 
 import os
 import numpy as np
-from typing import Union
+from typing import Union, Optional
 from .psd_chunk_dtype import PSDChunk
+from .psd_chunk_layout import load_psd_chunk_array, is_freq_major
+from .psd_chunk_band_index import load_band_power_index
+from .psd_chunk_metadata import read_psd_chunk_metadata
 
 
 __all__ = [
@@ -33,58 +36,77 @@ __all__ = [
 
 def load_psd_chunk(dataset_path: str,
                    rotate_90d: int = 0,
-                   verbose: bool = True
+                   verbose: bool = True,
+                   lazy: bool = False,
+                   layout: Optional[str] = None,
+                   band_index: bool = False
                    ) -> PSDChunk:
-    psd_chunk = np.load(f"{dataset_path}{os.sep}psd_chunk.npy")
-    psd_chunk = rotate_psd_chunk(psd_chunk, rotate_90d)
+    # lazy=True: the chunk file is memory-mapped read-only, so only the pages touched by slicing are read.
+    # layout=None: the frequency-major copy ('fyx') is used if it exists (see 'convert_psd_chunk_layout').
+    psd_chunk = load_psd_chunk_array(dataset_path, layout, lazy)
+    psd_chunk = rotate_psd_chunk(psd_chunk, rotate_90d, contiguous=not lazy)
     psd_chunk_freq = np.load(f"{dataset_path}{os.sep}freq.npy")
     try:
-        with open(f"{dataset_path}{os.sep}meta.txt", 'r') as fp:
-            r = fp.readline().strip()
-            metadata = eval(r)
-            identifier = dataset_path.split(os.sep)[-1]
-            if verbose:
-                print(f"=================================================================")
-                print(f"[ PSD Chunk File ] - {identifier}\n")
-                print(f"* Frequency Range  : {metadata['freq_start']}Hz ~ {metadata['freq_stop']}Hz "
-                      f"(={metadata['freq_start'] / 1e6:.6f}MHz ~ {metadata['freq_stop'] / 1e6:.6f}MHz)")
-                print(f"* Frequency Span   : {metadata['freq_span']}Hz "
-                      f"(={metadata['freq_span'] / 1e6:.6f}MHz)")
-                print(f"* Center frequency : {metadata['freq_center']}Hz "
-                      f"(={metadata['freq_center'] / 1e6:.6f}MHz)")
-                print(f"* Resolution BW    : {metadata['rbw']}Hz "
-                      f"(={metadata['rbw'] / 1e3:.3f}kHz, ={metadata['rbw'] / 1e6:.6f}MHz)")
-                print(f"* View BW          : {metadata['vbw']}Hz "
-                      f"(={metadata['vbw'] / 1e3:.3f}kHz, ={metadata['vbw'] / 1e6:.6f}MHz)")
-                if 'bin' in metadata:  # backward compatibility
-                    print(f"* Bins             : {metadata['bin']:,}")
-                if 'bins' in metadata:  # backward compatibility
-                    print(f"* Bins             : {metadata['bins']:,}")
-                print(f"* Unit             : {metadata['psd_unit']}")
-                print(f"* Ref. Level       : {metadata['ref_level']}{metadata['psd_unit']}")
-                print(f"* Averaged         : {metadata['avg']}")
-                print(f"* Max-Holded       : {metadata['maxh']}")
-                print(f"* Avg/Max-H. Cnt.  : {metadata['avg_maxh_count']}")
-                print(f"* Sweep Time       : {metadata['sweep_time_s']}s (={metadata['sweep_time_ms']}ms)")
-                if 'duration_s' in metadata:  # backward compatibility
-                    print(f"* Acq. Duration    : {metadata['duration_s']:.2f}s (={metadata['duration_s']/60:.2f}m)")
-                print(f"* Chunk size       : {psd_chunk.nbytes / 1e9:.3f}GiB")
-                print(f"* Shape            : X(↔): {psd_chunk.shape[1]}, Y(↕): {psd_chunk.shape[0]}, "
-                      f"Freq: {psd_chunk.shape[2]}")
-                print(f"=================================================================")
-    except RuntimeError as e:
-        print("[Warning] Unable to read or parse Metadata (meta.txt).")
+        metadata = read_psd_chunk_metadata(dataset_path)
+        identifier = dataset_path.split(os.sep)[-1]
+        if verbose:
+            print(f"=================================================================")
+            print(f"[ PSD Chunk File ] - {identifier}\n")
+            print(f"* Frequency Range  : {metadata['freq_start']}Hz ~ {metadata['freq_stop']}Hz "
+                  f"(={metadata['freq_start'] / 1e6:.6f}MHz ~ {metadata['freq_stop'] / 1e6:.6f}MHz)")
+            print(f"* Frequency Span   : {metadata['freq_span']}Hz "
+                  f"(={metadata['freq_span'] / 1e6:.6f}MHz)")
+            print(f"* Center frequency : {metadata['freq_center']}Hz "
+                  f"(={metadata['freq_center'] / 1e6:.6f}MHz)")
+            print(f"* Resolution BW    : {metadata['rbw']}Hz "
+                  f"(={metadata['rbw'] / 1e3:.3f}kHz, ={metadata['rbw'] / 1e6:.6f}MHz)")
+            print(f"* View BW          : {metadata['vbw']}Hz "
+                  f"(={metadata['vbw'] / 1e3:.3f}kHz, ={metadata['vbw'] / 1e6:.6f}MHz)")
+            if 'bin' in metadata:  # backward compatibility
+                print(f"* Bins             : {metadata['bin']:,}")
+            if 'bins' in metadata:  # backward compatibility
+                print(f"* Bins             : {metadata['bins']:,}")
+            if 'bands' in metadata:
+                print(f"* Bands            : {len(metadata['bands'])} band(s), "
+                      f"{psd_chunk.shape[2]:,}/{metadata.get('full_bins', psd_chunk.shape[2]):,} bins kept")
+            print(f"* Unit             : {metadata['psd_unit']}")
+            print(f"* Ref. Level       : {metadata['ref_level']}{metadata['psd_unit']}")
+            print(f"* Averaged         : {metadata['avg']}")
+            print(f"* Max-Holded       : {metadata['maxh']}")
+            print(f"* Avg/Max-H. Cnt.  : {metadata['avg_maxh_count']}")
+            print(f"* Sweep Time       : {metadata['sweep_time_s']}s (={metadata['sweep_time_ms']}ms)")
+            if 'duration_s' in metadata:  # backward compatibility
+                print(f"* Acq. Duration    : {metadata['duration_s']:.2f}s (={metadata['duration_s']/60:.2f}m)")
+            print(f"* Chunk size       : {psd_chunk.nbytes / 1e9:.3f}GiB"
+                  f"{' (memory-mapped)' if lazy else ''}")
+            print(f"* Shape            : X(↔): {psd_chunk.shape[1]}, Y(↕): {psd_chunk.shape[0]}, "
+                  f"Freq: {psd_chunk.shape[2]}")
+            print(f"* Layout           : {'F-Y-X (frequency-major)' if is_freq_major(psd_chunk) else 'Y-X-F'}")
+            print(f"=================================================================")
+    except (RuntimeError, ValueError, SyntaxError) as e:
+        print("[Warning] Unable to read or parse Metadata (meta.json / meta.txt).")
         identifier = 'None'
         metadata = {}
     chunk_instance = PSDChunk(identifier, psd_chunk, psd_chunk_freq, metadata)
+    if band_index:
+        # Persisted next to the chunk ('psd_chunk_cumsum.npy') and reused by subsequent loads. The float64 sidecar is
+        # about twice the size of the chunk, so it is always memory-mapped (queries touch only two planes).
+        chunk_instance.attach_band_index(load_band_power_index(dataset_path, rotate_90d, lazy=True))
     return chunk_instance
 
 
 def rotate_psd_chunk(psd_chunk: np.ndarray,
-                     rotate_90d: int
+                     rotate_90d: int,
+                     contiguous: bool = True
                      ) -> np.ndarray:
     if rotate_90d % 4 != 0:
-        return np.ascontiguousarray(np.rot90(psd_chunk, k=rotate_90d, axes=(0, 1)))
+        rotated = np.rot90(psd_chunk, k=rotate_90d, axes=(0, 1))
+        # Without 'contiguous', the rotated chunk stays a (strided) view, e.g., of a memory-mapped chunk.
+        if not contiguous:
+            return rotated
+        if is_freq_major(psd_chunk):
+            return np.moveaxis(np.ascontiguousarray(np.moveaxis(rotated, 2, 0)), 0, 2)
+        return np.ascontiguousarray(rotated)
     else:
         return psd_chunk
 
@@ -0,0 +1,116 @@
+#  Copyright (c) 2025 Daehyeon Bae
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+import os
+import sys
+import numpy as np
+from typing import Optional
+
+
+__all__ = [
+    'PSD_CHUNK_LAYOUTS',
+    'find_psd_chunk_file',
+    'load_psd_chunk_array',
+    'convert_psd_chunk_layout',
+    'is_freq_major'
+]
+
+
+# Layout name -> file name. 'yxf' is the acquisition layout (Y x X x F, frequency innermost),
+# 'fyx' stores each frequency plane contiguously (F x Y x X).
+PSD_CHUNK_LAYOUTS = {
+    'yxf': 'psd_chunk.npy',
+    'fyx': 'psd_chunk_fyx.npy'
+}
+
+
+def find_psd_chunk_file(dataset_path: str,
+                        layout: Optional[str] = None
+                        ) -> (str, str):
+    if layout is not None:
+        assert layout in PSD_CHUNK_LAYOUTS, "Not supported 'layout'."
+        return layout, f"{dataset_path}{os.sep}{PSD_CHUNK_LAYOUTS[layout]}"
+    # The frequency-major copy is preferred when both exist (map extraction reads whole planes), unless it is
+    # older than 'psd_chunk.npy' (e.g., re-acquired or rotated afterward), in which case it is stale.
+    fyx_path = f"{dataset_path}{os.sep}{PSD_CHUNK_LAYOUTS['fyx']}"
+    yxf_path = f"{dataset_path}{os.sep}{PSD_CHUNK_LAYOUTS['yxf']}"
+    fyx_exists, yxf_exists = os.path.exists(fyx_path), os.path.exists(yxf_path)
+    if fyx_exists and yxf_exists:
+        if os.path.getmtime(fyx_path) >= os.path.getmtime(yxf_path):
+            return 'fyx', fyx_path
+        print(f"[Warning] '{fyx_path}' is older than '{yxf_path}' and is ignored; "
+              f"re-run 'convert_psd_chunk_layout'.", file=sys.stderr)
+        return 'yxf', yxf_path
+    if fyx_exists:
+        return 'fyx', fyx_path
+    if yxf_exists:
+        return 'yxf', yxf_path
+    raise FileNotFoundError(f"No PSD chunk file in '{dataset_path}'.")
+
+
+def load_psd_chunk_array(dataset_path: str,
+                         layout: Optional[str] = None,
+                         lazy: bool = False
+                         ) -> np.ndarray:
+    # Always returns a Y x X x F array. For 'fyx', it is a transposed view of the stored array,
+    # so psd_chunk[:, :, f_idx] is a contiguous plane.
+    layout, path = find_psd_chunk_file(dataset_path, layout)
+    arr = np.load(path, mmap_mode='r' if lazy else None)
+    if layout == 'fyx':
+        return np.moveaxis(arr, 0, 2)
+    return arr
+
+
+def convert_psd_chunk_layout(dataset_path: str,
+                             layout: str = 'fyx',
+                             block_bins: int = 1024,
+                             remove_source: bool = False,
+                             verbose: bool = False
+                             ) -> str:
+    assert layout in PSD_CHUNK_LAYOUTS, "Not supported 'layout'."
+    src_layout, src_path = find_psd_chunk_file(dataset_path, 'fyx' if layout == 'yxf' else 'yxf')
+    dst_path = f"{dataset_path}{os.sep}{PSD_CHUNK_LAYOUTS[layout]}"
+    src = load_psd_chunk_array(dataset_path, src_layout, lazy=True)
+    y_div, x_div, bins = src.shape
+    dst_shape = (bins, y_div, x_div) if layout == 'fyx' else (y_div, x_div, bins)
+    tmp_path = dst_path + '.tmp'
+    dst = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=src.dtype, shape=dst_shape)
+    # Blocks of frequency bins keep both the source reads and the destination writes in long runs.
+    for f_start in range(0, bins, block_bins):
+        f_stop = min(f_start + block_bins, bins)
+        block = np.asarray(src[:, :, f_start:f_stop])
+        if layout == 'fyx':
+            dst[f_start:f_stop] = np.moveaxis(block, 2, 0)
+        else:
+            dst[:, :, f_start:f_stop] = block
+        if verbose:
+            print(f"{f_stop}/{bins} Completed.")
+        pass
+    dst.flush()
+    del dst, src
+    os.replace(tmp_path, dst_path)
+    if remove_source:
+        os.remove(src_path)
+    return dst_path
+
+
+def is_freq_major(psd_chunk: np.ndarray) -> bool:
+    return psd_chunk.ndim == 3 and psd_chunk.shape[2] > 1 and \
+        abs(psd_chunk.strides[2]) > max(abs(psd_chunk.strides[0]), abs(psd_chunk.strides[1]))
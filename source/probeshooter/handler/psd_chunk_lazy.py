@@ -0,0 +1,252 @@
+#  Copyright (c) 2025 Daehyeon Bae
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+import numpy as np
+from typing import Union, Optional, Callable
+from ..aiming.filter import simple_2d_filter_stack
+
+
+__all__ = [
+    'LazyPSDChunk'
+]
+
+
+# Operations that reduce over the frequency axis; all others act on each frequency plane independently.
+_REDUCE_OPS = ['sum', 'mean', 'max', 'min']
+
+
+class LazyPSDChunk:
+    # Records operations on a PSD chunk (see 'PSDChunk.lazy()') and runs them on 'compute()'. Every operation
+    # either works plane by plane or reduces over frequency, so the plan runs block by block over the selected bins:
+    #   - frequency selections are composed and applied first (only the needed bins are ever read),
+    #   - the dBm conversion is moved after rotations / crops (up to the next filter or reduction), and after a
+    #     max / min reduction (it is monotonic),
+    #   - reductions are accumulated per block; the full-size intermediate chunk is never materialized.
+    # Peak memory is about Y x X x 'block_bins' (plus the result).
+    def __init__(self,
+                 psd_chunk: np.ndarray,
+                 freq: np.ndarray,
+                 metadata: dict,
+                 identifier: str,
+                 chunk_factory: Optional[Callable] = None,
+                 freq_idx: Optional[np.ndarray] = None,
+                 ops: tuple = ()):
+        self.__data = psd_chunk
+        self.__freq = freq
+        self.__metadata = metadata
+        self.__id = identifier
+        self.__chunk_factory = chunk_factory
+        self.__freq_idx = np.arange(len(freq)) if freq_idx is None else freq_idx
+        self.__ops = ops
+        pass
+
+    # ----- Frequency selection (composed; always applied first) -----
+    def parse_from_freq_range_closed(self,
+                                     lower_bound_hz: Optional[Union[float, int]],
+                                     upper_bound_hz: Optional[Union[float, int]]
+                                     ) -> 'LazyPSDChunk':
+        freq = self.freq
+        selector = np.ones(len(freq), dtype=np.bool_)
+        if lower_bound_hz is not None:
+            selector &= lower_bound_hz <= freq
+        if upper_bound_hz is not None:
+            selector &= freq <= upper_bound_hz
+        return self.parse_from_idx_list(np.nonzero(selector)[0])
+
+    def parse_from_nearest_freq_list(self,
+                                     target_freq_hz_list: Union[list, tuple, np.ndarray]
+                                     ) -> 'LazyPSDChunk':
+        freq = self.freq
+        nearest_idx = [int(np.argmin(np.abs(freq - t_hz))) for t_hz in target_freq_hz_list]
+        return self.parse_from_idx_list(nearest_idx)
+
+    def parse_from_idx_range_closed(self,
+                                    lower_bound_idx: Optional[int],
+                                    upper_bound_idx: Optional[int]
+                                    ) -> 'LazyPSDChunk':
+        lower_bound_idx = 0 if lower_bound_idx is None else lower_bound_idx
+        upper_bound_idx = len(self.__freq_idx) - 1 if upper_bound_idx is None else upper_bound_idx
+        return self.parse_from_idx_list(np.arange(lower_bound_idx, upper_bound_idx + 1))
+
+    def parse_from_idx_list(self, target_idx_list) -> 'LazyPSDChunk':
+        assert not self.is_reduced, "The frequency axis has already been reduced."
+        target_idx_list = np.asarray(target_idx_list, dtype=np.int64)
+        assert len(target_idx_list) > 0, "The frequency selection is empty."
+        assert np.all((0 <= target_idx_list) & (target_idx_list < len(self.__freq_idx)))
+        return self.__derive(freq_idx=self.__freq_idx[target_idx_list])
+
+    # ----- Plane operations -----
+    def convert_to_dbm_scale(self, correction: Union[int, float] = 30) -> 'LazyPSDChunk':
+        return self.__derive(op=('dbm', correction))
+
+    def rotate(self, rotate_90d: int) -> 'LazyPSDChunk':
+        return self.__derive(op=('rotate', rotate_90d % 4))
+
+    def crop(self,
+             y_slice: slice,
+             x_slice: slice
+             ) -> 'LazyPSDChunk':
+        return self.__derive(op=('crop', y_slice, x_slice))
+
+    def filter_2d(self,
+                  filter_type: str,
+                  filter_size_xy: (int, int),
+                  padding_mode: str = 'nearest'
+                  ) -> 'LazyPSDChunk':
+        assert filter_type in ['min', 'median', 'max', 'mean'], "Not supported 'filter_type'."
+        return self.__derive(op=('filter', filter_type, tuple(filter_size_xy), padding_mode))
+
+    # ----- Reductions over frequency (terminal) -----
+    def sum(self) -> 'LazyPSDChunk':
+        return self.__derive(op=('sum', ))
+
+    def mean(self) -> 'LazyPSDChunk':
+        return self.__derive(op=('mean', ))
+
+    def max(self) -> 'LazyPSDChunk':
+        return self.__derive(op=('max', ))
+
+    def min(self) -> 'LazyPSDChunk':
+        return self.__derive(op=('min', ))
+
+    # ----- Execution -----
+    def optimized_ops(self) -> list:
+        ops = list(self.__ops)
+        # dBm conversion is moved later, past the operations it commutes with.
+        changed = True
+        while changed:
+            changed = False
+            for i in range(len(ops) - 1):
+                if ops[i][0] == 'dbm' and (ops[i + 1][0] in ['rotate', 'crop', 'max', 'min']):
+                    ops[i], ops[i + 1] = ops[i + 1], ops[i]
+                    changed = True
+            pass
+        # Consecutive rotations are merged.
+        merged = []
+        for op in ops:
+            if op[0] == 'rotate' and merged and merged[-1][0] == 'rotate':
+                merged[-1] = ('rotate', (merged[-1][1] + op[1]) % 4)
+            else:
+                merged.append(op)
+        return [op for op in merged if not (op[0] == 'rotate' and op[1] == 0)]
+
+    def explain(self) -> str:
+        lines = [f"gather {len(self.__freq_idx)}/{len(self.__freq)} bins"]
+        for op in self.optimized_ops():
+            lines.append(' '.join(str(v) for v in op))
+        return '\n'.join(lines)
+
+    def compute(self,
+                block_bins: int = 256,
+                out_path: Optional[str] = None
+                ) -> np.ndarray:
+        # Y' x X' map if reduced, else Y' x X' x F' (written to a '.npy' memmap with 'out_path').
+        ops = self.optimized_ops()
+        reduce_at = next((i for i, op in enumerate(ops) if op[0] in _REDUCE_OPS), len(ops))
+        plane_ops, post_ops = ops[:reduce_at], ops[reduce_at:]
+        reduce_op = post_ops[0][0] if post_ops else None
+        n_bins = len(self.__freq_idx)
+        out, acc = None, None
+        for f_start in range(0, n_bins, block_bins):
+            f_stop = min(f_start + block_bins, n_bins)
+            block = self.__gather(self.__freq_idx[f_start:f_stop])
+            for op in plane_ops:
+                block = _apply_plane_op(block, op)
+            if reduce_op is None:
+                if out is None:
+                    shape = block.shape[:2] + (n_bins, )
+                    out = np.empty(shape, dtype=block.dtype) if out_path is None else \
+                        np.lib.format.open_memmap(out_path, mode='w+', dtype=block.dtype, shape=shape)
+                out[:, :, f_start:f_stop] = block
+            else:
+                if reduce_op in ['sum', 'mean']:
+                    partial = np.sum(block, axis=2, dtype=np.float64)
+                else:
+                    partial = getattr(np, reduce_op)(block, axis=2)
+                if acc is None:
+                    # Sums are accumulated in float64; max / min keep the chunk dtype (as np.max / np.min).
+                    acc = np.array(partial, dtype=np.float64 if reduce_op in ['sum', 'mean'] else None)
+                elif reduce_op in ['sum', 'mean']:
+                    acc += partial
+                else:
+                    acc = getattr(np, 'maximum' if reduce_op == 'max' else 'minimum')(acc, partial)
+            pass
+        if reduce_op is None:
+            if out_path is not None:
+                out.flush()
+            return out
+        if reduce_op == 'mean':
+            acc /= n_bins
+        # Operations moved past the reduction (map level).
+        for op in post_ops[1:]:
+            acc = _apply_plane_op(acc[:, :, np.newaxis], op)[:, :, 0]
+        return acc
+
+    def to_psd_chunk(self,
+                     block_bins: int = 256,
+                     out_path: Optional[str] = None):
+        assert not self.is_reduced, "A reduced expression is a map; use 'compute()'."
+        assert self.__chunk_factory is not None
+        r = self.__chunk_factory(self.__id, self.compute(block_bins, out_path), self.freq, self.__metadata)
+        r.original = False
+        return r
+
+    def __derive(self, freq_idx: Optional[np.ndarray] = None, op: Optional[tuple] = None) -> 'LazyPSDChunk':
+        assert not self.is_reduced, "The expression has already been reduced over frequency."
+        return LazyPSDChunk(self.__data, self.__freq, self.__metadata, self.__id, self.__chunk_factory,
+                            self.__freq_idx if freq_idx is None else freq_idx,
+                            self.__ops if op is None else self.__ops + (op, ))
+
+    def __gather(self, idx: np.ndarray) -> np.ndarray:
+        # A consecutive run is sliced (contiguous planes of a frequency-major chunk), anything else gathered.
+        if len(idx) > 1 and np.all(np.diff(idx) == 1):
+            return np.asarray(self.__data[:, :, idx[0]:idx[-1] + 1])
+        return np.asarray(self.__data[:, :, idx])
+
+    @property
+    def freq(self) -> np.ndarray:
+        return self.__freq[self.__freq_idx]
+
+    @property
+    def ops(self) -> tuple:
+        return self.__ops
+
+    @property
+    def is_reduced(self) -> bool:
+        return any(op[0] in _REDUCE_OPS for op in self.__ops)
+
+    def __repr__(self):
+        return f"LazyPSDChunk({self.__id}):\n{self.explain()}"
+    pass
+
+
+def _apply_plane_op(block: np.ndarray, op: tuple) -> np.ndarray:
+    # block: Y x X x b
+    name = op[0]
+    if name == 'dbm':
+        return 10 * np.log10(block) + op[1]
+    elif name == 'rotate':
+        return np.rot90(block, k=op[1], axes=(0, 1))
+    elif name == 'crop':
+        return block[op[1], op[2]]
+    elif name == 'filter':
+        return simple_2d_filter_stack(np.ascontiguousarray(block), op[1], op[2], padding_mode=op[3],
+                                      n_workers=1)
+    assert False, f"Unknown operation '{name}'."
@@ -0,0 +1,122 @@
+#  Copyright (c) 2025 Daehyeon Bae
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+import os
+import ast
+import json
+import numpy as np
+from .psd_chunk_layout import find_psd_chunk_file
+
+
+__all__ = [
+    'META_JSON_FILE_NAME',
+    'META_TXT_FILE_NAME',
+    'read_psd_chunk_metadata',
+    'write_psd_chunk_metadata',
+    'read_npy_header',
+    'inspect_psd_chunk'
+]
+
+
+META_JSON_FILE_NAME = 'meta.json'
+META_TXT_FILE_NAME = 'meta.txt'  # legacy, str(dict)
+
+
+def read_psd_chunk_metadata(dataset_path: str) -> dict:
+    json_path = f"{dataset_path}{os.sep}{META_JSON_FILE_NAME}"
+    if os.path.exists(json_path):
+        with open(json_path, 'r') as fp:
+            return json.load(fp)
+    with open(f"{dataset_path}{os.sep}{META_TXT_FILE_NAME}", 'r') as fp:
+        r = fp.readline().strip()
+    try:
+        return ast.literal_eval(r)
+    except (ValueError, SyntaxError):
+        # Older files may hold numpy scalar reprs, e.g., 'np.float64(...)'.
+        return eval(r, {'__builtins__': {}, 'np': np, 'numpy': np, 'nan': np.nan, 'inf': np.inf})
+
+
+def write_psd_chunk_metadata(dataset_path: str,
+                             metadata: dict,
+                             legacy_txt: bool = True
+                             ) -> None:
+    with open(f"{dataset_path}{os.sep}{META_JSON_FILE_NAME}", 'w') as fp:
+        json.dump(metadata, fp, indent=2, default=_to_json_compatible)
+    if legacy_txt:
+        with open(f"{dataset_path}{os.sep}{META_TXT_FILE_NAME}", 'w') as fp:
+            fp.write(str(metadata))
+    pass
+
+
+def read_npy_header(npy_path: str) -> (tuple, bool, np.dtype, int):
+    # Reads only the '.npy' header: (shape, fortran_order, dtype, data offset).
+    with open(npy_path, 'rb') as fp:
+        version = np.lib.format.read_magic(fp)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(fp)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(fp)
+        return shape, fortran_order, dtype, fp.tell()
+
+
+def inspect_psd_chunk(dataset_path: str,
+                      verbose: bool = False
+                      ) -> dict:
+    # Shape, frequency range, RBW, bins and size without reading the PSD data.
+    layout, chunk_path = find_psd_chunk_file(dataset_path)
+    stored_shape, _, dtype, _ = read_npy_header(chunk_path)
+    shape = (stored_shape[1], stored_shape[2], stored_shape[0]) if layout == 'fyx' else tuple(stored_shape)
+    freq = np.load(f"{dataset_path}{os.sep}freq.npy", mmap_mode='r')
+    try:
+        metadata = read_psd_chunk_metadata(dataset_path)
+    except (OSError, ValueError, SyntaxError):
+        metadata = {}
+    r = {
+        'path': os.path.abspath(dataset_path),
+        'identifier': os.path.basename(os.path.normpath(dataset_path)),
+        'layout': layout,
+        'shape': shape,
+        'y_div': shape[0],
+        'x_div': shape[1],
+        'bins': shape[2],
+        'dtype': dtype.str,
+        'nbytes': int(np.prod(shape)) * dtype.itemsize,
+        'freq_min': float(freq[0]) if len(freq) > 0 else None,
+        'freq_max': float(freq[-1]) if len(freq) > 0 else None,
+        'rbw': metadata.get('rbw'),
+        'vbw': metadata.get('vbw'),
+        'bands': metadata.get('bands'),
+        'metadata': metadata
+    }
+    if verbose:
+        print(f"[ PSD Chunk Header ] - {r['identifier']}")
+        print(f"* Shape      : X(↔): {r['x_div']}, Y(↕): {r['y_div']}, Freq: {r['bins']} ({layout})")
+        print(f"* Freq. Range: {r['freq_min']}Hz ~ {r['freq_max']}Hz")
+        print(f"* RBW        : {r['rbw']}Hz")
+        print(f"* Chunk size : {r['nbytes'] / 1e9:.3f}GiB")
+    return r
+
+
+def _to_json_compatible(obj):
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
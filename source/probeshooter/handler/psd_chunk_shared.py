@@ -0,0 +1,166 @@
+#  Copyright (c) 2025 Daehyeon Bae
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+import numpy as np
+from typing import NamedTuple, Optional
+from multiprocessing.shared_memory import SharedMemory
+from .psd_chunk_dtype import PSDChunk
+from .psd_chunk_layout import is_freq_major
+
+
+__all__ = [
+    'SharedPSDChunkHandle',
+    'SharedPSDChunk',
+    'AttachedPSDChunk',
+    'attach_shared_psd_chunk'
+]
+
+
+class SharedPSDChunkHandle(NamedTuple):
+    # Small and picklable; pass it to the workers (e.g., as a 'multiprocessing.Pool' initializer argument).
+    shm_name: str
+    identifier: str
+    shape: tuple
+    dtype: str
+    freq_major: bool
+    n_freq: int
+    metadata: dict
+    freq_dtype: str = '<f8'
+
+
+class SharedPSDChunk:
+    # Owner side. Copies the chunk (data + freq) into one shared memory segment once; the segment is
+    # unlinked on 'close()' (or at the end of a 'with' block), after which no new worker can attach.
+    def __init__(self,
+                 psd_chunk: PSDChunk,
+                 name: Optional[str] = None,
+                 block_bins: int = 1024):
+        data = psd_chunk.data
+        freq = np.asarray(psd_chunk.freq)
+        freq_major = is_freq_major(data) if isinstance(data, np.ndarray) else False
+        y_div, x_div, bins = psd_chunk.shape
+        stored_shape = (bins, y_div, x_div) if freq_major else (y_div, x_div, bins)
+        freq_offset = _freq_offset(int(np.prod(stored_shape)) * data.dtype.itemsize)
+        self.__shm = SharedMemory(name=name, create=True, size=freq_offset + freq.nbytes)
+        shared_data, shared_freq = None, None
+        try:
+            shared_data = np.ndarray(stored_shape, dtype=data.dtype, buffer=self.__shm.buf)
+            shared_freq = np.ndarray(freq.shape, dtype=freq.dtype, buffer=self.__shm.buf, offset=freq_offset)
+            # Blockwise copy, so a memory-mapped chunk is never fully materialized in private memory.
+            for f_start in range(0, bins, block_bins):
+                f_stop = min(f_start + block_bins, bins)
+                block = np.asarray(data[:, :, f_start:f_stop])
+                if freq_major:
+                    shared_data[f_start:f_stop] = np.moveaxis(block, 2, 0)
+                else:
+                    shared_data[:, :, f_start:f_stop] = block
+                pass
+            shared_freq[:] = freq
+        except BaseException:
+            # The new segment would outlive the process otherwise; the views must go before it can be closed.
+            del shared_data, shared_freq
+            self.__shm.close()
+            self.__shm.unlink()
+            self.__shm = None
+            raise
+        del shared_data, shared_freq
+        self.__handle = SharedPSDChunkHandle(shm_name=self.__shm.name,
+                                             identifier=psd_chunk.identifier,
+                                             shape=psd_chunk.shape,
+                                             dtype=data.dtype.str,
+                                             freq_major=freq_major,
+                                             n_freq=len(freq),
+                                             metadata=dict(psd_chunk.metadata),
+                                             freq_dtype=freq.dtype.str)
+        pass
+
+    def close(self) -> None:
+        if getattr(self, '_SharedPSDChunk__shm', None) is None:
+            return
+        self.__shm.close()
+        self.__shm.unlink()
+        self.__shm = None
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        pass
+
+    def __del__(self):
+        self.close()
+        pass
+
+    @property
+    def handle(self) -> SharedPSDChunkHandle:
+        return self.__handle
+
+    @property
+    def name(self) -> str:
+        return self.__handle.shm_name
+    pass
+
+
+class AttachedPSDChunk(PSDChunk):
+    # Worker side. A read-only, zero-copy PSDChunk over the owner's segment; 'detach()' only closes the
+    # local mapping (the owner remains responsible for unlinking).
+    def __init__(self, handle: SharedPSDChunkHandle):
+        self.__shm = SharedMemory(name=handle.shm_name, create=False, track=False)
+        y_div, x_div, bins = handle.shape
+        stored_shape = (bins, y_div, x_div) if handle.freq_major else (y_div, x_div, bins)
+        dtype = np.dtype(handle.dtype)
+        freq_offset = _freq_offset(int(np.prod(stored_shape)) * dtype.itemsize)
+        data = np.ndarray(stored_shape, dtype=dtype, buffer=self.__shm.buf)
+        freq = np.ndarray((handle.n_freq, ), dtype=np.dtype(handle.freq_dtype), buffer=self.__shm.buf,
+                          offset=freq_offset)
+        data.flags.writeable = False
+        freq.flags.writeable = False
+        if handle.freq_major:
+            data = np.moveaxis(data, 0, 2)
+        super().__init__(handle.identifier, data, freq, handle.metadata)
+        pass
+
+    def detach(self) -> None:
+        if self.__shm is None:
+            return
+        # Drop the array references first; the buffer cannot be released while exported.
+        PSDChunk.__init__(self, self.identifier, np.empty((0, 0, 0)), np.empty((0, )), self.metadata)
+        self.__shm.close()
+        self.__shm = None
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.detach()
+        pass
+    pass
+
+
+def attach_shared_psd_chunk(handle: SharedPSDChunkHandle) -> AttachedPSDChunk:
+    return AttachedPSDChunk(handle)
+
+
+def _freq_offset(data_nbytes: int) -> int:
+    # The frequency axis follows the data, aligned to 16 bytes (e.g., after an odd number of float32 values).
+    return -(-data_nbytes // 16) * 16
@@ -0,0 +1,282 @@
+#  Copyright (c) 2025 Daehyeon Bae
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+import os
+import numpy as np
+from typing import Union, Optional, Sequence
+from .psd_chunk_dtype import PSDChunk
+from .psd_chunk_layout import load_psd_chunk_array
+from .psd_chunk_metadata import read_psd_chunk_metadata, write_psd_chunk_metadata
+from ..aiming.aiming import aim_points_extraction
+from ..aiming.filter import simple_2d_filter
+from ..aiming.finder import find_top_n_percent_loc_2d
+
+
+__all__ = [
+    'PSD_ZSTACK_FILE_NAME',
+    'Z_POSITIONS_FILE_NAME',
+    'PSDChunkZStack',
+    'create_psd_zstack',
+    'stack_psd_chunks',
+    'load_psd_zstack'
+]
+
+
+PSD_ZSTACK_FILE_NAME = 'psd_zstack.npy'  # Z x Y x X x F
+Z_POSITIONS_FILE_NAME = 'z_positions.npy'
+
+
+class PSDChunkZStack:
+    # PSD chunks of several probe heights sharing one frequency axis. Each height is a contiguous Y x X x F block
+    # of the (memory-mapped) 4D array, so a height is read without touching the others, and cross-height
+    # reductions run row-blockwise (all heights of a few rows at a time).
+    def __init__(self,
+                 identifier: str,
+                 psd_zstack: np.ndarray,
+                 freq: np.ndarray,
+                 z_positions: Union[list, tuple, np.ndarray],
+                 metadata: dict
+                 ):
+        assert psd_zstack.ndim == 4 and psd_zstack.shape[0] == len(z_positions) and psd_zstack.shape[3] == len(freq)
+        self.__data = psd_zstack
+        self.__freq = freq
+        self.__z_positions = np.asarray(z_positions)
+        self.__metadata = metadata
+        self.__id = identifier
+        pass
+
+    def height(self, z_idx: int) -> PSDChunk:
+        # Zero-copy PSDChunk of one height; the usual parse_* / filtering API applies.
+        metadata = dict(self.__metadata)
+        metadata['pos_down_z'] = self.__z_positions[z_idx].item()
+        return PSDChunk(f"{self.__id}@z={metadata['pos_down_z']}", self.__data[z_idx], self.__freq, metadata)
+
+    def __getitem__(self, z_idx: int) -> PSDChunk:
+        return self.height(z_idx)
+
+    def __len__(self):
+        return self.__data.shape[0]
+
+    def nearest_freq_maps(self,
+                          target_freq_hz_list: Union[list, tuple, np.ndarray],
+                          reduce: Optional[str] = 'mean'
+                          ) -> np.ndarray:
+        # Z x Y x X maps (reduce='mean' / 'sum' / 'max' over the targets), or Z x Y x X x K with reduce=None.
+        # Only the selected bins of each height are read.
+        assert reduce in [None, 'mean', 'sum', 'max'], "Not supported 'reduce'."
+        r = []
+        for z_idx in range(len(self)):
+            m = np.asarray(self.height(z_idx).parse_from_nearest_freq_list(target_freq_hz_list, view=True).data)
+            r.append(m if reduce is None else getattr(np, reduce)(m, axis=2))
+            pass
+        return np.stack(r)
+
+    def band_maps(self,
+                  lower_bound_hz: Union[float, int],
+                  upper_bound_hz: Union[float, int],
+                  reduce: str = 'mean'
+                  ) -> Optional[np.ndarray]:
+        # Z x Y x X maps of a closed frequency range, reduced over the bins.
+        assert reduce in ['mean', 'sum', 'max'], "Not supported 'reduce'."
+        idx = np.nonzero((lower_bound_hz <= self.__freq) & (self.__freq <= upper_bound_hz))[0]
+        if len(idx) == 0:
+            return None
+        return np.stack([getattr(np, reduce)(self.__data[z_idx, :, :, idx[0]:idx[-1] + 1], axis=2)
+                         for z_idx in range(len(self))])
+
+    def reduce_over_z(self,
+                      op: str = 'max',
+                      block_rows: int = 1,
+                      out_path: Optional[str] = None
+                      ) -> np.ndarray:
+        # Y x X x F reduction over the heights ('max', 'min', 'mean' or 'argmax' (height index)), computed on
+        # 'block_rows' rows of every height at a time. With 'out_path', the result is written to a '.npy' memmap.
+        assert op in ['max', 'min', 'mean', 'argmax'], "Not supported 'op'."
+        _, y_div, x_div, bins = self.__data.shape
+        dtype = np.int16 if op == 'argmax' else (np.float64 if op == 'mean' else self.__data.dtype)
+        out = np.empty((y_div, x_div, bins), dtype=dtype) if out_path is None else \
+            np.lib.format.open_memmap(out_path, mode='w+', dtype=dtype, shape=(y_div, x_div, bins))
+        for y_start in range(0, y_div, block_rows):
+            y_stop = min(y_start + block_rows, y_div)
+            out[y_start:y_stop] = getattr(np, op)(np.asarray(self.__data[:, y_start:y_stop]), axis=0)
+            pass
+        if out_path is not None:
+            out.flush()
+        return out
+
+    def max_over_z(self,
+                   block_rows: int = 1,
+                   out_path: Optional[str] = None
+                   ) -> PSDChunk:
+        metadata = dict(self.__metadata)
+        metadata['reduced_over_z'] = 'max'
+        return PSDChunk(f"{self.__id}@max_z", self.reduce_over_z('max', block_rows, out_path), self.__freq, metadata)
+
+    def gradient_over_z(self,
+                        target_freq_hz_list: Optional[Union[list, tuple, np.ndarray]] = None,
+                        block_rows: int = 1,
+                        out_path: Optional[str] = None
+                        ) -> np.ndarray:
+        # d(PSD)/dz over the (possibly non-uniform) heights: Z x Y x X for the mean map of the target frequencies,
+        # or the full Z x Y x X x F (row-blockwise; use 'out_path' for large stacks) without targets.
+        assert len(self) > 1, "At least two heights are required."
+        if target_freq_hz_list is not None:
+            return np.gradient(self.nearest_freq_maps(target_freq_hz_list, 'mean'), self.__z_positions, axis=0)
+        shape = self.__data.shape
+        out = np.empty(shape, dtype=np.float64) if out_path is None else \
+            np.lib.format.open_memmap(out_path, mode='w+', dtype=np.float64, shape=shape)
+        for y_start in range(0, shape[1], block_rows):
+            y_stop = min(y_start + block_rows, shape[1])
+            out[:, y_start:y_stop] = np.gradient(np.asarray(self.__data[:, y_start:y_stop], dtype=np.float64),
+                                                 self.__z_positions, axis=0)
+            pass
+        if out_path is not None:
+            out.flush()
+        return out
+
+    def aim_per_height(self,
+                       target_freq_hz_list: Union[list, tuple, np.ndarray],
+                       filter_chain: Sequence = (('median', (3, 3)), ('mean', (3, 3))),
+                       percentile: float = 0.9,
+                       top_n: Union[int, float] = 0.05,
+                       dbscan_min_samples: int = 5,
+                       dbscan_eps: float = 1.5
+                       ) -> list:
+        # Aiming on the mean map of the target frequencies, independently for every height.
+        r = []
+        for z_idx, m in enumerate(self.nearest_freq_maps(target_freq_hz_list, 'mean')):
+            for filter_type, filter_size_xy in filter_chain:
+                m = simple_2d_filter(m, filter_type, filter_size_xy)
+            result = aim_points_extraction(combined_leakage_map_2d=m,
+                                           hump_mask_xy_list=find_top_n_percent_loc_2d(m, percentile),
+                                           top_n=top_n, dbscan_min_samples=dbscan_min_samples,
+                                           dbscan_eps=dbscan_eps)
+            result['pos_down_z'] = self.__z_positions[z_idx].item()
+            result['leakage_map'] = m
+            r.append(result)
+            pass
+        return r
+
+    def rotate(self, rotate_90d: int) -> 'PSDChunkZStack':
+        # Lazy (strided view); the spatial axes of every height are rotated.
+        if rotate_90d % 4 == 0:
+            return self
+        return PSDChunkZStack(self.__id, np.rot90(self.__data, k=rotate_90d, axes=(1, 2)), self.__freq,
+                              self.__z_positions, self.__metadata)
+
+    @property
+    def data(self):
+        return self.__data
+
+    @property
+    def freq(self):
+        return self.__freq
+
+    @property
+    def z_positions(self):
+        return self.__z_positions
+
+    @property
+    def metadata(self):
+        return self.__metadata
+
+    @property
+    def identifier(self):
+        return self.__id
+
+    @property
+    def shape(self):
+        return self.__data.shape
+
+    @property
+    def n_heights(self):
+        return self.__data.shape[0]
+
+    def __repr__(self):
+        return self.__id
+    pass
+
+
+def create_psd_zstack(dataset_path: str,
+                      z_positions: Union[list, tuple, np.ndarray],
+                      grid_y_div: int,
+                      grid_x_div: int,
+                      freq: np.ndarray,
+                      dtype: Union[str, np.dtype] = np.float32,
+                      metadata: Optional[dict] = None
+                      ) -> np.ndarray:
+    # Pre-allocates the Z x Y x X x F memmap (e.g., for acquisition height by height) and writes the sidecars.
+    os.makedirs(dataset_path, exist_ok=True)
+    np.save(f"{dataset_path}{os.sep}freq.npy", np.asarray(freq))
+    np.save(f"{dataset_path}{os.sep}{Z_POSITIONS_FILE_NAME}", np.asarray(z_positions))
+    metadata = dict(metadata) if metadata is not None else {}
+    metadata['z_positions'] = np.asarray(z_positions).tolist()
+    write_psd_chunk_metadata(dataset_path, metadata)
+    return np.lib.format.open_memmap(f"{dataset_path}{os.sep}{PSD_ZSTACK_FILE_NAME}", mode='w+', dtype=dtype,
+                                     shape=(len(z_positions), grid_y_div, grid_x_div, len(freq)))
+
+
+def stack_psd_chunks(dataset_path_list: Sequence[str],
+                     z_positions: Union[list, tuple, np.ndarray],
+                     out_dataset_path: str,
+                     block_rows: int = 8,
+                     verbose: bool = False
+                     ) -> 'PSDChunkZStack':
+    # Builds a Z-stack from per-height datasets (e.g., one acquisition per POS_DOWN_Z), copying row-blockwise.
+    assert len(dataset_path_list) == len(z_positions) > 0
+    freq = np.load(f"{dataset_path_list[0]}{os.sep}freq.npy")
+    first = load_psd_chunk_array(dataset_path_list[0], lazy=True)
+    try:
+        metadata = read_psd_chunk_metadata(dataset_path_list[0])
+    except (OSError, ValueError, SyntaxError):
+        metadata = {}
+    metadata.pop('pos_down_z', None)
+    out = create_psd_zstack(out_dataset_path, z_positions, first.shape[0], first.shape[1], freq, first.dtype,
+                            metadata)
+    del first
+    for z_idx, path in enumerate(dataset_path_list):
+        src = load_psd_chunk_array(path, lazy=True)
+        src_freq = np.load(f"{path}{os.sep}freq.npy")
+        if src.shape != out.shape[1:] or len(src_freq) != len(freq) or not np.allclose(src_freq, freq):
+            raise ValueError(f"'{path}' does not match the grid or the frequency axis of the first dataset.")
+        for y_start in range(0, src.shape[0], block_rows):
+            out[z_idx, y_start:y_start + block_rows] = src[y_start:y_start + block_rows]
+        del src
+        if verbose:
+            print(f"[Z-stack] z={z_positions[z_idx]}: '{path}'")
+        pass
+    out.flush()
+    del out
+    return load_psd_zstack(out_dataset_path)
+
+
+def load_psd_zstack(dataset_path: str,
+                    rotate_90d: int = 0,
+                    lazy: bool = True
+                    ) -> PSDChunkZStack:
+    psd_zstack = np.load(f"{dataset_path}{os.sep}{PSD_ZSTACK_FILE_NAME}", mmap_mode='r' if lazy else None)
+    freq = np.load(f"{dataset_path}{os.sep}freq.npy")
+    z_positions = np.load(f"{dataset_path}{os.sep}{Z_POSITIONS_FILE_NAME}")
+    try:
+        metadata = read_psd_chunk_metadata(dataset_path)
+    except (OSError, ValueError, SyntaxError):
+        metadata = {}
+    identifier = dataset_path.split(os.sep)[-1]
+    return PSDChunkZStack(identifier, psd_zstack, freq, z_positions, metadata).rotate(rotate_90d)
@@ -0,0 +1,68 @@
+import unittest
+import numpy as np
+from scipy.ndimage import gaussian_filter
+from sklearn.cluster import DBSCAN
+from probeshooter.aiming import grid_dbscan, cluster_points, aim_points_extraction, find_top_n_percent_loc_2d
+
+
+def random_leakage_map(rng, size):
+    # Smooth humps on noise, similar to a filtered leakage map.
+    return gaussian_filter(rng.random((size, size)), sigma=rng.uniform(1, 4))
+
+
+class GridDBSCANParityTest(unittest.TestCase):
+    # 'grid_dbscan' must return the labels of sklearn's DBSCAN (numbering included) on distinct grid points.
+    MAP_SIZES = [(101, 10), (201, 5), (401, 2), (1001, 1)]  # (size, number of random maps)
+    PERCENTILES = [0.9, 0.95]
+    EPS_LIST = [1.0, 1.5]
+    MIN_SAMPLES_LIST = [3, 5, 9]
+
+    def test_labels(self):
+        rng = np.random.default_rng(0)
+        for size, n_maps in self.MAP_SIZES:
+            for _ in range(n_maps):
+                m = random_leakage_map(rng, size)
+                for percentile in self.PERCENTILES:
+                    pts = find_top_n_percent_loc_2d(m, percentile)
+                    for pts_case in [pts, pts[rng.permutation(len(pts))]]:
+                        for eps in self.EPS_LIST:
+                            for min_samples in self.MIN_SAMPLES_LIST:
+                                with self.subTest(size=size, percentile=percentile, eps=eps,
+                                                  min_samples=min_samples):
+                                    expected = DBSCAN(eps=eps, min_samples=min_samples).fit_predict(pts_case)
+                                    np.testing.assert_array_equal(grid_dbscan(pts_case, eps, min_samples), expected)
+        pass
+
+    def test_aim_points(self):
+        rng = np.random.default_rng(1)
+        for size, _ in self.MAP_SIZES[:3]:
+            m = random_leakage_map(rng, size)
+            pts = find_top_n_percent_loc_2d(m, 0.9)
+            r_grid = aim_points_extraction(m, pts, clustering_backend='grid')
+            r_dbscan = aim_points_extraction(m, pts, clustering_backend='dbscan')
+            np.testing.assert_array_equal(np.array(r_grid['final_pt_xy']), np.array(r_dbscan['final_pt_xy']))
+        pass
+
+    def test_auto_backend_falls_back(self):
+        # Duplicated or non-integral points are not a grid; 'auto' must use sklearn for them.
+        for pts in [np.array([[0, 0], [0, 0], [0, 1], [1, 0], [1, 1]]),
+                    np.array([[0, 0], [0.5, 0], [0, 1], [1, 0], [1, 1]])]:
+            np.testing.assert_array_equal(cluster_points(pts, 1.5, 5, 'auto'),
+                                          DBSCAN(eps=1.5, min_samples=5).fit_predict(pts))
+        pass
+
+    def test_grid_rejects_non_grid_points(self):
+        with self.assertRaises(AssertionError):
+            grid_dbscan(np.array([[0, 0], [0, 0], [0, 1], [1, 0], [1, 1]]), 1.5, 5)
+        with self.assertRaises(AssertionError):
+            grid_dbscan(np.array([[0, 0], [0.5, 0], [0, 1], [1, 0], [1, 1]]), 1.5, 5)
+        pass
+
+    def test_empty(self):
+        self.assertEqual(len(grid_dbscan(np.zeros((0, 2), dtype=np.int64))), 0)
+        pass
+    pass
+
+
+if __name__ == '__main__':
+    unittest.main()
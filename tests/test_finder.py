@@ -0,0 +1,94 @@
+import unittest
+import numpy as np
+from probeshooter.aiming import calc_top_n_percentile_value, calc_top_n_percentile_values, \
+    calc_top_n_percentile_values_approx, calc_top_n_percentile_values_batch, PercentileHistogram, \
+    find_top_n_percent_loc_2d, find_top_n_percent_masks_2d
+
+
+def sorted_percentile_value(arr, percentile):
+    # The former sort-based rule (valid while ceil(percentile * n) < n).
+    sorted_flat_arr = np.sort(np.ravel(arr))
+    return float(sorted_flat_arr[int(np.ceil(percentile * len(sorted_flat_arr)))])
+
+
+class PercentileValueTest(unittest.TestCase):
+    PERCENTILES = [0, 0.25, 0.5, 0.75, 0.81, 0.9, 0.95, 0.99]
+
+    def test_matches_sort(self):
+        rng = np.random.default_rng(0)
+        for shape in [(10, 10), (101, 101)]:
+            for arr in [rng.random(shape).astype(np.float32), rng.integers(0, 5, shape)]:
+                expected = [sorted_percentile_value(arr, p) for p in self.PERCENTILES]
+                with self.subTest(shape=shape, dtype=arr.dtype):
+                    self.assertEqual([calc_top_n_percentile_value(arr, p) for p in self.PERCENTILES], expected)
+                    np.testing.assert_array_equal(calc_top_n_percentile_values(arr, self.PERCENTILES), expected)
+        pass
+
+    def test_percentile_one_is_max(self):
+        rng = np.random.default_rng(1)
+        for shape in [(1, 1), (7, 13), (101, 101)]:
+            arr = rng.random(shape)
+            with self.subTest(shape=shape):
+                self.assertEqual(calc_top_n_percentile_value(arr, 1), arr.max())
+                self.assertEqual(calc_top_n_percentile_values(arr, [0.5, 1])[1], arr.max())
+                self.assertEqual(calc_top_n_percentile_values_batch(arr[np.newaxis], 1)[0], arr.max())
+                np.testing.assert_array_equal(find_top_n_percent_loc_2d(arr, 1),
+                                              np.argwhere(arr == arr.max())[:, [1, 0]])
+        # ceil(0.99 * 91) = 91 also indexed past the end.
+        arr = rng.random((7, 13))
+        self.assertEqual(calc_top_n_percentile_value(arr, 0.99), arr.max())
+        pass
+
+    def test_masks(self):
+        rng = np.random.default_rng(2)
+        arr = rng.random((31, 17))
+        thresholds, masks = find_top_n_percent_masks_2d(arr, self.PERCENTILES + [1])
+        for p, threshold, mask in zip(self.PERCENTILES + [1], thresholds, masks):
+            with self.subTest(percentile=p):
+                self.assertEqual(threshold, calc_top_n_percentile_value(arr, p))
+                np.testing.assert_array_equal(np.argwhere(mask)[:, [1, 0]], find_top_n_percent_loc_2d(arr, p))
+        pass
+
+    def test_batch(self):
+        rng = np.random.default_rng(3)
+        maps = rng.random((20, 25, 25))
+        percentiles = rng.choice(self.PERCENTILES + [1], size=len(maps))
+        expected = [calc_top_n_percentile_value(m, p) for m, p in zip(maps, percentiles)]
+        np.testing.assert_array_equal(calc_top_n_percentile_values_batch(maps, percentiles), expected)
+        pass
+
+    def test_approx_error(self):
+        # The histogram value is within one bin width of the exact value.
+        rng = np.random.default_rng(4)
+        n_bins = 256
+        maps = rng.normal(size=(40, 33, 33)) * rng.uniform(0.1, 10, size=(40, 1, 1))
+        for p in self.PERCENTILES + [1]:
+            exact = calc_top_n_percentile_values_batch(maps, p)
+            approx = calc_top_n_percentile_values_approx(maps, p, n_bins=n_bins, block_maps=7)
+            width = (maps.max(axis=(1, 2)) - maps.min(axis=(1, 2))) / n_bins
+            with self.subTest(percentile=p):
+                self.assertTrue(np.all(np.abs(approx - exact) <= width))
+        constant = np.ones((2, 5, 5))
+        np.testing.assert_array_equal(calc_top_n_percentile_values_approx(constant, 0.9), [1, 1])
+        pass
+
+    def test_histogram_merge(self):
+        rng = np.random.default_rng(5)
+        values = rng.random(10000)
+        whole = PercentileHistogram(0, 1, n_bins=512)
+        whole.update(values)
+        parts = [PercentileHistogram(0, 1, n_bins=512) for _ in range(4)]
+        for part, chunk in zip(parts, np.array_split(values, 4)):
+            part.update(chunk)
+        for part in parts[1:]:
+            parts[0].merge(part)
+        np.testing.assert_array_equal(parts[0].counts, whole.counts)
+        for p in self.PERCENTILES + [1]:
+            with self.subTest(percentile=p):
+                self.assertEqual(parts[0].value(p), whole.value(p))
+                self.assertLessEqual(abs(whole.value(p) - calc_top_n_percentile_value(values, p)), 1 / 512)
+        pass
+
+
+if __name__ == '__main__':
+    unittest.main()
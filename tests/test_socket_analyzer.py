@@ -0,0 +1,42 @@
+import unittest
+import numpy as np
+from dummy_hardware_api import MockSpectrumAnalyzerServer, SocketSpectrumAnalyzer
+
+
+class SocketSpectrumAnalyzerTest(unittest.TestCase):
+    # 'SocketSpectrumAnalyzer' against the loopback mock instrument.
+    def connect(self, server, binary=True):
+        sa = SocketSpectrumAnalyzer(binary=binary, query_timeout_s=10)
+        sa.connect(*server.address)
+        self.addCleanup(sa.disconnect)
+        return sa
+
+    def test_psd(self):
+        with MockSpectrumAnalyzerServer() as server:
+            for binary in [True, False]:
+                with self.subTest(binary=binary):
+                    sa = self.connect(server, binary)
+                    sa.set_params(1e9, 1.1e9, 1e5, 1001)
+                    sa.trigger_single_sweep()
+                    freq, psd = sa.get_psd()
+                    np.testing.assert_array_equal(freq, np.linspace(1e9, 1.1e9, 1001))
+                    self.assertEqual(psd.shape, (1001, ))
+                    freq, psd = sa.get_psd_averaged(3)
+                    self.assertEqual(psd.shape, (1001, ))
+        pass
+
+    def test_coerced_bins(self):
+        # The frequency axis follows the point count the instrument actually uses.
+        with MockSpectrumAnalyzerServer(max_bins=501) as server:
+            sa = self.connect(server)
+            sa.set_params(1e9, 1.1e9, 1e5, 1001)
+            sa.trigger_single_sweep()
+            freq, psd = sa.get_psd()
+            np.testing.assert_array_equal(freq, np.linspace(1e9, 1.1e9, 501))
+            self.assertEqual(len(psd), len(freq))
+            self.assertEqual(sa.get_status_dict()['bins'], 501)
+        pass
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from probeshooter.acquisition import PROGRESS_FILE_NAME, PSDChunkWriter
+from probeshooter.handler.psd_chunk_handler import load_psd_chunk
+from probeshooter.handler.psd_chunk_metadata import read_psd_chunk_metadata
+
+
+Y_DIV, X_DIV, BINS = 5, 7, 16
+
+
+def sweep_psd(id_y, id_x):
+    return np.arange(BINS, dtype=np.float32) + 100 * id_y + id_x
+
+
+class PSDChunkWriterTest(unittest.TestCase):
+    # Crash / resume / finalize cycle of the streaming writer.
+    def setUp(self):
+        self.__tmp = tempfile.TemporaryDirectory()
+        self.dataset_path = f"{self.__tmp.name}{os.sep}dataset"
+        self.freq = np.linspace(1e6, 2e6, BINS)
+        self.points = [(y, x) for y in range(Y_DIV) for x in range(X_DIV)]
+        pass
+
+    def tearDown(self):
+        self.__tmp.cleanup()
+        pass
+
+    def test_resume_and_finalize(self):
+        n_first = 12
+        writer = PSDChunkWriter(self.dataset_path, Y_DIV, X_DIV, BINS, flush_every=5)
+        self.assertFalse(writer.resumed)
+        for id_y, id_x in self.points[:n_first]:
+            writer.write_sweep(id_y, id_x, sweep_psd(id_y, id_x), self.freq)
+        # Without a flush, the last sweeps (12 = 2 x 5 + 2) are not marked completed yet.
+        self.assertEqual(writer.n_completed, 10)
+        writer.close()
+
+        writer = PSDChunkWriter(self.dataset_path, Y_DIV, X_DIV, BINS, flush_every=5)
+        self.assertTrue(writer.resumed)
+        self.assertEqual(writer.n_completed, n_first)
+        np.testing.assert_array_equal(writer.read_sweep(*self.points[n_first - 1]),
+                                      sweep_psd(*self.points[n_first - 1]))
+        for id_y, id_x in self.points:
+            self.assertEqual(writer.is_completed(id_y, id_x), (id_y, id_x) in self.points[:n_first])
+            if not writer.is_completed(id_y, id_x):
+                writer.write_sweep(id_y, id_x, sweep_psd(id_y, id_x), self.freq)
+        writer.finalize(rotate_90d=1, metadata={'grid': [Y_DIV, X_DIV]})
+
+        self.assertFalse(os.path.exists(f"{self.dataset_path}{os.sep}{PROGRESS_FILE_NAME}"))
+        self.assertEqual(read_psd_chunk_metadata(self.dataset_path), {'grid': [Y_DIV, X_DIV]})
+        expected = np.array([[sweep_psd(id_y, id_x) for id_x in range(X_DIV)] for id_y in range(Y_DIV)])
+        chunk = load_psd_chunk(self.dataset_path, verbose=False)
+        np.testing.assert_array_equal(chunk.data, np.rot90(expected, k=1, axes=(0, 1)))
+        np.testing.assert_array_equal(chunk.freq, self.freq)
+
+        with self.assertRaises(FileExistsError):
+            PSDChunkWriter(self.dataset_path, Y_DIV, X_DIV, BINS)
+        PSDChunkWriter(self.dataset_path, Y_DIV, X_DIV, BINS, resume=False).close()
+        pass
+
+    def test_flush_writes_scattered_points(self):
+        # The synced byte range spans all pending sweeps, also when they are not adjacent.
+        rng = np.random.default_rng(0)
+        order = [self.points[i] for i in rng.permutation(len(self.points))]
+        with PSDChunkWriter(self.dataset_path, Y_DIV, X_DIV, BINS, flush_every=4) as writer:
+            for id_y, id_x in order:
+                writer.write_sweep(id_y, id_x, sweep_psd(id_y, id_x), self.freq)
+        data = np.load(f"{self.dataset_path}{os.sep}psd_chunk.npy")
+        progress = np.load(f"{self.dataset_path}{os.sep}{PROGRESS_FILE_NAME}")
+        self.assertTrue(np.all(progress))
+        for id_y, id_x in self.points:
+            np.testing.assert_array_equal(data[id_y, id_x], sweep_psd(id_y, id_x))
+        pass
+
+    def test_keep_idx(self):
+        keep_idx = np.array([1, 4, 5, 11])
+        with PSDChunkWriter(self.dataset_path, Y_DIV, X_DIV, BINS, keep_idx=keep_idx) as writer:
+            writer.write_sweep(2, 3, sweep_psd(2, 3), self.freq)
+            expected = np.full(BINS, np.nan, dtype=np.float32)
+            expected[keep_idx] = sweep_psd(2, 3)[keep_idx]
+            np.testing.assert_array_equal(writer.read_sweep(2, 3), expected)
+        np.testing.assert_array_equal(np.load(f"{self.dataset_path}{os.sep}freq.npy"), self.freq[keep_idx])
+        np.testing.assert_array_equal(np.load(f"{self.dataset_path}{os.sep}psd_chunk.npy")[2, 3],
+                                      sweep_psd(2, 3)[keep_idx])
+        pass
+
+    def test_resume_rejects_other_grid(self):
+        PSDChunkWriter(self.dataset_path, Y_DIV, X_DIV, BINS).close()
+        with self.assertRaises(AssertionError):
+            PSDChunkWriter(self.dataset_path, Y_DIV + 1, X_DIV, BINS)
+        pass
+
+
+if __name__ == '__main__':
+    unittest.main()